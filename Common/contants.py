@@ -1,3 +1,27 @@
 APP_VERSION = "0.8.6"
 BOT_MENTION_ID = "<@1127985097564495974>"
 APP_NAME = "docker-manager-discord"
+
+# The most (ANSI-stripped) log data kept in memory for a single /logs command.
+LOGS_MAX_BYTES = 64 * 1024 * 1024
+
+# Following logs uses the interaction's token to update the message, which is only valid for 15 minutes.
+LOGS_FOLLOW_MAX_DURATION = 600.0
+LOGS_FOLLOW_IDLE_TIMEOUT = 120.0
+
+# How many containers a bulk operation acts on at the same time.
+BULK_PARALLELISM = 4
+
+# How many containers are sampled for /stats at the same time.
+STATS_CONCURRENCY = 8
+
+# How many services of a git deploy have their images pulled at the same time.
+DEPLOY_PULL_PARALLELISM = 4
+
+# How many jobs (restarts, deploys, ..) run on one docker host at the same time, the others wait in the queue.
+JOBS_PER_HOST = 4
+# How many finished jobs /jobs shows.
+JOB_HISTORY = 50
+
+# How long a command that asks every docker host at the same time waits for one of them, before leaving it out.
+HOST_FANOUT_TIMEOUT = 90.0
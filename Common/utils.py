@@ -1,10 +1,16 @@
 import logging
 import re
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
 logger = logging.getLogger()
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 
+ANSI_ESCAPE = re.compile(r'\x1B\[[0-?]*[ -/]*[@-~]')
+ANSI_ESCAPE_BYTES = re.compile(rb'\x1B\[[0-?]*[ -/]*[@-~]')
+
+RELATIVE_TIME = re.compile(r'^(\d+)\s*([smhdw])$')
+TIME_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+
 
 def parseAndGetFormattedTimeDifference(unformattedDate: str):
     formattedDate = unformattedDate.split(".")[0].replace("T", " ")
@@ -35,9 +41,78 @@ def formatAmount(base: str, amount: int):
     return f"{amount} {base}{'s' if amount != 1 else ''}"
 
 
+def parse_key_value_list(text: str) -> dict[str, str]:
+    """Parses a string like "restart=60,logs=120" into a dictionary."""
+    result = {}
+    for pair in str(text or "").split(","):
+        if "=" not in pair:
+            continue
+
+        key, value = pair.split("=", 1)
+        result[key.strip()] = value.strip()
+
+    return result
+
+
 def strip_ansi_escape_codes(text):
-    ansi_escape = re.compile(r'\x1B\[[0-?]*[ -/]*[@-~]')
-    return ansi_escape.sub('', text)
+    return ANSI_ESCAPE.sub('', text)
+
+
+def strip_ansi_escape_codes_bytes(data: bytes) -> bytes:
+    return ANSI_ESCAPE_BYTES.sub(b'', data)
+
+
+def parse_time_argument(text: str) -> datetime | None:
+    """
+    Parses a moment in time given by a user: either relative to now ("30s", "10m", "2h", "1d", "1w"),
+    or absolute ("2023-08-01", "2023-08-01 12:30") in the local timezone of the bot. Returns None for an empty argument.
+    The result is timezone aware, as docker would take a naive datetime for UTC.
+    """
+    text = (text or "").strip().lower()
+    if text == "":
+        return None
+
+    relative = RELATIVE_TIME.match(text)
+    if relative is not None:
+        return datetime.now(timezone.utc) - timedelta(**{TIME_UNITS[relative.group(2)]: int(relative.group(1))})
+
+    for date_format in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(text.replace("t", " "), date_format).astimezone()
+        except ValueError:
+            continue
+
+    raise ValueError(f"Could not understand the time `{text}`. "
+                     f"Use something like `10m`, `2h`, `1d` or `2023-08-01 12:30`.")
+
+
+def parse_duration(text: str) -> timedelta:
+    """Parses a duration given by a user, like "30s", "10m", "2h", "1d" or "1w"."""
+    relative = RELATIVE_TIME.match((text or "").strip().lower())
+    if relative is None:
+        raise ValueError(f"Could not understand the duration `{text}`. Use something like `30m`, `2h` or `1d`.")
+
+    return timedelta(**{TIME_UNITS[relative.group(2)]: int(relative.group(1))})
+
+
+def format_duration(seconds: float) -> str:
+    if seconds < 1:
+        return f"{seconds * 1000:.0f}ms"
+    if seconds < 60:
+        return f"{seconds:.1f}s"
+    if seconds < 3600:
+        return f"{int(seconds // 60)}m {int(seconds % 60):02d}s"
+
+    return f"{int(seconds // 3600)}h {int(seconds % 3600 // 60):02d}m"
+
+
+def formatBytes(amount: float):
+    for unit in ["B", "KB", "MB", "GB"]:
+        if abs(amount) < 1024:
+            return f"{amount:.1f} {unit}" if unit != "B" else f"{int(amount)} B"
+        amount /= 1024
+
+    return f"{amount:.1f} TB"
 
 
 def parse_tracebacks(logs):
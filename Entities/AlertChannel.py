@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import time
+from collections import Counter, OrderedDict
+
+import discord
+
+from Common.contants import APP_VERSION
+from Common.utils import format_duration
+
+logger = logging.getLogger()
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+# The most titles listed in the message about alerts that were left out because of the rate limit.
+MAX_LISTED_SUPPRESSED = 10
+
+
+class AlertChannel:
+    """
+    Posts alerts to a configured discord channel, deduplicated by a key.
+
+    The first occurrence of a key is posted, later occurrences only increase its counter on the original message (at
+    most once per `edit_interval`). An alert can be given a window: occurrences after it start a new message.
+    `publish` never waits, so it can be called from any handler.
+
+    All messages and edits share a budget of `max_per_minute`, so a mass failure doesn't run into discord's rate
+    limits. Alerts over the budget are left out and summed up in one message once there is room again. Alerts about a
+    muted subject (a container name) are dropped.
+    """
+
+    def __init__(self, discordClient: discord.Client, channel_id: int, edit_interval: float = 30.0,
+                 forget_after: float = 24 * 3600.0, max_tracked: int = 500, max_per_minute: int = 20):
+        self.discord_client = discordClient
+        self.channel_id = channel_id
+        self.edit_interval = edit_interval
+        self.forget_after = forget_after
+        self.max_tracked = max_tracked
+        self.max_per_minute = max_per_minute
+
+        self._queue = asyncio.Queue(maxsize=1000)
+        # Alert key -> {"Message", "Count", "Title", "Text", "Window", "First", "Last", "Edited", "Dirty"}.
+        self._alerts: OrderedDict[str, dict] = OrderedDict()
+        # Title -> how many alerts with it were left out because of the rate limit.
+        self._suppressed: Counter = Counter()
+        self._tokens = float(max_per_minute)
+        self._refilled = time.monotonic()
+        # Subject -> until when (time.monotonic()) its alerts are dropped.
+        self._muted: dict[str, float] = {}
+
+    def publish(self, key: str, title: str, text: str, subject: str = None, window: float = None):
+        if subject is not None and self.is_muted(subject):
+            return
+
+        try:
+            self._queue.put_nowait((key, title, text, window))
+        except asyncio.QueueFull:
+            # Left out like the alerts over the rate limit, without a log line for every one of a flood.
+            self._suppressed[title] += 1
+
+    def mute(self, subject: str, duration: float):
+        self._muted[subject] = time.monotonic() + duration
+
+    def unmute(self, subject: str) -> bool:
+        return self._muted.pop(subject, None) is not None
+
+    def is_muted(self, subject: str) -> bool:
+        until = self._muted.get(subject)
+        if until is not None and until <= time.monotonic():
+            del self._muted[subject]
+            return False
+
+        return until is not None
+
+    def mutes(self) -> dict[str, float]:
+        """The muted subjects, with the seconds until they're unmuted."""
+        now = time.monotonic()
+        return {subject: until - now for subject, until in self._muted.items() if until > now}
+
+    async def run(self):
+        flushed = time.monotonic()
+        while True:
+            try:
+                key, title, text, window = await asyncio.wait_for(
+                    self._queue.get(), timeout=max(self.edit_interval - (time.monotonic() - flushed), 0.0))
+
+                try:
+                    await self.__handle(key, title, text, window)
+                except discord.HTTPException as e:
+                    logger.error(f"[ERROR] Could not post alert '{title}': {e}")
+            except asyncio.TimeoutError:
+                pass
+
+            # Also while alerts keep coming in, so a flood doesn't hold back the counters and the summary.
+            if time.monotonic() - flushed >= self.edit_interval:
+                await self.__flush_counts()
+                await self.__post_suppressed()
+                flushed = time.monotonic()
+
+    # Private methods
+
+    async def __handle(self, key: str, title: str, text: str, window: float = None):
+        now = time.monotonic()
+        alert = self._alerts.get(key)
+
+        if alert is not None and now - alert["First"] < (alert["Window"] or self.forget_after):
+            alert["Count"] += 1
+            alert["Last"] = now
+            self._alerts.move_to_end(key)
+
+            alert["Dirty"] = True
+            if now - alert["Edited"] >= self.edit_interval and self.__take_token():
+                await self.__update_count(alert)
+            return
+
+        if not self.__take_token():
+            self._suppressed[title] += 1
+            return
+
+        message = await self.__send(create_alert_embed(title, text, 1, 0.0))
+
+        self._alerts[key] = {"Message": message, "Count": 1, "Title": title, "Text": text, "Window": window,
+                             "First": now, "Last": now, "Edited": now, "Dirty": False}
+        self._alerts.move_to_end(key)
+        while len(self._alerts) > self.max_tracked:
+            self._alerts.popitem(last=False)
+
+    async def __send(self, embed: discord.Embed) -> discord.Message:
+        channel = self.discord_client.get_channel(self.channel_id) \
+            or await self.discord_client.fetch_channel(self.channel_id)
+        return await channel.send(embed=embed)
+
+    async def __flush_counts(self):
+        """Updates the counters that changed while their message was recently edited."""
+        for alert in list(self._alerts.values()):
+            if alert["Dirty"] and self.__take_token():
+                try:
+                    await self.__update_count(alert)
+                except discord.HTTPException as e:
+                    logger.error(f"[ERROR] Could not update alert '{alert['Title']}': {e}")
+
+    async def __post_suppressed(self):
+        if len(self._suppressed) == 0 or not self.__take_token():
+            return
+
+        total = sum(self._suppressed.values())
+        logger.warning(f"[WARNING] Left out {total} alerts to stay under the rate limit")
+        lines = [f"{count}× {title}" for title, count in self._suppressed.most_common(MAX_LISTED_SUPPRESSED)]
+        if len(self._suppressed) > MAX_LISTED_SUPPRESSED:
+            lines.append(f"and {len(self._suppressed) - MAX_LISTED_SUPPRESSED} more")
+        self._suppressed.clear()
+
+        try:
+            await self.__send(create_alert_embed(f"{total} alerts were left out to stay under the rate limit",
+                                                 "\n".join(lines), 1, 0.0))
+        except discord.HTTPException as e:
+            logger.error(f"[ERROR] Could not post the left out alerts: {e}")
+
+    async def __update_count(self, alert: dict):
+        alert["Edited"] = time.monotonic()
+        alert["Dirty"] = False
+        await alert["Message"].edit(embed=create_alert_embed(alert["Title"], alert["Text"], alert["Count"],
+                                                             alert["Last"] - alert["First"]))
+
+    def __take_token(self) -> bool:
+        """Takes one message or edit from the budget, which refills evenly over a minute."""
+        now = time.monotonic()
+        self._tokens = min(self._tokens + (now - self._refilled) * self.max_per_minute / 60, self.max_per_minute)
+        self._refilled = now
+
+        if self._tokens < 1:
+            return False
+
+        self._tokens -= 1
+        return True
+
+
+def create_alert_embed(title: str, text: str, count: int, span: float) -> discord.Embed:
+    embed = discord.Embed(title=title[:256], description=f"```\n{text[-3900:]}\n```", colour=discord.Colour.red())
+    footer = f"Version {APP_VERSION}"
+    if count > 1:
+        footer += f" | seen {count}× in {format_duration(span)}"
+    embed.set_footer(text=footer)
+    return embed
@@ -0,0 +1,98 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import docker
+
+logger = logging.getLogger()
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+# How many calls of one operation type may run at the same time.
+DEFAULT_LIMITS = {
+    "list": 8,
+    "inspect": 8,
+    "start": 4,
+    "stop": 4,
+    "restart": 4,
+    "rename": 4,
+    "remove": 4,
+    "logs": 2,
+    "logsearch": 4,
+    "stats": 8,
+    "run": 2,
+    "pull": 2,
+    "git": 2,
+}
+
+# How long (in seconds) a call of one operation type may take before we stop waiting for it.
+DEFAULT_TIMEOUTS = {
+    "list": 30.0,
+    "inspect": 30.0,
+    "start": 60.0,
+    "stop": 60.0,
+    "restart": 90.0,
+    "rename": 30.0,
+    "remove": 60.0,
+    "logs": 120.0,
+    "logsearch": 120.0,
+    "stats": 30.0,
+    "run": 600.0,
+    # Pull progress is shown in a message that can only be updated for 15 minutes.
+    "pull": 840.0,
+    "git": 300.0,
+}
+
+
+class DockerOperationTimeout(Exception):
+    def __init__(self, operation: str, timeout: float):
+        super().__init__(f"Docker operation `{operation}` did not finish within {timeout:g} seconds.")
+        self.operation = operation
+        self.timeout = timeout
+
+
+class AsyncDocker:
+    """
+    Runs the blocking docker-py (and git) calls on a bounded worker pool, so they never stall the event loop.
+
+    Every call has an operation type, which determines how many of those calls may run at the same time and how long
+    we wait for one before giving up.
+    """
+
+    def __init__(self, dockerClient: docker.DockerClient, max_workers: int = 16, limits: dict[str, int] = None,
+                 timeouts: dict[str, float] = None):
+        self.client = dockerClient
+        self.limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="docker")
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+
+    async def run(self, operation: str, func, *args, **kwargs):
+        semaphore = self.__get_semaphore(operation)
+        timeout = self.timeouts.get(operation, 60.0)
+
+        await semaphore.acquire()
+        future = asyncio.get_running_loop().run_in_executor(self._pool, lambda: func(*args, **kwargs))
+
+        # The worker thread cannot be interrupted, so the slot stays taken until the call actually returns.
+        def on_done(done_future: asyncio.Future):
+            semaphore.release()
+            if not done_future.cancelled():
+                done_future.exception()  # Marks the exception as retrieved when nobody is waiting anymore.
+
+        future.add_done_callback(on_done)
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"[WARNING] Docker operation '{operation}' timed out after {timeout:g} seconds")
+            raise DockerOperationTimeout(operation, timeout)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def __get_semaphore(self, operation: str) -> asyncio.Semaphore:
+        if operation not in self._semaphores:
+            self._semaphores[operation] = asyncio.Semaphore(self.limits.get(operation, 4))
+
+        return self._semaphores[operation]
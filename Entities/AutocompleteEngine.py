@@ -0,0 +1,133 @@
+import asyncio
+import re
+from bisect import bisect_left
+
+from discord import app_commands
+
+from Entities.ContainerIndex import ContainerIndex
+from Entities.HostRegistry import HostRegistry
+
+# Discord rejects autocomplete responses with more choices than this.
+MAX_CHOICES = 25
+# Discord's maximum length of a choice's name and value.
+MAX_CHOICE_LENGTH = 100
+
+
+class AutocompleteEngine:
+    """
+    Ranked container name completion over a cached, sorted name index.
+
+    Results are ranked prefix matches first, then substring matches, then fuzzy (subsequence) matches. Rapid keystrokes
+    of the same user are coalesced: only the latest one gets an answer, earlier ones get an empty list.
+    """
+
+    def __init__(self, container_index: ContainerIndex | HostRegistry, debounce: float = 0.1):
+        self.container_index = container_index
+        self.debounce = debounce
+
+        # Requests that could (or could not) reuse the sorted name index.
+        self.hits = 0
+        self.misses = 0
+
+        self._version = -1
+        self._names: list[str] = []
+        self._lowered: list[str] = []
+        self._latest: dict[int, object] = {}
+
+    async def complete(self, user_id: int, current: str, on_debounced=None) -> list[app_commands.Choice[str]]:
+        """`on_debounced` is called once this keystroke turned out to be the latest, when the actual work starts."""
+        if not await self.__is_latest_keystroke(user_id, on_debounced):
+            return []
+
+        # A single choice that is too long makes discord reject the whole response.
+        return [app_commands.Choice(name=name, value=name) for name in self.rank(current)
+                if len(name) <= MAX_CHOICE_LENGTH]
+
+    async def complete_multiple(self, user_id: int, current: str, on_debounced=None) -> list[app_commands.Choice[str]]:
+        """Completes the last entry of a comma-separated list, leaving out the entries that were already chosen."""
+        if not await self.__is_latest_keystroke(user_id, on_debounced):
+            return []
+
+        *chosen, partial = current.split(",")
+        chosen = [entry.strip() for entry in chosen if entry.strip() != ""]
+        prefix = "".join(entry + "," for entry in chosen)
+
+        choices = []
+        for name in self.rank(partial.strip(), exclude=set(chosen)):
+            value = prefix + name
+            if len(value) > MAX_CHOICE_LENGTH:
+                continue
+
+            choices.append(app_commands.Choice(name=value, value=value))
+
+        return choices
+
+    def rank(self, query: str, exclude: set[str] = None, limit: int = MAX_CHOICES) -> list[str]:
+        self.__refresh()
+
+        query = query.lower()
+        exclude = exclude or set()
+        results: list[str] = []
+        seen: set[str] = set(exclude)
+
+        def add(name: str) -> bool:
+            if name not in seen:
+                seen.add(name)
+                results.append(name)
+
+            return len(results) >= limit
+
+        # Prefix matches are a contiguous range of the sorted index.
+        position = bisect_left(self._lowered, query)
+        while position < len(self._lowered) and self._lowered[position].startswith(query):
+            if add(self._names[position]):
+                return results
+            position += 1
+
+        # Substring matches, the earlier the match the better.
+        substring_matches = [
+            (lowered.find(query), len(lowered), name)
+            for lowered, name in zip(self._lowered, self._names)
+            if query in lowered and name not in seen
+        ]
+        for _, _, name in sorted(substring_matches):
+            if add(name):
+                return results
+
+        # Fuzzy matches: the query's characters appear in order, like "ngx" for "nginx".
+        fuzzy = re.compile(".*?".join(re.escape(character) for character in query))
+        for lowered, name in zip(self._lowered, self._names):
+            if name not in seen and fuzzy.search(lowered) and add(name):
+                return results
+
+        return results
+
+    # Private methods
+
+    def __refresh(self):
+        if self._version == self.container_index.version:
+            self.hits += 1
+            return
+
+        self.misses += 1
+        self._names = sorted(self.container_index.names(), key=str.lower)
+        self._lowered = [name.lower() for name in self._names]
+        self._version = self.container_index.version
+
+    async def __is_latest_keystroke(self, user_id: int, on_debounced=None) -> bool:
+        if self.debounce <= 0:
+            if on_debounced is not None:
+                on_debounced()
+            return True
+
+        token = object()
+        self._latest[user_id] = token
+        await asyncio.sleep(self.debounce)
+
+        if self._latest.get(user_id) is not token:
+            return False
+
+        del self._latest[user_id]
+        if on_debounced is not None:
+            on_debounced()
+        return True
@@ -0,0 +1,148 @@
+import asyncio
+import fnmatch
+import logging
+import time
+
+import discord
+from docker.errors import APIError, NotFound
+from requests.exceptions import RequestException
+
+from Common.contants import APP_NAME
+from Entities.AsyncDocker import DockerOperationTimeout
+from Entities.HostRegistry import HostRegistry
+
+logger = logging.getLogger()
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+# Action -> (operation type, progress verb, docker API method name, extra arguments).
+ACTIONS = {
+    "restart": ("restart", "Restarting", "restart", {}),
+    "stop": ("stop", "Stopping", "stop", {}),
+    "start": ("start", "Starting", "start", {}),
+    "remove": ("remove", "Removing", "remove_container", {"force": True}),
+}
+
+MAX_LISTED_FAILURES = 15
+
+
+def select_containers(hosts: HostRegistry, names: str = "", glob: str = "", label: str = "", status: str = "",
+                      exclude: str = "", host_name: str = "") -> list[dict]:
+    """
+    Selects containers from the indexes of all (or the given) hosts. All given selectors have to match:
+    - names: a comma-separated list of exact names
+    - glob: a name pattern, like "api-*"
+    - label: "key" or "key=value", like "com.docker.compose.project=website"
+    - status: like "running" or "exited"
+    Containers in the comma-separated `exclude` list (exact names) are left out.
+    """
+    wanted_names = {name.strip() for name in names.split(",") if name.strip() != ""}
+    excluded_names = {name.strip() for name in exclude.split(",") if name.strip() != ""}
+    label_key, _, label_value = label.partition("=")
+
+    selected = []
+    for container in hosts.list_containers(status=status, host_name=host_name):
+        if container["Name"] in excluded_names:
+            continue
+        if len(wanted_names) > 0 and container["Name"] not in wanted_names:
+            continue
+        if glob != "" and not fnmatch.fnmatch(container["Name"], glob):
+            continue
+        if label_key != "" and (label_key.strip() not in container["Labels"] or
+                                (label_value != "" and container["Labels"][label_key.strip()] != label_value.strip())):
+            continue
+
+        selected.append(container)
+
+    return selected
+
+
+class BulkOperator:
+    """
+    Runs one action on many containers with bounded parallelism, reporting the progress in a single message that is
+    updated as it goes, and a per-container success/failure summary at the end.
+
+    The parallelism is per host, so the containers of a slow host don't hold up those of the others.
+    """
+
+    def __init__(self, hosts: HostRegistry, action: str, parallelism: int = 4, update_interval: float = 1.5):
+        self.hosts = hosts
+        self.action = action
+        self.parallelism = parallelism
+        self.update_interval = update_interval
+
+        self.succeeded: list[str] = []
+        self.failed: dict[str, str] = {}
+        self.skipped: list[str] = []
+        self.total = 0
+
+    async def run(self, containers: list[dict], interaction: discord.Interaction):
+        operation, verb, method_name, arguments = ACTIONS[self.action]
+
+        # Never take ourselves down along with the rest.
+        self.skipped = [container["Name"] for container in containers if container["Name"] == APP_NAME]
+        containers = [container for container in containers if container["Name"] != APP_NAME]
+        self.total = len(containers)
+
+        message = await interaction.followup.send(self.__render(verb), ephemeral=True, wait=True)
+        semaphores = {container["Host"]: asyncio.Semaphore(self.parallelism) for container in containers}
+        started = time.monotonic()
+
+        async def run_one(container: dict):
+            name = self.hosts.display_name(container)
+            async with semaphores[container["Host"]]:
+                try:
+                    host = self.hosts.get_host(container["Host"])
+                    await host.docker.run(operation, getattr(host.client.api, method_name), container["Id"],
+                                          **arguments)
+                    self.succeeded.append(name)
+                except NotFound:
+                    self.failed[name] = "not found"
+                except APIError as e:
+                    self.failed[name] = str(e.explanation)
+                except (DockerOperationTimeout, RequestException) as e:
+                    self.failed[name] = str(e)
+
+        tasks = [asyncio.create_task(run_one(container)) for container in containers]
+        shown = self.__render(verb)
+        while not all(task.done() for task in tasks):
+            await asyncio.wait(tasks, timeout=self.update_interval)
+
+            progress = self.__render(verb)
+            if not all(task.done() for task in tasks) and progress != shown:
+                await self.__show(message, progress)
+                shown = progress
+
+        await self.__show(message, self.__render(verb, done=True, duration=time.monotonic() - started))
+
+    # Private methods
+
+    @staticmethod
+    async def __show(message: discord.WebhookMessage, content: str):
+        # The containers were acted on regardless, like when the interaction expired halfway.
+        try:
+            await message.edit(content=content)
+        except discord.HTTPException as e:
+            logger.warning(f"[WARNING] Could not update the bulk operation message: {e}")
+
+    def __render(self, verb: str, done: bool = False, duration: float = 0.0) -> str:
+        finished = len(self.succeeded) + len(self.failed)
+        if done:
+            lines = [f"**{self.action.capitalize()}** finished in {duration:.1f} seconds: "
+                     f"{len(self.succeeded)} succeeded, {len(self.failed)} failed."]
+        else:
+            lines = [f"{verb} {self.total} containers.. {finished}/{self.total} done"
+                     + (f", {len(self.failed)} failed" if len(self.failed) > 0 else "")]
+
+        if done and len(self.succeeded) > 0:
+            succeeded = ", ".join(f"`{name}`" for name in sorted(self.succeeded))
+            lines.append(f"✅ {succeeded if len(succeeded) < 1000 else succeeded[:1000] + '…'}")
+
+        for name, reason in list(self.failed.items())[:MAX_LISTED_FAILURES]:
+            lines.append(f"❌ `{name}`: {reason[:150]}")
+        if len(self.failed) > MAX_LISTED_FAILURES:
+            lines.append(f"…and {len(self.failed) - MAX_LISTED_FAILURES} more failures.")
+
+        if len(self.skipped) > 0:
+            lines.append("Skipped myself, you cannot kill me, mortal.")
+
+        return "\n".join(lines)[:2000]
@@ -1,39 +1,75 @@
-import os
-import pathlib
+import asyncio
+import io
+import logging
+import re
+from datetime import datetime
+from urllib.parse import quote, unquote
 
 import discord
 import docker
 from docker.errors import NotFound
-from docker.models.containers import Container
 
-from Common.contants import APP_NAME
-from Common.utils import parseAndGetFormattedTimeDifference, strip_ansi_escape_codes
+from Common.contants import APP_NAME, BULK_PARALLELISM, LOGS_MAX_BYTES, LOGS_FOLLOW_MAX_DURATION, \
+    LOGS_FOLLOW_IDLE_TIMEOUT, STATS_CONCURRENCY, DEPLOY_PULL_PARALLELISM, HOST_FANOUT_TIMEOUT
+from Common.utils import getFormattedTimeDifference, parse_time_argument, parse_duration, format_duration, \
+    formatBytes
+from Entities.AlertChannel import AlertChannel
+from Entities.AsyncDocker import DockerOperationTimeout
+from Entities.BulkOperator import BulkOperator, select_containers
+from Entities.DeployPipeline import DeployPipeline
+from Entities.DeploymentState import DeploymentState
+from Entities.DockerHost import DockerHost
+from Entities.HostRegistry import HostRegistry, UnknownHostError
+from Entities.ImagePuller import ImagePuller
+from Entities.JobQueue import Job, JobFailed, JobQueue
+from Entities.LogFollower import LogFollower
+from Entities.LogSearcher import LogSearcher, format_search_results
+from Entities.LogStreamer import collect_logs, package_logs, MAX_FILES_PER_MESSAGE
 from Entities.MessageCreator import MessageCreator
+from Entities.MetricsCollector import MetricsCollector, downsample, render_sparkline
+from Entities.RepositoryCache import RepositoryCache
 from Entities.RunnerManager import RunnerManager
+from Entities.StatsSampler import StatsSampler, SORT_KEYS, format_stats
+from Entities.SuggestionEngine import SuggestionEngine
+
+logger = logging.getLogger()
+logging.basicConfig(level=logging.INFO, format='%(message)s')
 
 
 class CommandExecutor:
-    def __init__(self, dockerClient: docker.DockerClient, message: discord.Message = None,
-                 interaction: discord.Interaction = None):
-        self.docker_client = dockerClient
+    """
+    Executes the commands against the docker hosts. Commands are about all hosts, or only `host_name` when given.
+    Commands that create something use the default host when no host is given.
+    """
+
+    def __init__(self, hosts: HostRegistry, message: discord.Message = None, interaction: discord.Interaction = None,
+                 host_name: str = "", suggestions: SuggestionEngine = None, jobs: JobQueue = None):
+        self.hosts = hosts
+        self.host_name = host_name
+        # Pass a long-lived engine, so its index is only rebuilt when the containers changed.
+        self.suggestions = suggestions or SuggestionEngine(hosts)
+        # Pass the bot's queue, its limits only hold for the jobs it knows about.
+        self.jobs = jobs or JobQueue()
         self.message = message
         self.interaction = interaction
 
         self.message_creator = MessageCreator(message=message, interaction=interaction)
-        self.runner = RunnerManager(dockerClient, self.message_creator)
 
     async def get_running_total_containers(self) -> (int, int):
-        running = len(self.docker_client.containers.list())
-        total = len(self.docker_client.containers.list(all=True))
-
-        return running, total
+        return self.hosts.counts()
 
-    async def get_help(self):
+    async def get_help(self, page_position: int = 0, previous_snapshot: str = ""):
         listOfCommands = [
             {
                 "Name": "General",
                 "Info": "When using commands where you provide a container name and the exact container is not found, "
-                        "there might be suggestions for related containers."
+                        "you get suggestions for containers with a similar name, id or compose service, even when "
+                        "it was misspelled."
+            },
+            {
+                "Name": "Docker hosts",
+                "Info": "Every command has a host option. Leave it empty to look at all hosts, or to run new "
+                        "containers on the default host."
             },
             {
                 "Name": "Help",
@@ -48,6 +84,20 @@ class CommandExecutor:
                     "Command:": "/containers"
                 }
             },
+            {
+                "Name": "Get the resource usage of containers",
+                "Info": {
+                    "Command:": "/stats",
+                    "Description": "CPU, memory, network and block I/O of the running containers."
+                }
+            },
+            {
+                "Name": "Get the resource usage history of a container",
+                "Info": {
+                    "Command:": "/history",
+                    "Description": "A sparkline of the CPU, memory or network usage of a container over time."
+                }
+            },
             {
                 "Name": "Restart container",
                 "Info": {
@@ -66,172 +116,628 @@ class CommandExecutor:
                     "Command:": "/rename_container"
                 }
             },
+            {
+                "Name": "Act on many containers at once",
+                "Info": {
+                    "Command:": "/bulk",
+                    "Description": "Restarts, stops, starts or removes all containers matching a list of names, a "
+                                   "glob (like api-*), a label (like com.docker.compose.project=website) or a status."
+                }
+            },
+            {
+                "Name": "See the jobs",
+                "Info": {
+                    "Command:": "/jobs",
+                    "Description": "Restarting, stopping, renaming, removing, running and deploying run as jobs, "
+                                   "their results arrive as followups. Shows the running, queued and recent jobs."
+                }
+            },
+            {
+                "Name": "Cancel a job",
+                "Info": {
+                    "Command:": "/cancel"
+                }
+            },
+            {
+                "Name": "Mute the alerts of a container",
+                "Info": {
+                    "Command:": "/mute",
+                    "Description": "Stops the crash, out of memory, health check and error alerts of a container for a "
+                                   "while, like 30m or 2h. Without a container, lists the muted ones."
+                }
+            },
+            {
+                "Name": "Unmute the alerts of a container",
+                "Info": {
+                    "Command:": "/unmute"
+                }
+            },
+            {
+                "Name": "Search the logs of containers",
+                "Info": {
+                    "Command:": "/logsearch",
+                    "Description": "Searches the logs of one or more containers for a regex, and only sends the "
+                                   "matching lines with some context."
+                }
+            },
             {
                 "Name": "Get logs of a container",
                 "Info": {
-                    "Command:": "/rename_container",
-                    "Description": "Retrieves the recent logs from a container as a txt file."
+                    "Command:": "/logs",
+                    "Description": "Retrieves the recent logs from a container as a txt file. Use tail, since and "
+                                   "until to narrow them down. Large logs are gzipped or split into parts. "
+                                   "Use follow to see new lines live for a while."
                 }
             }
         ]
 
-        await self.message_creator.send_embed_with_object_info(
+        await self.message_creator.send_navigable_embed(
+            "help", "",
             title="Help menu",
             description="Overview of all possible commands.",
             items=listOfCommands,
             items_per_page=5,
+            page_position=page_position,
+            previous_snapshot=previous_snapshot
         )
 
-    async def get_and_send_containers(self, filter_name: str = "", status: str = ""):
+    async def get_and_send_containers(self, filter_name: str = "", status: str = "", page_position: int = 0,
+                                      previous_snapshot: str = ""):
+        if await self.__select_hosts() is None:
+            return
+
         containers = await self.get_containers_formatted(filter_name, status)
+        unavailable = self.__describe_unavailable_hosts()
 
         if len(containers) == 0:
             await self.message_creator.send_simple_message("There are currently no other containers found! Start one, "
-                                                           "and run the command again.")
+                                                           "and run the command again." + unavailable)
             return
 
-        await self.message_creator.send_embed_with_object_info(
+        last_synced = "never"
+        if self.hosts.last_synced is not None:
+            last_synced = getFormattedTimeDifference(datetime.utcnow(), self.hosts.last_synced) + " ago"
+
+        await self.message_creator.send_navigable_embed(
+            # Quoted, as the status and the filter are free text that can contain the separator.
+            "containers", ":".join(quote(argument, safe="") for argument in (self.host_name, status, filter_name)),
             title="Containers",
-            description="To manage a specific container, use the container's name.",
+            description=f"To manage a specific container, use the container's name.\n"
+                        f"*Container list last fully synced: {last_synced}.*{unavailable}",
             items=containers,
-            items_per_page=3
+            items_per_page=3,
+            page_position=page_position,
+            previous_snapshot=previous_snapshot
         )
 
-    async def restart_container(self, container_name: str):
-        await self.__raise_if_manager(container_name)
+    async def navigate_page(self, page: dict):
+        """Regenerates the page that a stateless navigation button or menu asks for (see Paginator.decode_page_id)."""
+        position = int(self.interaction.data["values"][0]) if page["Action"] == "jump" else page["Page"]
+
+        match page["View"]:
+            case "containers":
+                # Pages sent before there were hosts don't have one, those are about all hosts.
+                arguments = [unquote(argument) for argument in page["Arguments"].split(":", 2)]
+                self.host_name, status, filter_name = [""] * (3 - len(arguments)) + arguments
+                await self.get_and_send_containers(filter_name, status, page_position=position,
+                                                   previous_snapshot=page["Snapshot"])
+            case "help":
+                await self.get_help(page_position=position, previous_snapshot=page["Snapshot"])
+
+    async def get_and_send_stats(self, filter_name: str = "", sort_by: str = "cpu"):
+        hosts = await self.__select_hosts()
+        if hosts is None:
+            return
 
-        try:
-            containerInfo: Container = self.docker_client.containers.get(container_name)
-            await self.message_creator.send_simple_message(f"Restarting container: `{container_name}`")
-            containerInfo.restart()
-        except NotFound:
-            await self.__send_other_possible_containers(container_name)
+        # Only running containers use resources.
+        containers = self.hosts.list_containers(filter_name, "running", host_name=self.host_name)
 
-    async def stop_container(self, container_name: str):
-        await self.__raise_if_manager(container_name)
+        if len(containers) == 0:
+            await self.message_creator.send_simple_message("There are no running containers to get the stats of.")
+            return
+
+        # Sampling takes docker 1-2 seconds per container, even when done concurrently that takes a while.
+        await self.message_creator.defer()
+
+        # Every host is sampled at the same time, a slow host only leaves its own containers out.
+        per_host = {host.name: [container for container in containers if container["Host"] == host.name]
+                    for host in hosts}
+        results, failures = await self.hosts.fan_out(
+            [host for host in hosts if len(per_host[host.name]) > 0],
+            lambda host: StatsSampler(host.docker, concurrency=STATS_CONCURRENCY).sample(per_host[host.name]),
+            timeout=HOST_FANOUT_TIMEOUT
+        )
+
+        sampled = {container_id: stats for host_sampled in results.values()
+                   for container_id, stats in host_sampled.items()}
+        names = {container["Id"]: self.hosts.display_name(container) for container in containers}
+        ordered = sorted(sampled.items(), key=lambda item: item[1][SORT_KEYS[sort_by]], reverse=True)
+
+        failed = "".join(f"\n*No stats from host `{name}`: {reason}*" for name, reason in failures.items())
+        await self.message_creator.send_embed_with_object_info(
+            title="Container stats",
+            description=f"Resource usage of {len(sampled)} running containers, sorted by {sort_by}. "
+                        f"Net and block I/O are in / out.{failed}",
+            items=[format_stats(names[container_id], stats) for container_id, stats in ordered],
+            items_per_page=5
+        )
+
+    async def send_metric_history(self, collectors: dict[str, MetricsCollector], container_name: str,
+                                  metric: str = "cpu", window: str = "1h"):
+        container, host = await self.__find_container(container_name)
+        if container is None:
+            return
+
+        collector = collectors.get(host.name)
+        if collector is None:
+            await self.message_creator.send_simple_message(f"There is no history of host `{host.name}` yet.")
+            return
 
         try:
-            containerInfo: Container = self.docker_client.containers.get(container_name)
-            await self.message_creator.send_simple_message(f"Stopping container: `{container_name}`")
-            containerInfo.stop()
-        except NotFound:
-            await self.__send_other_possible_containers(container_name)
+            since = parse_time_argument(window)
+        except ValueError as e:
+            await self.message_creator.send_exception(exception_message=str(e), description="Invalid window.")
+            return
+
+        until = datetime.now()
+        ring = collector.rings.get(container["Id"])
+        samples = ring.window(metric, since.timestamp()) if ring is not None and since is not None else []
+        if len(samples) == 0:
+            await self.message_creator.send_simple_message(f"There is no `{metric}` history of `{container_name}` for "
+                                                           f"that window yet. Samples are taken every "
+                                                           f"{collector.interval:.0f} seconds.")
+            return
+
+        values = [value for _, value in samples]
+        formatter = {
+            "cpu": lambda value: f"{value:.1f}%",
+            "memory": formatBytes,
+        }.get(metric, lambda value: formatBytes(value) + "/s")
+
+        sparkline = render_sparkline(downsample(samples, since.timestamp(), until.timestamp(), buckets=40))
+        await self.message_creator.send_simple_message(
+            f"**{metric}** of `{container['Name']}` over the last {window} ({len(samples)} samples):\n"
+            f"```\n{sparkline}\n```"
+            f"min {formatter(min(values))} · avg {formatter(sum(values) / len(values))} · "
+            f"max {formatter(max(values))} · latest {formatter(values[-1])}"
+        )
+
+    async def restart_container(self, container_name: str) -> Job | None:
+        return await self.__submit_container_action(container_name, "restart", "Restarted", "restart")
+
+    async def stop_container(self, container_name: str) -> Job | None:
+        return await self.__submit_container_action(container_name, "stop", "Stopped", "stop")
 
-    async def rename_container(self, old_container_name: str, new_container_name):
+    async def rename_container(self, old_container_name: str, new_container_name) -> Job | None:
+        await self.message_creator.defer()
         await self.__raise_if_manager(old_container_name)
 
+        container, host = await self.__find_container(old_container_name)
+        if container is None:
+            return None
+
+        async def rename() -> str:
+            try:
+                await host.docker.run("rename", host.client.api.rename, container["Id"], new_container_name)
+            except NotFound:
+                await self.__report(self.__send_container_gone(old_container_name))
+                raise JobFailed("the container was removed in the meantime")
+            except docker.errors.APIError as e:
+                await self.__report(self.message_creator.send_simple_message(
+                    f"Could not rename container. Reason: ```-diff{str(e.explanation)}```"))
+                raise JobFailed(str(e.explanation))
+            except DockerOperationTimeout as e:
+                await self.__report(self.message_creator.send_exception(exception_message=str(e),
+                                                                        description="Could not rename container."))
+                raise JobFailed(str(e))
+
+            await self.__report(self.message_creator.send_simple_message(f"Renamed container: `{old_container_name}` "
+                                                                         f"to `{new_container_name}`"))
+            return f"renamed to `{new_container_name}`"
+
+        return await self.__submit_job(f"Rename `{old_container_name}`", rename, [host], [container])
+
+    async def retrieve_logs_from_container(self, container_name, tail: int = 0, since: str = "", until: str = "",
+                                           timestamps: bool = False):
+        container, host = await self.__find_container(container_name)
+        if container is None:
+            return
+
         try:
-            containerInfo: Container = self.docker_client.containers.get(old_container_name)
-            containerInfo.rename(new_container_name)
-            await self.message_creator.send_simple_message(f"Renamed container: `{old_container_name}` "
-                                                           f"to `{new_container_name}`")
-        except NotFound:
-            await self.__send_other_possible_containers(old_container_name)
-        except docker.errors.APIError as e:
-            await self.message_creator.send_simple_message(f"Could not rename container. "
-                                                           f"Reason: ```-diff{str(e.explanation)}```")
+            options = {
+                "tail": tail if tail > 0 else "all",
+                "since": parse_time_argument(since),
+                "until": parse_time_argument(until),
+                "timestamps": timestamps
+            }
+        except ValueError as e:
+            await self.message_creator.send_exception(exception_message=str(e), description="Invalid time.")
+            return
+
+        # Streaming large logs can take a while.
+        await self.message_creator.defer()
 
-    async def retrieve_logs_from_container(self, container_name):
         try:
-            containerInfo: Container = self.docker_client.containers.get(container_name)
+            logs, _ = await host.docker.run("logs", collect_logs, host.client, container["Id"],
+                                            max_bytes=LOGS_MAX_BYTES, **options)
+        except NotFound:
+            await self.__send_container_gone(container_name)
+            return
+        except DockerOperationTimeout as e:
+            await self.message_creator.send_exception(exception_message=str(e),
+                                                      description="Could not retrieve the logs.")
+            return
 
-            decoded_logs = containerInfo.logs().decode()
-            logs_without_ansi = strip_ansi_escape_codes(decoded_logs)
+        size_limit = self.interaction.guild.filesize_limit if self.interaction.guild is not None \
+            else discord.utils.DEFAULT_FILE_SIZE_LIMIT_BYTES
+        # Gzipping up to LOGS_MAX_BYTES takes seconds on a small machine, which the event loop can't wait for.
+        files = await asyncio.to_thread(package_logs, logs, f"{container['Name']}-logs", size_limit)
 
-            pathlib.Path('temp').mkdir(exist_ok=True)
-            tempFileName = f'temp/{containerInfo.name}-logs.txt'
-            with open(tempFileName, 'w') as f:
-                f.write(logs_without_ansi)
+        text = f"Here are the logs of container **{container['Name']}**:"
+        for index in range(0, len(files), MAX_FILES_PER_MESSAGE):
+            await self.message_creator.send_simple_message(text, files=files[index:index + MAX_FILES_PER_MESSAGE])
+            text = ""
 
-            await self.message_creator.send_simple_message(f"Here are the logs of container **{containerInfo.name}**:",
-                                                           file=discord.File(tempFileName))
-            os.remove(tempFileName)
-        except NotFound:
-            await self.__send_other_possible_containers(container_name)
+    async def follow_logs_of_container(self, container_name, tail: int = 20):
+        container, host = await self.__find_container(container_name)
+        if container is None:
+            return
 
-    async def remove_container(self, container_name):
-        await self.__raise_if_manager(container_name)
+        await self.message_creator.defer()
 
-        try:
-            containerInfo: Container = self.docker_client.containers.get(container_name)
-            await self.message_creator.send_simple_message(f"Removing container: `{container_name}`")
+        # Runs as its own task, so the command is done right away.
+        LogFollower(host.docker, container, self.interaction, tail=tail, idle_timeout=LOGS_FOLLOW_IDLE_TIMEOUT,
+                    max_duration=LOGS_FOLLOW_MAX_DURATION).start()
 
-            containerInfo.remove(force=True)
-        except NotFound:
-            await self.__send_other_possible_containers(container_name)
+    async def search_logs(self, pattern: str, container_names: str = "", name_filter: str = "", since: str = "1h",
+                          until: str = "", context: int = 2, max_matches: int = 50, ignore_case: bool = False):
+        if await self.__select_hosts() is None:
+            return
 
-    async def remove_range_of_containers(self, container_range: int, exclude: str = ""):
-        containers = self.docker_client.containers.list(all=True)
+        if container_names.strip() != "":
+            names = [name.strip() for name in container_names.split(",") if name.strip() != ""]
+            containers = []
+            for name in names:
+                container, _ = await self.__find_container(name)
+                if container is None:
+                    return
+                containers.append(container)
+        elif name_filter.strip() != "":
+            containers = self.hosts.list_containers(name_filter.strip(), host_name=self.host_name)
+        else:
+            await self.message_creator.send_simple_message("Provide one or more containers, or a name filter.")
+            return
 
-        removed: int = 0
-        for index in range(0, container_range if container_range <= len(containers) else len(containers)):
-            container = containers[index]
-            if container.name == APP_NAME or container.name in exclude:
-                continue
+        if len(containers) == 0:
+            await self.message_creator.send_simple_message(f"There are no containers matching `{name_filter}`.")
+            return
 
-            container.remove(force=True)
-            removed += 1
+        try:
+            searcher = LogSearcher(self.hosts, pattern, context=context, max_matches=max_matches,
+                                   ignore_case=ignore_case)
+            since_time, until_time = parse_time_argument(since), parse_time_argument(until)
+        except re.error as e:
+            await self.message_creator.send_exception(exception_message=str(e), description="Invalid regex.")
+            return
+        except ValueError as e:
+            await self.message_creator.send_exception(exception_message=str(e), description="Invalid time.")
+            return
 
-        await self.message_creator.send_simple_message(f"Removed {removed} containers.")
+        await self.message_creator.defer()
 
-    async def run_new_container(self, image_name: str, cli_commands: str = None, container_name: str = None):
         try:
-            container = await self.runner.run_container_from_cli(image_name, cli_commands, container_name)
-            await self.message_creator.send_simple_message(f"Running container '**{container.name}**' "
-                                                           f"from image `{image_name}` "
-                                                           f"and executing commands: `{cli_commands}`")
-        except docker.errors.ImageNotFound:
-            await self.message_creator.send_simple_message(f"Could not find an image with name `{image_name}`.")
-        except docker.errors.APIError as e:
-            await self.message_creator.send_exception(exception_message=e.explanation,
-                                                      description="Could not run container.")
-
-    async def deploy_from_git(self, git_repo_url: str, docker_compose_name: str = ""):
-        await self.runner.run_container_from_git(git_repo_url, compose_name=docker_compose_name)
+            results = await searcher.search(containers, since=since_time, until=until_time)
+        except DockerOperationTimeout as e:
+            await self.message_creator.send_exception(exception_message=str(e),
+                                                      description="Could not search the logs.")
+            return
 
-    async def get_containers_formatted(self, filter_name: str = "", status: str = ""):
-        if status is "":
-            containers = self.docker_client.containers.list(all=True)
+        summary = f"Found **{searcher.matches}** matches for `{pattern}` in {len(results)} of " \
+                  f"{len(containers)} containers" + (" (stopped at the maximum)." if searcher.capped else ".")
+        if len(searcher.failed) > 0:
+            summary += f" Could not search {len(searcher.failed)} containers: " + \
+                       ", ".join(f"`{name}`" for name in list(searcher.failed)[:10])
+        if searcher.matches == 0:
+            await self.message_creator.send_simple_message(summary)
+            return
+
+        formatted = format_search_results(results)
+        if len(summary) + len(formatted) < 1900:
+            await self.message_creator.send_simple_message(f"{summary}\n```\n{formatted}\n```")
         else:
-            containers = self.docker_client.containers.list(filters={"status": status})
+            await self.message_creator.send_simple_message(
+                summary,
+                file=discord.File(io.BytesIO(formatted.encode()), filename="logsearch.txt")
+            )
+
+    async def remove_container(self, container_name) -> Job | None:
+        return await self.__submit_container_action(container_name, "remove", "Removed", "remove_container",
+                                                    force=True)
 
-        containerInfoList = []
-        for container in containers:
-            if filter_name.lower() not in container.name.lower():
-                continue
+    async def remove_range_of_containers(self, container_range: int, exclude: str = "") -> Job | None:
+        await self.message_creator.defer()
+        if await self.__select_hosts() is None:
+            return None
 
-            runningFor = ""
-            if container.status == "running":
-                runningFor = parseAndGetFormattedTimeDifference(container.attrs.get("State")["StartedAt"])
+        # Most recently created first, like `docker ps -a`.
+        recent = self.hosts.list_containers(host_name=self.host_name)[:max(container_range, 0)]
+        # Exact names, so excluding `web` doesn't also protect `webhook`.
+        excluded = {name.strip() for name in exclude.split(",")}
+        containers = [container for container in recent if container["Name"] not in excluded]
 
-            ports = []
+        return await self.__submit_bulk_job(f"Remove the {len(containers)} most recent containers",
+                                            BulkOperator(self.hosts, "remove"), containers)
+
+    async def bulk_operation(self, action: str, names: str = "", glob: str = "", label: str = "", status: str = "",
+                             exclude: str = "") -> Job | None:
+        await self.message_creator.defer()
+        if names == glob == label == status == "":
+            await self.message_creator.send_simple_message("Provide at least one selector: names, glob, label or "
+                                                           "status.")
+            return None
+
+        if APP_NAME in [name.strip() for name in names.split(",")]:
+            await self.__raise_if_manager(APP_NAME)
+
+        if await self.__select_hosts() is None:
+            return None
+
+        containers = select_containers(self.hosts, names=names, glob=glob, label=label, status=status,
+                                       exclude=exclude, host_name=self.host_name)
+        if len(containers) == 0:
+            await self.message_creator.send_simple_message("No containers match the given selectors.")
+            return None
+
+        return await self.__submit_bulk_job(f"{action.capitalize()} {len(containers)} containers",
+                                            BulkOperator(self.hosts, action, parallelism=BULK_PARALLELISM), containers)
+
+    async def run_new_container(self, image_name: str, cli_commands: str = None,
+                                container_name: str = None) -> Job | None:
+        # Pulling a big image can take minutes, longer than an interaction may go unanswered.
+        await self.message_creator.defer()
+        host = await self.__select_target_host()
+        if host is None:
+            return None
+
+        async def run() -> str:
             try:
-                for k, v in container.attrs.get("HostConfig")["PortBindings"].items():
-                    ports.append(f"{v[0]['HostPort']}:{k.replace('/tcp', '')}")
-            except AttributeError:
-                pass
-            except KeyError:
-                pass
-
-            containerInfo = {
-                "Name": container.name,
-                "Info": {
-                    "Status": container.status,
-                    "Started": container.attrs.get("State")["StartedAt"][:10],
-                    "Running for": runningFor,
-                    "Ports": ", ".join(ports)
-                }
-            }
+                await ImagePuller(host.docker).ensure_image(image_name, self.interaction)
+                container = await RunnerManager(host.docker, self.message_creator) \
+                    .run_container_from_cli(image_name, cli_commands, container_name)
+            except docker.errors.NotFound:
+                await self.__report(self.message_creator.send_simple_message(
+                    f"Could not find an image with name `{image_name}`."))
+                raise JobFailed("no such image")
+            except docker.errors.APIError as e:
+                await self.__report(self.message_creator.send_exception(exception_message=e.explanation,
+                                                                        description="Could not run container."))
+                raise JobFailed(str(e.explanation))
+            except DockerOperationTimeout as e:
+                await self.__report(self.message_creator.send_exception(exception_message=str(e),
+                                                                        description="Could not run container."))
+                raise JobFailed(str(e))
+
+            await self.__report(self.message_creator.send_simple_message(f"Running container '**{container.name}**' "
+                                                                         f"from image `{image_name}` "
+                                                                         f"and executing commands: `{cli_commands}`"))
+            return f"started container `{container.name}`"
+
+        return await self.__submit_job(f"Run `{image_name}`", run, [host])
+
+    async def deploy_from_git(self, repository_cache: RepositoryCache, deployment_state: DeploymentState,
+                              git_repo_url: str, docker_compose_name: str = "docker-compose.yml",
+                              timeout: float = 840.0) -> Job | None:
+        await self.message_creator.defer()
+        host = await self.__select_target_host()
+        if host is None:
+            return None
+
+        # Reports its progress in a message of its own, deploys of the same project wait for each other.
+        pipeline = DeployPipeline(host.docker, repository_cache, deployment_state, git_repo_url,
+                                  compose_name=docker_compose_name, timeout=timeout,
+                                  pull_parallelism=DEPLOY_PULL_PARALLELISM, host_name=host.name,
+                                  compose_options=host.compose_options())
+
+        async def deploy() -> str:
+            await pipeline.run(self.interaction)
+            if pipeline.summary.startswith("❌"):
+                raise JobFailed(pipeline.summary.removeprefix("❌ "))
+            return pipeline.summary
+
+        job = await self.__submit_job(f"Deploy `{pipeline.repo_name}`", deploy, [host])
+        # Lets the deploy stop its compose commands and clean up, like its own cancel button does.
+        job.on_cancel = pipeline.cancel
+        return job
+
+    async def get_and_send_jobs(self):
+        jobs = self.jobs.list_jobs(self.host_name)
+        if len(jobs) == 0:
+            await self.message_creator.send_simple_message("There are no jobs yet.")
+            return
+
+        running = sum(1 for job in jobs if job.status == "running")
+        queued = sum(1 for job in jobs if job.status == "queued")
+        await self.message_creator.send_embed_with_object_info(
+            title="Jobs",
+            description=f"{running} running, {queued} queued, and the most recently finished ones. "
+                        f"Use `/cancel` to stop a running or queued job.",
+            items=[job.format() for job in jobs],
+            items_per_page=5
+        )
+
+    async def cancel_job(self, job_id: int):
+        user_name = self.interaction.user.name if self.interaction is not None else self.message.author.name
+        job = self.jobs.cancel(job_id, user_name)
+        if job is not None:
+            await self.message_creator.send_simple_message(f"Cancelling job **#{job.id}** ({job.description}).")
+            return
+
+        finished = self.jobs.get(job_id)
+        if finished is not None:
+            await self.message_creator.send_simple_message(f"Job **#{job_id}** already {finished.status}, there is "
+                                                           f"nothing to cancel.")
+        else:
+            await self.message_creator.send_simple_message(f"There is no job **#{job_id}**. See `/jobs`.")
+
+    async def mute_alerts(self, alert_channel: AlertChannel | None, container_name: str = "", duration: str = "1h"):
+        if alert_channel is None:
+            await self.message_creator.send_simple_message("Alerting is not enabled, set `ALERT_CHANNEL` to enable it.")
+            return
+
+        if container_name == "":
+            mutes = alert_channel.mutes()
+            if len(mutes) == 0:
+                await self.message_creator.send_simple_message("No containers are muted.")
+                return
+
+            await self.message_creator.send_simple_message("Muted containers:\n" + "\n".join(
+                f"- **{name}** for another {format_duration(remaining)}"
+                for name, remaining in sorted(mutes.items(), key=lambda mute: mute[1])))
+            return
+
+        try:
+            muted_for = parse_duration(duration)
+        except ValueError as e:
+            await self.message_creator.send_exception(exception_message=str(e), description="Invalid duration.")
+            return
 
-            containerInfoList.append(containerInfo)
+        alert_channel.mute(container_name, muted_for.total_seconds())
+        await self.message_creator.send_simple_message(f"🔇 Muted the alerts of **{container_name}** for "
+                                                       f"{format_duration(muted_for.total_seconds())}.")
 
-        return containerInfoList
+    async def unmute_alerts(self, alert_channel: AlertChannel | None, container_name: str):
+        if alert_channel is None:
+            await self.message_creator.send_simple_message("Alerting is not enabled, set `ALERT_CHANNEL` to enable it.")
+            return
+
+        if alert_channel.unmute(container_name):
+            await self.message_creator.send_simple_message(f"🔔 Unmuted the alerts of **{container_name}**.")
+        else:
+            await self.message_creator.send_simple_message(f"**{container_name}** is not muted.")
+
+    async def get_containers_formatted(self, filter_name: str = "", status: str = ""):
+        return [self.__format_container(container)
+                for container in self.hosts.list_containers(filter_name, status, host_name=self.host_name)]
 
     # Private methods
-    async def __send_other_possible_containers(self, container_name: str):
-        containers = await self.get_containers_formatted(container_name)
+    async def __select_hosts(self) -> list[DockerHost] | None:
+        """The connected hosts the command is about, or None (after saying why) when there are none."""
+        try:
+            hosts = self.hosts.select(self.host_name)
+        except UnknownHostError as e:
+            await self.message_creator.send_simple_message(str(e))
+            return None
+
+        if len(hosts) == 0:
+            await self.message_creator.send_simple_message("Could not reach any docker host."
+                                                           + self.__describe_unavailable_hosts())
+            return None
+
+        return hosts
+
+    async def __select_target_host(self) -> DockerHost | None:
+        """The host to create something on: the given one, or the default host."""
+        if self.host_name == "":
+            self.host_name = self.hosts.default_host.name
+
+        hosts = await self.__select_hosts()
+        return hosts[0] if hosts is not None else None
+
+    async def __find_container(self, container_name: str) -> (dict | None, DockerHost | None):
+        """The container and its host. When there is no such container, or the name is taken on several hosts, it
+        says so and returns (None, None)."""
+        if await self.__select_hosts() is None:
+            return None, None
+
+        found = self.hosts.find(container_name, host_name=self.host_name)
+        if len(found) == 0:
+            await self.__send_other_possible_containers(container_name)
+            return None, None
+        if len(found) > 1:
+            hosts = ", ".join(f"`{container['Host']}`" for container in found)
+            await self.message_creator.send_simple_message(f"There is a container `{container_name}` on several "
+                                                           f"hosts: {hosts}. Pick one with the host option.")
+            return None, None
+
+        return found[0], self.hosts.get_host(found[0]["Host"])
+
+    async def __submit_job(self, description: str, action, hosts: list[DockerHost],
+                           containers: list[dict] = None) -> Job:
+        """Runs the action as a job, which waits for a free slot on its hosts and for other jobs on its containers."""
+        await self.message_creator.defer()
+        return self.jobs.submit(description, action, interaction=self.interaction,
+                                host_names=[host.name for host in hosts],
+                                container_keys=[f"{container['Host']}/{container['Id']}"
+                                                for container in containers or []])
+
+    async def __submit_container_action(self, container_name: str, operation: str, past_tense: str,
+                                        method_name: str, **arguments) -> Job | None:
+        # Answered right away, the action itself runs as a job.
+        await self.message_creator.defer()
+        await self.__raise_if_manager(container_name)
 
-        # If there are any containers that contain that name, show them.
+        container, host = await self.__find_container(container_name)
+        if container is None:
+            return None
+
+        async def act() -> str:
+            try:
+                await host.docker.run(operation, getattr(host.client.api, method_name), container["Id"], **arguments)
+            except NotFound:
+                await self.__report(self.__send_container_gone(container_name))
+                raise JobFailed("the container was removed in the meantime")
+            except DockerOperationTimeout as e:
+                await self.__report(self.message_creator.send_exception(
+                    exception_message=str(e), description=f"Could not {operation} container."))
+                raise JobFailed(str(e))
+
+            await self.__report(self.message_creator.send_simple_message(f"{past_tense} container: `{container_name}`"))
+            return past_tense.lower()
+
+        return await self.__submit_job(f"{operation.capitalize()} `{container_name}`", act, [host], [container])
+
+    async def __submit_bulk_job(self, description: str, operator: BulkOperator, containers: list[dict]) -> Job:
+        async def run() -> str:
+            await operator.run(containers, self.interaction)
+            return f"{len(operator.succeeded)} succeeded, {len(operator.failed)} failed"
+
+        hosts = [self.hosts.get_host(name) for name in {container["Host"] for container in containers}]
+        return await self.__submit_job(description, run, hosts, containers)
+
+    def __describe_unavailable_hosts(self) -> str:
+        return "".join(f"\n*Host `{host.name}` is {host.status}, its containers may be missing or outdated.*"
+                       for host in self.hosts.unavailable(self.host_name))
+
+    def __format_container(self, container: dict) -> dict:
+        # Docker's own status text, like "Up 3 hours (healthy)", so we don't need to inspect for `StartedAt`.
+        runningFor = ""
+        if container["Status"] == "running":
+            runningFor = container["StatusText"].removeprefix("Up ")
+
+        containerInfo = {
+            "Name": container["Name"],
+            "Info": {
+                "Status": container["Status"],
+                "Created": datetime.utcfromtimestamp(container["Created"]).strftime("%Y-%m-%d"),
+                "Running for": runningFor,
+                "Ports": ", ".join(container["Ports"])
+            }
+        }
+        if self.hosts.multiple:
+            containerInfo["Info"] = {"Host": container["Host"], **containerInfo["Info"]}
+
+        return containerInfo
+
+    async def __send_other_possible_containers(self, container_name: str):
+        containers = []
+        for container, kind, key in self.suggestions.suggest(container_name, host_name=self.host_name):
+            containerInfo = self.__format_container(container)
+            # Say why a container is suggested when it wasn't its name that resembled the given one.
+            if kind != "name":
+                containerInfo["Info"] = {"Matched": f"{kind} `{key}`", **containerInfo["Info"]}
+            containers.append(containerInfo)
+
+        # If there are any containers that resemble that name, show them, the closest first.
         if len(containers) > 0:
             await self.message_creator.send_embed_with_object_info(
                 title=f"Could not find container with that name: `{container_name}`",
@@ -242,6 +748,16 @@ class CommandExecutor:
             await self.message_creator.send_simple_message(f"Could not find specific or related containers with name: "
                                                            f"`{container_name}`")
 
+    async def __report(self, sending):
+        """Sends the outcome of a job. Failing to tell it (like when the interaction expired) doesn't change it."""
+        try:
+            await sending
+        except discord.HTTPException as e:
+            logger.warning(f"[WARNING] Could not send the outcome of a job: {e}")
+
+    async def __send_container_gone(self, container_name: str):
+        await self.message_creator.send_simple_message(f"Container `{container_name}` was removed in the meantime.")
+
     async def __raise_if_manager(self, container_name):
         if container_name == APP_NAME:
             await self.message_creator.send_simple_message("You cannot kill me, mortal")
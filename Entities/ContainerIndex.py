@@ -0,0 +1,284 @@
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime
+
+from docker.errors import DockerException
+from requests.exceptions import RequestException
+
+from Entities.AsyncDocker import AsyncDocker, DockerOperationTimeout
+
+logger = logging.getLogger()
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+# The container events that can change anything we keep in the index.
+INDEXED_EVENTS = ["create", "start", "restart", "die", "stop", "kill", "pause", "unpause", "destroy", "rename",
+                  "health_status"]
+# Events that don't change the index, only passed on to the event listeners.
+LISTENED_EVENTS = ["oom"]
+
+
+class ContainerIndex:
+    """
+    Long-lived in-memory view of all containers on the docker host.
+
+    Built once with a full listing, then kept current by the docker events stream. A periodic full resync repairs any
+    drift (missed events, a dropped events connection, ...).
+    """
+
+    def __init__(self, asyncDocker: AsyncDocker, resync_interval: float = 300.0, host_name: str = "local"):
+        self.docker = asyncDocker
+        self.docker_client = asyncDocker.client
+        self.resync_interval = resync_interval
+        self.host_name = host_name
+
+        self.containers: dict[str, dict] = {}
+        self.last_synced: datetime | None = None
+        # Why the engine could not be reached, until the next successful sync.
+        self.error: str | None = None
+        # Bumped on every change, so consumers can cheaply tell whether their derived data is stale.
+        self.version = 0
+        # Lookups that found (or did not find) their container, as the cache hit rate of the index.
+        self.hits = 0
+        self.misses = 0
+
+        self._listeners = []
+        self._event_listeners = []
+
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self._updated_at: dict[str, float] = {}
+        self._events_stream = None
+        self._stopped = threading.Event()
+        # Containers that had an event and still have to be looked up, see __refresh_pending.
+        self._pending: set[str] = set()
+        self._pending_changed = threading.Condition()
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        await self.resync()
+        self.loop = loop
+
+        threading.Thread(target=self.__follow_events, name="container-index-events", daemon=True).start()
+        threading.Thread(target=self.__refresh_pending, name="container-index-refresh", daemon=True).start()
+        self.loop.create_task(self.__resync_routine())
+
+    def stop(self):
+        self._stopped.set()
+        with self._pending_changed:
+            self._pending_changed.notify()
+        if self._events_stream is not None:
+            self._events_stream.close()
+
+    async def resync(self):
+        started = time.monotonic()
+        # One `/containers/json` call, instead of the extra inspect per container that `containers.list()` does.
+        containers = await self.docker.run("list", self.docker_client.api.containers, all=True)
+
+        summaries = {container["Id"]: summarize_container(container, self.host_name) for container in containers}
+        self.__apply_full_sync(summaries, started)
+        self.error = None
+        logger.info(f"[INFO] Container index of `{self.host_name}` synced: {len(self.containers)} containers")
+
+    def add_listener(self, callback):
+        """Registers a callback (without arguments) that is called on the event loop whenever the index changes."""
+        self._listeners.append(callback)
+
+    def add_event_listener(self, callback):
+        """Registers a callback that is called on the event loop with every (raw) docker event of a container."""
+        self._event_listeners.append(callback)
+
+    # Lookups
+
+    def list_containers(self, filter_name: str = "", status: str = "") -> list[dict]:
+        """Summaries sorted like `docker ps -a`: most recently created first."""
+        summaries = sorted(self.containers.values(), key=lambda summary: summary["Created"], reverse=True)
+
+        return [
+            summary for summary in summaries
+            if filter_name.lower() in summary["Name"].lower() and (status == "" or summary["Status"] == status)
+        ]
+
+    def get(self, name_or_id: str) -> dict | None:
+        """
+        Resolves like docker does: an exact name, then a full id, then an id prefix that only one container has. An
+        ambiguous prefix finds nothing, so a command never acts on whichever container happened to come first.
+        """
+        if name_or_id == "":
+            return None
+
+        summary = next((summary for summary in self.containers.values() if summary["Name"] == name_or_id), None) \
+            or self.containers.get(name_or_id)
+        if summary is None:
+            matches = [summary for container_id, summary in self.containers.items()
+                       if container_id.startswith(name_or_id)]
+            summary = matches[0] if len(matches) == 1 else None
+
+        if summary is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return summary
+
+    def names(self) -> list[str]:
+        return [summary["Name"] for summary in self.containers.values()]
+
+    def counts(self) -> (int, int):
+        running = sum(1 for summary in self.containers.values() if summary["Status"] == "running")
+        return running, len(self.containers)
+
+    # Private methods
+
+    async def __resync_routine(self):
+        while not self._stopped.is_set():
+            await asyncio.sleep(self.resync_interval)
+
+            try:
+                await self.resync()
+            except (DockerException, DockerOperationTimeout, RequestException) as e:
+                self.error = str(e)
+                logger.error(f"[ERROR] Periodic container index resync of `{self.host_name}` failed: {e}")
+
+    def __follow_events(self):
+        while not self._stopped.is_set():
+            try:
+                self._events_stream = self.docker_client.events(
+                    decode=True,
+                    filters={"type": "container", "event": INDEXED_EVENTS + LISTENED_EVENTS}
+                )
+
+                for event in self._events_stream:
+                    self.__handle_event(event)
+            except (DockerException, RequestException) as e:
+                if self._stopped.is_set():
+                    return
+                self.error = str(e)
+                logger.error(f"[ERROR] Lost the docker events stream of `{self.host_name}`: {e}")
+            except Exception as e:
+                # The stream raises on close(), which is expected when stopping.
+                if self._stopped.is_set():
+                    return
+                logger.error(f"[ERROR] Unexpected error in the docker events stream of `{self.host_name}`: {e}")
+
+            if self._stopped.is_set():
+                return
+
+            # Events may have been missed while disconnected, so do a full resync once we're back.
+            time.sleep(5.0)
+            asyncio.run_coroutine_threadsafe(self.resync(), self.loop)
+
+    def __handle_event(self, event: dict):
+        container_id = event.get("id") or event.get("Actor", {}).get("ID")
+        if container_id is None:
+            return
+
+        if len(self._event_listeners) > 0:
+            self.loop.call_soon_threadsafe(self.__notify_event_listeners, event)
+        if event.get("Action") in LISTENED_EVENTS:
+            return
+
+        if event.get("Action") == "destroy":
+            self.loop.call_soon_threadsafe(self.__apply_updates, {container_id: None})
+            return
+
+        with self._pending_changed:
+            self._pending.add(container_id)
+            self._pending_changed.notify()
+
+    def __refresh_pending(self):
+        """
+        Looks up the containers that had events, all that piled up in one listing. The events stream is never held up
+        by a docker call, and a burst of events (a compose stack restarting, a container in a restart loop) costs a
+        few listings instead of one per event.
+        """
+        while not self._stopped.is_set():
+            with self._pending_changed:
+                while len(self._pending) == 0 and not self._stopped.is_set():
+                    self._pending_changed.wait()
+                container_ids, self._pending = self._pending, set()
+
+            if len(container_ids) == 0:
+                continue
+
+            try:
+                containers = self.docker_client.api.containers(all=True, filters={"id": list(container_ids)})
+            except (DockerException, RequestException) as e:
+                # The next resync picks them up.
+                logger.error(f"[ERROR] Could not look up {len(container_ids)} changed containers on "
+                             f"`{self.host_name}`: {e}")
+                continue
+
+            found = {container["Id"]: summarize_container(container, self.host_name) for container in containers}
+            self.loop.call_soon_threadsafe(self.__apply_updates,
+                                           {container_id: found.get(container_id) for container_id in container_ids})
+
+    def __apply_updates(self, summaries: dict[str, dict | None]):
+        now = time.monotonic()
+        for container_id, summary in summaries.items():
+            self._updated_at[container_id] = now
+            if summary is None:
+                self.containers.pop(container_id, None)
+            else:
+                self.containers[container_id] = summary
+
+        self.version += 1
+        self.__notify_listeners()
+
+    def __apply_full_sync(self, summaries: dict[str, dict], started: float):
+        # Entries touched by an event after the listing started are newer than the listing itself, keep those.
+        recently_updated = {container_id for container_id, updated in self._updated_at.items() if updated > started}
+
+        containers = {container_id: summary for container_id, summary in summaries.items()
+                      if container_id not in recently_updated}
+        for container_id in recently_updated:
+            if container_id in self.containers:
+                containers[container_id] = self.containers[container_id]
+
+        self.containers = containers
+        self.version += 1
+        self._updated_at = {container_id: updated for container_id, updated in self._updated_at.items()
+                            if container_id in recently_updated}
+        self.last_synced = datetime.utcnow()
+        self.__notify_listeners()
+
+    def __notify_event_listeners(self, event: dict):
+        for callback in self._event_listeners:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"[ERROR] Container event listener failed: {e}")
+
+    def __notify_listeners(self):
+        for callback in self._listeners:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"[ERROR] Container index listener failed: {e}")
+
+
+def summarize_container(container: dict, host_name: str = "local") -> dict:
+    """Builds our summary straight from a `/containers/json` entry, so no inspect is needed."""
+    ports = []
+    for port in container.get("Ports") or []:
+        if "PublicPort" not in port:
+            continue
+
+        binding = f"{port['PublicPort']}:{port['PrivatePort']}"
+        if port.get("Type", "tcp") != "tcp":
+            binding += f"/{port['Type']}"
+
+        # Ports bound on both IPv4 and IPv6 are listed twice.
+        if binding not in ports:
+            ports.append(binding)
+
+    return {
+        "Id": container["Id"],
+        "Host": host_name,
+        "Name": (container.get("Names") or ["/" + container["Id"][:12]])[0].lstrip("/"),
+        "Status": container.get("State", ""),
+        "StatusText": container.get("Status", ""),
+        "Created": container.get("Created", 0),
+        "Image": container.get("Image", ""),
+        "Labels": container.get("Labels") or {},
+        "Ports": ports
+    }
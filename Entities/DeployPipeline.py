@@ -0,0 +1,354 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from collections import deque
+
+import discord
+from discord.ui import View, Button
+
+from Entities.AsyncDocker import AsyncDocker, DockerOperationTimeout
+from Entities.DeploymentState import DeploymentState, fingerprint_project, is_unchanged, changed_services
+from Entities.RepositoryCache import RepositoryCache, repository_name
+
+logger = logging.getLogger()
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+STAGES = ("Clone", "Pull", "Build", "Up")
+STATUS_ICONS = {"pending": "⏳", "running": "🔄", "done": "✅", "skipped": "⏭️", "failed": "❌"}
+
+# The last lines of a failing compose command that are shown in the message.
+ERROR_OUTPUT_LINES = 8
+
+
+class DeployError(Exception):
+    pass
+
+
+class DeployPipeline:
+    """
+    Deploys a git repository with docker compose as a background job, in stages: clone → pull → build → up.
+
+    The compose commands run as subprocesses, so they don't take up worker threads and can be killed when the deploy
+    is cancelled (with the button on the progress message) or takes longer than the timeout. The images of the
+    services are pulled in parallel. The progress of every stage and service is shown in one message that is updated
+    as it goes.
+    """
+
+    # Deploys of the same project (on the same host) wait for each other, different projects deploy at the same time.
+    _project_locks: dict[str, asyncio.Lock] = {}
+
+    def __init__(self, asyncDocker: AsyncDocker, repository_cache: RepositoryCache, deployment_state: DeploymentState,
+                 git_repo_url: str, compose_name: str = "docker-compose.yml", timeout: float = 840.0,
+                 pull_parallelism: int = 4, update_interval: float = 2.0, host_name: str = "local",
+                 compose_options: dict = None):
+        self.docker = asyncDocker
+        self.host_name = host_name
+        self.compose_options = compose_options or {}
+        self.repository_cache = repository_cache
+        self.deployment_state = deployment_state
+        self.git_repo_url = git_repo_url
+        self.compose_name = compose_name
+        self.timeout = timeout
+        self.pull_parallelism = pull_parallelism
+        self.update_interval = update_interval
+
+        self.repo_name = repository_name(git_repo_url)
+        self.project = compose_project_name(self.repo_name)
+        # The same project can be deployed to several hosts, each keeps its own state.
+        self.state_key = f"{host_name}/{self.project}"
+        self.commit = ""
+        self.stages = {stage: {"Status": "pending", "Detail": "", "Started": 0.0} for stage in STAGES}
+        # Stage -> service name -> status, for the stages that work per service.
+        self.services: dict[str, dict[str, str]] = {"Pull": {}, "Build": {}}
+        self.summary = ""
+
+        self._task: asyncio.Task | None = None
+        self._cancelled_by: str | None = None
+
+    def cancel(self, user_name: str) -> bool:
+        """Stops the deploy, or keeps it from starting when it wasn't yet. Returns False when it already finished."""
+        if self._task is not None and self._task.done():
+            return False
+
+        self._cancelled_by = user_name
+        if self._task is not None:
+            self._task.cancel()
+        return True
+
+    async def run(self, interaction: discord.Interaction):
+        view = self.__get_view(interaction.user.id)
+        message = await interaction.followup.send(self.__render(), view=view, ephemeral=True, wait=True)
+
+        self._task = asyncio.get_running_loop().create_task(self.__deploy())
+        # Cancelled while the progress message was being sent.
+        if self._cancelled_by is not None:
+            self._task.cancel()
+        updater = asyncio.get_running_loop().create_task(self.__update_message(message))
+        try:
+            await asyncio.wait_for(self._task, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.summary = f"❌ Timed out after {self.timeout:g} seconds, the deploy was stopped."
+        except asyncio.CancelledError:
+            if self._cancelled_by is None:
+                raise
+            self.summary = f"❌ Cancelled by {self._cancelled_by}."
+        except DeployError as e:
+            self.summary = f"❌ {e}"
+        except Exception as e:
+            logger.error(f"[ERROR] Deploy of `{self.repo_name}` failed: {e}")
+            self.summary = f"❌ Something went wrong: {e}"
+        finally:
+            logger.info(f"[INFO] Deploy of `{self.repo_name}` finished: {self.summary}")
+            updater.cancel()
+            for stage in self.stages.values():
+                if stage["Status"] == "running":
+                    stage["Status"] = "failed"
+            for services in self.services.values():
+                for name, status in services.items():
+                    if status == "running":
+                        services[name] = "failed"
+
+            try:
+                await message.edit(content=self.__render(), view=None)
+            except discord.HTTPException as e:
+                logger.warning(f"[WARNING] Could not update the deploy message: {e}")
+
+    # Private methods
+
+    async def __deploy(self):
+        lock = DeployPipeline._project_locks.setdefault(self.state_key, asyncio.Lock())
+        async with lock:
+            repo_path = await self.__clone()
+            try:
+                await self.__deploy_worktree(repo_path)
+            finally:
+                # Only remove our own worktree, other deploys might still be using theirs.
+                await self.docker.run("git", self.repository_cache.release, self.git_repo_url, repo_path)
+
+    async def __clone(self) -> str:
+        # GitPython and python_on_whales take long to import, so they are only imported once something is deployed.
+        import git
+
+        self.__begin("Clone")
+        checkout = asyncio.ensure_future(self.docker.run("git", self.repository_cache.checkout, self.git_repo_url))
+        try:
+            repo_path, self.commit = await asyncio.shield(checkout)
+        except asyncio.CancelledError:
+            # The git call itself cannot be interrupted, clean its worktree up once it's done.
+            checkout.add_done_callback(self.__release_later)
+            raise
+        except (git.exc.GitCommandError, DockerOperationTimeout) as e:
+            logger.error(f"[ERROR] Could not pull from repository `{self.git_repo_url}`: {e}")
+            raise DeployError(f"Could not pull from repository `{self.repo_name}`. Make sure the repository exists, "
+                              f"that you have access to it and that the link you provided is correct.")
+
+        logger.info(f"[INFO] Checked out commit `{self.commit}` into path `{repo_path}`")
+        self.__finish("Clone", f"commit `{self.commit[:7]}`")
+        return repo_path
+
+    async def __deploy_worktree(self, repo_path: str):
+        from python_on_whales import DockerClient
+        from python_on_whales.client_config import ClientNotFoundError
+
+        try:
+            # The worktree folder has a unique name, so the project name compose would derive from it is overridden.
+            compose = DockerClient(compose_files=[os.path.join(repo_path, self.compose_name)],
+                                   compose_project_name=self.project,
+                                   **self.compose_options).client_config.docker_compose_cmd
+        except ClientNotFoundError:
+            raise DeployError("The docker CLI is not installed next to the bot, so it cannot run `docker compose`.")
+
+        compose_config = json.loads(await self.__compose(compose, None, "config", "--format", "json"))
+        fingerprint = await self.docker.run("git", fingerprint_project, repo_path, self.commit, compose_config)
+        previous = self.deployment_state.get(self.state_key)
+
+        if is_unchanged(fingerprint, previous) and await self.__is_project_up(fingerprint):
+            logger.info(f"[INFO] Nothing changed in project `{self.project}`, skipping the deploy")
+            for stage in ("Pull", "Build", "Up"):
+                self.stages[stage]["Status"] = "skipped"
+            self.summary = f"Nothing changed since the last deploy of commit " \
+                           f"`{previous['Fingerprint']['Commit'][:7]}`{format_time_saved(previous['DeploySeconds'])}."
+            return
+
+        # Only pull and build the services that changed, the others keep their image.
+        changed = changed_services(fingerprint, previous)
+        to_pull = [name for name in changed if not fingerprint["Services"][name]["Built"]]
+        to_build = [name for name in changed if fingerprint["Services"][name]["Built"]]
+        build_seconds = dict((previous or {}).get("BuildSeconds", {}))
+        started = time.monotonic()
+
+        await self.__pull(compose, to_pull)
+        await self.__build(compose, to_build, build_seconds)
+
+        self.__begin("Up")
+        await self.__compose(compose, "Up", "up", "--detach")
+        self.__finish("Up")
+
+        saved = sum(seconds for name, seconds in build_seconds.items()
+                    if name in fingerprint["Services"] and name not in to_build)
+        await self.docker.run("git", self.deployment_state.record, self.state_key, {
+            "Fingerprint": fingerprint,
+            "BuildSeconds": {name: seconds for name, seconds in build_seconds.items()
+                             if name in fingerprint["Services"]},
+            "DeploySeconds": time.monotonic() - started + saved,
+            "DeployedAt": time.time()
+        })
+
+        reused = [name for name in fingerprint["Services"] if name not in changed]
+        self.summary = f"Deployed **{self.repo_name}** in {self.__elapsed():.0f} seconds."
+        if previous is not None and len(reused) > 0:
+            self.summary += f"\nUnchanged since the last deploy: {', '.join(f'`{name}`' for name in reused)}" \
+                            f"{format_time_saved(saved)}."
+
+    async def __pull(self, compose: list[str], services: list[str]):
+        if len(services) == 0:
+            self.stages["Pull"]["Status"] = "skipped"
+            return
+
+        self.__begin("Pull")
+        self.services["Pull"] = {name: "pending" for name in services}
+        semaphore = asyncio.Semaphore(self.pull_parallelism)
+
+        async def pull_one(name: str):
+            async with semaphore:
+                self.services["Pull"][name] = "running"
+                try:
+                    await self.__compose(compose, "Pull", "pull", name)
+                    self.services["Pull"][name] = "done"
+                except DeployError:
+                    self.services["Pull"][name] = "failed"
+                    raise
+
+        await asyncio.gather(*[pull_one(name) for name in services])
+        self.__finish("Pull")
+
+    async def __build(self, compose: list[str], services: list[str], build_seconds: dict[str, float]):
+        if len(services) == 0:
+            self.stages["Build"]["Status"] = "skipped"
+            return
+
+        self.__begin("Build")
+        self.services["Build"] = {name: "running" for name in services}
+
+        # One build command, so compose can build the services in parallel and share the build cache between them.
+        started = time.monotonic()
+        await self.__compose(compose, "Build", "build", *services)
+        for name in services:
+            self.services["Build"][name] = "done"
+            build_seconds[name] = (time.monotonic() - started) / len(services)
+
+        self.__finish("Build")
+
+    async def __compose(self, compose: list[str], stage: str | None, *arguments: str) -> str:
+        """Runs a docker compose command, showing its latest output line as the detail of the stage (if given)."""
+        process = await asyncio.create_subprocess_exec(*compose, *arguments, stdout=asyncio.subprocess.PIPE,
+                                                       stderr=asyncio.subprocess.PIPE)
+
+        async def read_output():
+            lines = deque(maxlen=ERROR_OUTPUT_LINES)
+            async for line in process.stderr:
+                text = line.decode(errors="replace").strip()
+                if text != "":
+                    lines.append(text)
+                    if stage is not None:
+                        self.stages[stage]["Detail"] = text[:100]
+            return lines
+
+        try:
+            stdout, output = await asyncio.gather(process.stdout.read(), read_output())
+            await process.wait()
+        except asyncio.CancelledError:
+            process.kill()
+            await process.wait()
+            raise
+
+        if process.returncode != 0:
+            logger.error(f"[ERROR] `docker compose {' '.join(arguments)}` failed: {' | '.join(output)}")
+            error_output = "\n".join(output)[-1000:]
+            raise DeployError(f"`docker compose {arguments[0]}` failed:\n```{error_output}```")
+
+        return stdout.decode(errors="replace")
+
+    async def __is_project_up(self, fingerprint: dict) -> bool:
+        """Whether every service of the compose project has a running container."""
+        containers = await self.docker.run("list", self.docker.client.api.containers,
+                                           filters={"label": f"com.docker.compose.project={self.project}"})
+        running_services = {container["Labels"].get("com.docker.compose.service") for container in containers}
+        return all(name in running_services for name in fingerprint["Services"])
+
+    async def __update_message(self, message: discord.WebhookMessage):
+        shown = ""
+        while True:
+            await asyncio.sleep(self.update_interval)
+
+            progress = self.__render()
+            if progress != shown:
+                try:
+                    await message.edit(content=progress)
+                    shown = progress
+                except discord.HTTPException as e:
+                    logger.warning(f"[WARNING] Could not update the deploy message: {e}")
+
+    def __release_later(self, checkout: asyncio.Future):
+        if checkout.cancelled() or checkout.exception() is not None:
+            return
+
+        repo_path, _ = checkout.result()
+        asyncio.get_running_loop().create_task(
+            self.docker.run("git", self.repository_cache.release, self.git_repo_url, repo_path))
+
+    def __begin(self, stage: str):
+        self.stages[stage]["Status"] = "running"
+        self.stages[stage]["Started"] = time.monotonic()
+
+    def __finish(self, stage: str, detail: str = ""):
+        self.stages[stage]["Status"] = "done"
+        self.stages[stage]["Detail"] = f"{detail + ', ' if detail != '' else ''}" \
+                                       f"{time.monotonic() - self.stages[stage]['Started']:.1f}s"
+
+    def __elapsed(self) -> float:
+        return time.monotonic() - self.stages["Clone"]["Started"]
+
+    def __render(self) -> str:
+        lines = [f"Deploying **{self.repo_name}** (project `{self.project}`)"]
+        for stage in STAGES:
+            status = self.stages[stage]
+            lines.append(f"{STATUS_ICONS[status['Status']]} {stage}"
+                         + (f" ~ {status['Detail']}" if status["Detail"] != "" else ""))
+
+            for name, service_status in self.services.get(stage, {}).items():
+                lines.append(f" {STATUS_ICONS[service_status]} `{name}`")
+
+        if self.summary != "":
+            lines.append(f"\n{self.summary}")
+
+        return "\n".join(lines)[:2000]
+
+    def __get_view(self, user_id: int) -> View:
+        button = Button(emoji="✖️", label="Cancel deploy", style=discord.ButtonStyle.red)
+
+        async def cancel(interaction: discord.Interaction):
+            if interaction.user.id != user_id:
+                await interaction.response.send_message("Only the one who started the deploy can cancel it.",
+                                                        ephemeral=True)
+                return
+
+            self.cancel(interaction.user.name)
+            await interaction.response.defer()
+
+        button.callback = cancel
+        view = View(timeout=self.timeout)
+        view.add_item(button)
+        return view
+
+
+def compose_project_name(repo_name: str) -> str:
+    """Compose project names may only contain lowercase letters, digits, dashes and underscores."""
+    return re.sub(r"[^a-z0-9_-]", "", repo_name.lower()).lstrip("_-") or "project"
+
+
+def format_time_saved(seconds: float) -> str:
+    return f" (saved about {seconds:.0f} seconds)" if seconds >= 1 else ""
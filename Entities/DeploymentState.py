@@ -0,0 +1,112 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger()
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+
+class DeploymentState:
+    """
+    Remembers what was deployed per compose project: the commit, a fingerprint of the compose configuration and the
+    build context of every service, and how long the builds took. Kept in a JSON file, so it survives restarts.
+
+    Methods can be called from worker threads.
+    """
+
+    def __init__(self, state_file: str = "cache/deployments.json"):
+        self.state_file = os.path.abspath(state_file)
+        self._lock = threading.Lock()
+        self._projects: dict[str, dict] = {}
+
+        try:
+            with open(self.state_file) as file:
+                self._projects = json.load(file)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"[WARNING] Could not read the deployment state, starting fresh: {e}")
+
+    def get(self, project: str) -> dict | None:
+        with self._lock:
+            return self._projects.get(project)
+
+    def record(self, project: str, deployment: dict):
+        with self._lock:
+            self._projects[project] = deployment
+
+            # Write to a temporary file first, so a crash never leaves a half written state behind.
+            os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+            temporary_file = f"{self.state_file}.tmp"
+            with open(temporary_file, "w") as file:
+                json.dump(self._projects, file, indent=2)
+            os.replace(temporary_file, self.state_file)
+
+
+def fingerprint_project(repo_path: str, commit: str, compose_config: dict) -> dict:
+    """
+    Hashes the configuration of every service in the (resolved) compose configuration. Services that are built also
+    include the git tree SHA of their build context, which only changes when a file inside the context changes.
+    Blocks, so run it on a worker thread.
+    """
+    # Only imported when needed, GitPython takes long to import.
+    import git
+
+    repository = git.Repo(repo_path)
+    services = {}
+
+    for name, service in (compose_config.get("services") or {}).items():
+        # Compose resolves paths to absolute ones, and every deploy has its own worktree folder.
+        serialized = json.dumps(service, sort_keys=True).replace(repo_path, ".")
+        content = [serialized.encode()]
+
+        build = service.get("build")
+        if build is not None:
+            context = build if isinstance(build, str) else build.get("context", ".")
+            content.append(context_tree(repository, repo_path, commit, context).encode())
+
+        services[name] = {
+            "Hash": hashlib.sha256(b"\0".join(content)).hexdigest(),
+            "Built": build is not None
+        }
+
+    # The rest of the configuration, like networks and volumes.
+    project = {key: value for key, value in compose_config.items() if key != "services"}
+    project_hash = hashlib.sha256(json.dumps(project, sort_keys=True).replace(repo_path, ".").encode()).hexdigest()
+
+    return {"Commit": commit, "ProjectHash": project_hash, "Services": services}
+
+
+def context_tree(repository, repo_path: str, commit: str, context: str) -> str:
+    """The git tree SHA of a build context inside the repository. Other contexts (like urls) are returned as is."""
+    context_path = os.path.abspath(os.path.join(repo_path, context))
+    relative_path = os.path.relpath(context_path, repo_path)
+    if relative_path.startswith(".."):
+        return context
+
+    import git
+
+    try:
+        return repository.git.rev_parse(f"{commit}:{relative_path}" if relative_path != "." else f"{commit}^{{tree}}")
+    except git.exc.GitCommandError:
+        # Not tracked by git, so there is nothing to compare with.
+        return f"untracked:{time.time()}"
+
+
+def is_unchanged(fingerprint: dict, previous: dict | None) -> bool:
+    previous_fingerprint = (previous or {}).get("Fingerprint", {})
+    return previous_fingerprint.get("ProjectHash") == fingerprint["ProjectHash"] \
+        and previous_fingerprint.get("Services", {}).keys() == fingerprint["Services"].keys() \
+        and len(changed_services(fingerprint, previous)) == 0
+
+
+def changed_services(fingerprint: dict, previous: dict | None) -> list[str]:
+    """The services whose configuration or build context differs from the previous deployment."""
+    previous_services = (previous or {}).get("Fingerprint", {}).get("Services", {})
+    return [
+        name for name, service in fingerprint["Services"].items()
+        if previous_services.get(name, {}).get("Hash") != service["Hash"]
+    ]
@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import os
+import re
+
+import docker
+from docker.tls import TLSConfig
+
+from Entities.AsyncDocker import AsyncDocker
+from Entities.ContainerIndex import ContainerIndex
+
+logger = logging.getLogger()
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+# Host names end up in custom ids and messages, which use colons and slashes as separators.
+HOST_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_.-]+$")
+# Connection errors can be long, the status of a host is shown in messages and autocomplete choices.
+MAX_ERROR_LENGTH = 120
+
+
+class DockerHost:
+    """
+    One docker engine the bot manages: its client (with a pool of keep-alive connections), the worker pool its blocking
+    calls run on, and its container index.
+
+    Hosts with a `base_url` (unix://, tcp:// or ssh://) are connected to lazily, with `connect`, so an unreachable host
+    never holds up the others. A host can also be given an already created client.
+    """
+
+    def __init__(self, name: str, base_url: str = None, tls_cert_path: str = None, client: docker.DockerClient = None,
+                 max_workers: int = 16, limits: dict[str, int] = None, timeouts: dict[str, float] = None,
+                 resync_interval: float = 300.0, connect_timeout: float = 15.0):
+        if not HOST_NAME_PATTERN.match(name):
+            raise ValueError(f"Invalid docker host name `{name}`: only letters, digits, dots, dashes and underscores "
+                             f"are allowed.")
+
+        self.name = name
+        self.base_url = base_url
+        self.tls_cert_path = tls_cert_path
+        self.max_workers = max_workers
+        self.limits = limits
+        self.timeouts = timeouts
+        self.resync_interval = resync_interval
+        self.connect_timeout = connect_timeout
+
+        self.client: docker.DockerClient | None = None
+        self.docker: AsyncDocker | None = None
+        self.index: ContainerIndex | None = None
+        # Why the last attempt to connect failed.
+        self.error: str | None = None
+
+        if client is not None:
+            self.__bundle(client)
+
+    @property
+    def connected(self) -> bool:
+        return self.index is not None and self.index.loop is not None
+
+    @property
+    def available(self) -> bool:
+        """Connected, and its container index is in sync with the engine."""
+        return self.connected and self.index.error is None
+
+    @property
+    def status(self) -> str:
+        if not self.connected:
+            return f"unreachable ({(self.error or 'not connected yet')[:MAX_ERROR_LENGTH]})"
+        if self.index.error is not None:
+            return f"unreachable ({self.index.error[:MAX_ERROR_LENGTH]})"
+
+        return "available"
+
+    async def connect(self) -> bool:
+        """Creates the client (when needed) and starts the container index. Returns whether that worked."""
+        try:
+            if self.client is None:
+                client = await asyncio.wait_for(asyncio.to_thread(self.__create_client), timeout=self.connect_timeout)
+                self.__bundle(client)
+
+            await self.index.start()
+            self.error = None
+            logger.info(f"[INFO] Connected to docker host `{self.name}`")
+            return True
+        except asyncio.TimeoutError:
+            self.error = f"no answer within {self.connect_timeout:g} seconds"
+        except Exception as e:
+            self.error = str(e)
+
+        logger.warning(f"[WARNING] Could not connect to docker host `{self.name}`: {self.error}")
+        return False
+
+    def stop(self):
+        if self.index is not None:
+            self.index.stop()
+        if self.docker is not None:
+            self.docker.shutdown()
+
+    def compose_options(self) -> dict:
+        """The options for python_on_whales' DockerClient, so docker compose talks to this host."""
+        if self.base_url is None:
+            return {}
+
+        options = {"host": self.base_url}
+        if self.tls_cert_path is not None:
+            options.update(tlsverify=True, tlscacert=os.path.join(self.tls_cert_path, "ca.pem"),
+                           tlscert=os.path.join(self.tls_cert_path, "cert.pem"),
+                           tlskey=os.path.join(self.tls_cert_path, "key.pem"))
+
+        return options
+
+    # Private methods
+
+    def __create_client(self) -> docker.DockerClient:
+        tls = None
+        if self.tls_cert_path is not None:
+            tls = TLSConfig(client_cert=(os.path.join(self.tls_cert_path, "cert.pem"),
+                                         os.path.join(self.tls_cert_path, "key.pem")),
+                            ca_cert=os.path.join(self.tls_cert_path, "ca.pem"), verify=True)
+
+        # The ssh binary instead of paramiko, so ssh hosts work with the user's ssh config and keys.
+        return docker.DockerClient(base_url=self.base_url, tls=tls, max_pool_size=self.max_workers,
+                                   use_ssh_client=self.base_url.startswith("ssh://"))
+
+    def __bundle(self, client: docker.DockerClient):
+        self.client = client
+        self.docker = AsyncDocker(client, max_workers=self.max_workers, limits=self.limits, timeouts=self.timeouts)
+        self.index = ContainerIndex(self.docker, resync_interval=self.resync_interval, host_name=self.name)
@@ -1,18 +1,87 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+
 import discord
 from discord import app_commands
 
+from Entities.StartupTimer import StartupTimer
+
+logger = logging.getLogger()
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
 
 class DockerManagerClient(discord.Client):
-    def __init__(self, *, intents: discord.Intents, guild_ids: list[str]):
+    def __init__(self, *, intents: discord.Intents, guild_ids: list[str], command_hashes_path: str = None,
+                 startup_timer: StartupTimer = None):
         super().__init__(intents=intents)
         # Note: When using commands.Bot instead of discord.Client, the bot will maintain its own tree instead.
         self.tree = app_commands.CommandTree(self)
         self.guild_ids = guild_ids
+        # Where the hash of the commands last synced to every guild is kept, so unchanged guilds aren't synced again.
+        self.command_hashes_path = command_hashes_path
+        self.startup_timer = startup_timer or StartupTimer()
 
     # Instead of specifying a guild to every command, we copy over our global commands to the specified guilds instead.
     # By doing so, we don't have to wait up to an hour until they are shown to the end-user.
     async def setup_hook(self):
-        # This copies the global commands over to your guild(s).
+        self.startup_timer.mark("login")
+
+        stored = self.__load_command_hashes()
+        # Key -> the guild and the hash of its commands, for the guilds whose commands changed since their last sync.
+        changed = {}
         for guild_id in self.guild_ids:
-            self.tree.copy_global_to(guild=discord.Object(id=guild_id))
-            await self.tree.sync(guild=discord.Object(guild_id))
+            guild = discord.Object(id=guild_id)
+            # This copies the global commands over to your guild(s).
+            self.tree.copy_global_to(guild=guild)
+
+            # The application is part of the key, so switching to another bot token syncs everything again.
+            key = f"{self.application_id}/{guild_id}"
+            commands_hash = hash_commands(self.tree.get_commands(guild=guild))
+            if stored.get(key) != commands_hash:
+                changed[key] = (guild, commands_hash)
+
+        results = await asyncio.gather(*[self.tree.sync(guild=guild) for guild, _ in changed.values()],
+                                       return_exceptions=True)
+        for (key, (guild, commands_hash)), result in zip(changed.items(), results):
+            if isinstance(result, Exception):
+                logger.error(f"[ERROR] Could not sync the commands to guild {guild.id}: {result}")
+                stored.pop(key, None)
+            else:
+                stored[key] = commands_hash
+
+        if len(changed) > 0:
+            self.__save_command_hashes(stored)
+        self.startup_timer.mark("command sync", f"{len(changed)} of {len(self.guild_ids)} guilds changed")
+
+    # Private methods
+
+    def __load_command_hashes(self) -> dict[str, str]:
+        if self.command_hashes_path is None or not os.path.isfile(self.command_hashes_path):
+            return {}
+
+        try:
+            with open(self.command_hashes_path) as file:
+                return json.load(file)
+        except (OSError, ValueError) as e:
+            logger.warning(f"[WARNING] Could not read `{self.command_hashes_path}`, syncing all guilds: {e}")
+            return {}
+
+    def __save_command_hashes(self, hashes: dict[str, str]):
+        if self.command_hashes_path is None:
+            return
+
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.command_hashes_path)), exist_ok=True)
+            with open(self.command_hashes_path, "w") as file:
+                json.dump(hashes, file, indent=2)
+        except OSError as e:
+            logger.warning(f"[WARNING] Could not save `{self.command_hashes_path}`: {e}")
+
+
+def hash_commands(commands: list) -> str:
+    """A hash of the payload discord gets when the commands are synced."""
+    payloads = sorted(json.dumps(command.to_dict(), sort_keys=True) for command in commands)
+    return hashlib.sha256("\n".join(payloads).encode()).hexdigest()
@@ -0,0 +1,117 @@
+import asyncio
+import fnmatch
+import logging
+import threading
+
+from Entities.AlertChannel import AlertChannel
+from Entities.AsyncDocker import AsyncDocker
+from Entities.ContainerIndex import ContainerIndex
+from Entities.TracebackScanner import TracebackScanner
+
+logger = logging.getLogger()
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+
+class ErrorWatcher:
+    """
+    Follows the logs of every running container whose name matches one of the globs, scans them for tracebacks and
+    error lines, and publishes those to the alert channel. The same error (by signature) is counted, not re-sent.
+
+    Every watched container gets a reader thread that mostly sits waiting on its socket; the scanning itself only runs
+    a regex search over each chunk, so watching dozens of containers costs little CPU. Each one does hold a docker
+    connection though, so at most `max_watched` containers are watched per host.
+    """
+
+    def __init__(self, asyncDocker: AsyncDocker, container_index: ContainerIndex, alert_channel: AlertChannel,
+                 container_globs: list[str], error_pattern: str = "", max_watched: int = 20):
+        self.docker = asyncDocker
+        self.container_index = container_index
+        self.alert_channel = alert_channel
+        self.container_globs = container_globs
+        self.error_pattern = error_pattern
+        self.max_watched = max_watched
+
+        self.loop: asyncio.AbstractEventLoop | None = None
+        # Container id -> the docker log stream of its reader thread (once it's connected), and the event that tells
+        # the thread it should stop (for when it's still connecting).
+        self._watched: dict[str, (list, threading.Event)] = {}
+        # The names of the matching containers that are left out because of max_watched, to only log changes of it.
+        self._left_out: list[str] = []
+
+    def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.container_index.add_listener(self.reconcile)
+        self.reconcile()
+
+    def reconcile(self):
+        """Starts watching newly running containers and stops watching the ones that stopped."""
+        wanted = {
+            container["Id"]: container for container in self.container_index.list_containers(status="running")
+            if any(fnmatch.fnmatch(container["Name"], pattern) for pattern in self.container_globs)
+        }
+
+        for container_id in list(self._watched):
+            if container_id not in wanted:
+                stream_holder, stopped = self._watched.pop(container_id)
+                stopped.set()
+                for stream in list(stream_holder):
+                    stream.close()
+
+        left_out = []
+        for container_id, container in wanted.items():
+            if container_id in self._watched:
+                continue
+            if len(self._watched) >= self.max_watched:
+                left_out.append(container["Name"])
+                continue
+
+            self._watched[container_id] = ([], threading.Event())
+            threading.Thread(target=self.__watch, args=(container, *self._watched[container_id]),
+                             name=f"errors-{container['Name']}", daemon=True).start()
+
+        left_out.sort()
+        if len(left_out) > 0 and left_out != self._left_out:
+            logger.warning(f"[WARNING] Already watching {self.max_watched} containers on "
+                           f"`{self.container_index.host_name}` for errors, not watching {', '.join(left_out)}. "
+                           f"Narrow ERROR_WATCH_CONTAINERS down, or raise ERROR_WATCH_MAX.")
+        self._left_out = left_out
+
+    # Private methods
+
+    def __watch(self, container: dict, stream_holder: list, stopped: threading.Event):
+        scanner = TracebackScanner(self.error_pattern)
+
+        try:
+            # Only new lines: the history was there before we started watching.
+            stream = self.docker.client.api.logs(container["Id"], stream=True, follow=True, tail=0)
+            stream_holder.append(stream)
+            # Stopped while connecting: reconcile could not close the stream yet.
+            if stopped.is_set():
+                stream.close()
+                return
+
+            for chunk in stream:
+                for detection in scanner.feed(chunk):
+                    self.loop.call_soon_threadsafe(self.__publish, container, detection)
+
+            for detection in scanner.flush():
+                self.loop.call_soon_threadsafe(self.__publish, container, detection)
+        except Exception as e:
+            # Closing the stream when a container stops ends up here as well.
+            logger.info(f"[INFO] Stopped watching {container['Name']} for errors: {e}")
+        finally:
+            # Ended on its own (the container stopped), allow watching it again once it is running again.
+            self.loop.call_soon_threadsafe(self.__forget, container["Id"], stream_holder)
+
+    def __forget(self, container_id: str, stream_holder: list):
+        if self._watched.get(container_id, (None, None))[0] is stream_holder:
+            del self._watched[container_id]
+
+    def __publish(self, container: dict, detection: dict):
+        kind = "Traceback" if detection["Kind"] == "traceback" else "Error"
+        self.alert_channel.publish(
+            key=f"{container['Name']}:{detection['Signature']}",
+            title=f"{kind} in {container['Name']}: {detection['Summary']}",
+            text=detection["Text"],
+            subject=container["Name"]
+        )
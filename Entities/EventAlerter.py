@@ -0,0 +1,130 @@
+import logging
+import time
+from collections import deque
+from datetime import datetime
+
+from Common.utils import format_duration
+from Entities.AlertChannel import AlertChannel
+from Entities.ContainerIndex import ContainerIndex
+
+logger = logging.getLogger()
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+# A container that dies within this many seconds of being stopped or killed (`docker stop`, a restart, ...) didn't
+# crash.
+STOP_GRACE_PERIOD = 30.0
+
+
+class EventAlerter:
+    """
+    Publishes alerts for the docker events of a host that mean a container is in trouble: a crash (dying with a non-zero
+    exit code without being stopped), running out of memory, a failing health check, and a restart loop (crashing
+    `restart_loop_threshold` times within the window).
+
+    The alerts of a container are aggregated by the alert channel within `window` seconds ("seen 14× in 5m"), and are
+    dropped while the container is muted. Handling an event only updates a few dicts, so a burst of hundreds of events
+    per second doesn't hold up the event loop.
+    """
+
+    def __init__(self, container_index: ContainerIndex, alert_channel: AlertChannel, window: float = 300.0,
+                 restart_loop_threshold: int = 3):
+        self.container_index = container_index
+        self.alert_channel = alert_channel
+        self.window = window
+        self.restart_loop_threshold = restart_loop_threshold
+
+        # Container id -> when it was last stopped or killed.
+        self._stopping: dict[str, float] = {}
+        # Container id -> when it crashed, within the window.
+        self._crashes: dict[str, deque[float]] = {}
+        self._pruned = time.monotonic()
+
+    def start(self):
+        self.container_index.add_event_listener(self.handle)
+
+    def handle(self, event: dict):
+        action = event.get("Action") or event.get("status") or ""
+        container_id = event.get("id") or event.get("Actor", {}).get("ID")
+        attributes = event.get("Actor", {}).get("Attributes") or {}
+        now = time.monotonic()
+
+        if action in ("stop", "kill"):
+            self._stopping[container_id] = now
+            return
+
+        if action == "destroy":
+            self._stopping.pop(container_id, None)
+            self._crashes.pop(container_id, None)
+            return
+
+        container = {
+            "Name": attributes.get("name") or container_id[:12],
+            "Image": attributes.get("image", ""),
+            "Host": self.container_index.host_name,
+            "Time": datetime.fromtimestamp(event["time"]) if "time" in event else datetime.now()
+        }
+
+        if action == "die":
+            self.__handle_die(container_id, container, attributes.get("exitCode", ""), now)
+        elif action == "oom":
+            self.__publish(container, "oom", f"{self.__describe(container)} ran out of memory")
+        elif action.startswith("health_status") and action.endswith("unhealthy"):
+            self.__publish(container, "unhealthy", f"{self.__describe(container)} is unhealthy")
+
+    # Private methods
+
+    def __handle_die(self, container_id: str, container: dict, exit_code: str, now: float):
+        stopped = self._stopping.pop(container_id, None)
+        if now - self._pruned >= STOP_GRACE_PERIOD:
+            self.__forget_stale(now)
+        if exit_code == "0" or (stopped is not None and now - stopped < STOP_GRACE_PERIOD):
+            return
+
+        crashes = self._crashes.setdefault(container_id, deque())
+        crashes.append(now)
+        while now - crashes[0] > self.window:
+            crashes.popleft()
+
+        details = {"Exit code": exit_code}
+        if len(crashes) >= self.restart_loop_threshold:
+            self.__publish(container, "restart-loop", f"{self.__describe(container)} is in a restart loop "
+                                                      f"({len(crashes)} crashes in {format_duration(self.window)})",
+                           details)
+        else:
+            self.__publish(container, "crash", f"{self.__describe(container)} crashed (exit code {exit_code})",
+                           details)
+
+    def __forget_stale(self, now: float):
+        """Drops the state of containers that were stopped or crashed long ago, without ever being destroyed."""
+        for container_id, stopped in list(self._stopping.items()):
+            if now - stopped >= STOP_GRACE_PERIOD:
+                del self._stopping[container_id]
+
+        for container_id, crashes in list(self._crashes.items()):
+            if now - crashes[-1] > self.window:
+                del self._crashes[container_id]
+
+        self._pruned = now
+
+    def __publish(self, container: dict, kind: str, title: str, details: dict = None):
+        text = "\n".join(f"{name}: {value}" for name, value in {
+            "Container": container["Name"],
+            "Host": container["Host"],
+            "Image": container["Image"],
+            **(details or {}),
+            "Time": container["Time"].strftime("%Y-%m-%d %H:%M:%S")
+        }.items())
+
+        self.alert_channel.publish(
+            key=f"{container['Host']}/{container['Name']}:{kind}",
+            title=title,
+            text=text,
+            subject=container["Name"],
+            window=self.window
+        )
+
+    @staticmethod
+    def __describe(container: dict) -> str:
+        if container["Host"] == "local":
+            return container["Name"]
+        return f"{container['Name']} on {container['Host']}"
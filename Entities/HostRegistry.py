@@ -0,0 +1,183 @@
+import asyncio
+import logging
+from datetime import datetime
+
+from Entities.DockerHost import DockerHost
+
+logger = logging.getLogger()
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+
+class UnknownHostError(Exception):
+    def __init__(self, host_name: str, known: list[str]):
+        super().__init__(f"There is no docker host named `{host_name}`. Known hosts: "
+                         f"{', '.join(f'`{name}`' for name in known)}.")
+        self.host_name = host_name
+
+
+class HostRegistry:
+    """
+    The docker hosts the bot manages, by name.
+
+    The lookups (list_containers, get, names, counts, version, add_listener) mirror those of a single ContainerIndex,
+    over the indexes of all connected hosts, so everything that reads containers works the same with one host or many.
+    Every container summary carries the name of its host. Hosts that could not be reached are retried in the
+    background, and only leave their own containers out.
+    """
+
+    def __init__(self, hosts: list[DockerHost], reconnect_interval: float = 30.0):
+        if len(hosts) == 0:
+            raise ValueError("At least one docker host is needed.")
+
+        self.hosts: dict[str, DockerHost] = {host.name: host for host in hosts}
+        self.reconnect_interval = reconnect_interval
+        self.started = False
+
+        self._listeners = []
+        self._connect_callbacks = []
+        self._connects = 0
+        self._task: asyncio.Task | None = None
+
+    @property
+    def default_host(self) -> DockerHost:
+        """The host for commands that create something and weren't given a host: the first one configured."""
+        return next(iter(self.hosts.values()))
+
+    @property
+    def multiple(self) -> bool:
+        return len(self.hosts) > 1
+
+    async def start(self):
+        """Connects to all hosts at the same time, and keeps retrying the ones that could not be reached."""
+        self.started = True
+        await self.__connect_all()
+        self._task = asyncio.get_running_loop().create_task(self.__reconnect_routine())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+        for host in self.hosts.values():
+            host.stop()
+
+    def on_connect(self, callback):
+        """Registers a callback that is called with every host once it is connected."""
+        self._connect_callbacks.append(callback)
+
+    def get_host(self, host_name: str) -> DockerHost:
+        host = self.hosts.get(host_name)
+        if host is None:
+            raise UnknownHostError(host_name, list(self.hosts))
+
+        return host
+
+    def select(self, host_name: str = "") -> list[DockerHost]:
+        """The connected hosts a command is about: the given one, or all of them when no host is given.
+        Raises UnknownHostError for a host that isn't configured."""
+        hosts = [self.get_host(host_name)] if host_name != "" else list(self.hosts.values())
+        return [host for host in hosts if host.connected]
+
+    def unavailable(self, host_name: str = "") -> list[DockerHost]:
+        hosts = [self.get_host(host_name)] if host_name != "" else list(self.hosts.values())
+        return [host for host in hosts if not host.available]
+
+    def display_name(self, container: dict) -> str:
+        """The container's name, prefixed with its host when there are several hosts."""
+        return f"{container['Host']}/{container['Name']}" if self.multiple else container["Name"]
+
+    async def fan_out(self, hosts: list[DockerHost], action, timeout: float) -> (dict, dict):
+        """
+        Runs `action(host)` for all hosts at the same time. A host that fails or takes longer than the timeout only
+        loses its own result. Returns the results and the failure reasons, both by host name.
+        """
+        async def run_one(host: DockerHost):
+            try:
+                return host.name, await asyncio.wait_for(action(host), timeout=timeout), None
+            except asyncio.TimeoutError:
+                return host.name, None, f"no answer within {timeout:g} seconds"
+            except Exception as e:
+                logger.warning(f"[WARNING] Docker host `{host.name}` failed: {e}")
+                return host.name, None, str(e) or type(e).__name__
+
+        outcomes = await asyncio.gather(*[run_one(host) for host in hosts])
+        results = {name: result for name, result, error in outcomes if error is None}
+        failures = {name: error for name, _, error in outcomes if error is not None}
+        return results, failures
+
+    # Lookups, like those of a ContainerIndex
+
+    @property
+    def version(self) -> int:
+        return self._connects + sum(host.index.version for host in self.hosts.values() if host.connected)
+
+    @property
+    def last_synced(self) -> datetime | None:
+        """When the least recently synced host was synced."""
+        synced = [host.index.last_synced for host in self.hosts.values() if host.connected]
+        return min(synced) if len(synced) > 0 and None not in synced else None
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+        for host in self.hosts.values():
+            if host.connected:
+                host.index.add_listener(callback)
+
+    def list_containers(self, filter_name: str = "", status: str = "", host_name: str = "") -> list[dict]:
+        containers = []
+        for host in self.select(host_name):
+            containers += host.index.list_containers(filter_name, status)
+
+        if len(self.hosts) > 1 and host_name == "":
+            containers.sort(key=lambda summary: summary["Created"], reverse=True)
+
+        return containers
+
+    def find(self, name_or_id: str, host_name: str = "") -> list[dict]:
+        """The container with that name or id on every (or the given) host."""
+        found = [host.index.get(name_or_id) for host in self.select(host_name)]
+        return [container for container in found if container is not None]
+
+    def get(self, name_or_id: str, host_name: str = "") -> dict | None:
+        found = self.find(name_or_id, host_name)
+        return found[0] if len(found) > 0 else None
+
+    def names(self) -> list[str]:
+        names = set()
+        for host in self.select():
+            names.update(host.index.names())
+
+        return list(names)
+
+    def counts(self) -> (int, int):
+        running, total = 0, 0
+        for host in self.select():
+            host_running, host_total = host.index.counts()
+            running += host_running
+            total += host_total
+
+        return running, total
+
+    # Private methods
+
+    async def __connect_all(self):
+        waiting = [host for host in self.hosts.values() if not host.connected]
+        connected = await asyncio.gather(*[host.connect() for host in waiting])
+
+        for host, success in zip(waiting, connected):
+            if not success:
+                continue
+
+            self._connects += 1
+            for callback in self._listeners:
+                host.index.add_listener(callback)
+            for callback in self._connect_callbacks:
+                try:
+                    callback(host)
+                except Exception as e:
+                    logger.error(f"[ERROR] Setting up docker host `{host.name}` failed: {e}")
+            for callback in self._listeners:
+                callback()
+
+    async def __reconnect_routine(self):
+        while any(not host.connected for host in self.hosts.values()):
+            await asyncio.sleep(self.reconnect_interval)
+            await self.__connect_all()
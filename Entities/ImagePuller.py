@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import threading
+import time
+
+import discord
+from docker.errors import ImageNotFound, APIError
+from docker.utils import parse_repository_tag
+
+from Common.utils import formatBytes
+from Entities.AsyncDocker import AsyncDocker, DockerOperationTimeout
+
+logger = logging.getLogger()
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+# Layer statuses of the pull stream after which the layer is fully downloaded.
+DOWNLOADED_STATUSES = ("Verifying Checksum", "Download complete", "Extracting", "Pull complete")
+
+
+class ImagePull:
+    """The progress of one image pull, aggregated over its layers from docker's pull stream."""
+
+    def __init__(self, image: str):
+        self.image = image
+        self.started = time.monotonic()
+        self.task: asyncio.Task | None = None
+
+        # Layer id -> {"Status", "Current", "Total"}
+        self._layers: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def handle(self, event: dict):
+        """Handles one event of the pull stream. Called from the pulling thread."""
+        if "error" in event:
+            raise APIError(event["error"], explanation=event["error"])
+
+        layer_id = event.get("id")
+        status = event.get("status", "")
+        # Besides the layers, there are events about the image itself, like "Pulling from library/nginx".
+        if layer_id is None or status.startswith("Pulling from"):
+            return
+
+        with self._lock:
+            layer = self._layers.setdefault(layer_id, {"Status": status, "Current": 0, "Total": 0})
+            layer["Status"] = status
+
+            detail = event.get("progressDetail") or {}
+            if status == "Downloading" and detail.get("total"):
+                layer["Current"] = detail.get("current", 0)
+                layer["Total"] = detail["total"]
+            elif status in DOWNLOADED_STATUSES:
+                layer["Current"] = layer["Total"]
+
+    def render(self) -> str:
+        with self._lock:
+            layers = list(self._layers.values())
+
+        present = sum(1 for layer in layers if layer["Status"] == "Already exists")
+        done = sum(1 for layer in layers if layer["Status"] == "Pull complete")
+        current = sum(layer["Current"] for layer in layers)
+        total = sum(layer["Total"] for layer in layers)
+
+        text = f"Pulling image `{self.image}`.. {done + present}/{len(layers)} layers done"
+        if present > 0:
+            text += f" ({present} already present)"
+        if total > 0:
+            text += f"\n{formatBytes(current)} / {formatBytes(total)} downloaded ({current / total * 100:.0f}%)"
+
+        return text + f", {time.monotonic() - self.started:.0f} seconds in."
+
+
+class ImagePuller:
+    """
+    Pulls images with docker's streaming pull API, reporting the layer progress in a message that is updated as it goes.
+
+    Pulls of the same image on the same host at the same time are merged into one, everyone waiting for it gets their
+    own message.
+    """
+
+    # (Docker host, image) -> the pull that is running for it.
+    _pulls: dict[tuple[str, str], ImagePull] = {}
+
+    def __init__(self, asyncDocker: AsyncDocker, update_interval: float = 2.0):
+        self.docker = asyncDocker
+        self.update_interval = update_interval
+
+    async def ensure_image(self, image_name: str, interaction: discord.Interaction) -> bool:
+        """Pulls the image when it isn't present yet. Returns whether it had to be pulled.
+        Raises NotFound when the image does not exist, and APIError when the pull fails otherwise."""
+        image = normalize_image_name(image_name)
+        try:
+            await self.docker.run("inspect", self.docker.client.api.inspect_image, image)
+            return False
+        except ImageNotFound:
+            pass
+
+        key = (self.docker.client.api.base_url, image)
+        pull = ImagePuller._pulls.get(key)
+        if pull is None:
+            pull = ImagePuller._pulls[key] = ImagePull(image)
+            pull.task = asyncio.get_running_loop().create_task(self.docker.run("pull", self.__pull, pull))
+            pull.task.add_done_callback(lambda _: ImagePuller._pulls.pop(key, None))
+            logger.info(f"[INFO] Pulling image `{image}`")
+
+        message = await interaction.followup.send(pull.render(), ephemeral=True, wait=True)
+        shown = pull.render()
+        while not pull.task.done():
+            await asyncio.wait([pull.task], timeout=self.update_interval)
+
+            progress = pull.render()
+            if not pull.task.done() and progress != shown:
+                await self.__show(message, progress)
+                shown = progress
+
+        try:
+            # asyncio.shield, so one waiter giving up doesn't stop the pull for the others.
+            await asyncio.shield(pull.task)
+        except (APIError, DockerOperationTimeout) as e:
+            await self.__show(message, f"Pulling image `{image}`.. [ERROR]")
+            raise e
+
+        await self.__show(message, f"Pulling image `{image}`.. [SUCCESS] "
+                                            f"({time.monotonic() - pull.started:.0f} seconds)")
+        return True
+
+    # Private methods
+
+    @staticmethod
+    async def __show(message: discord.WebhookMessage, content: str):
+        # The pull goes on regardless, like when the interaction expired halfway.
+        try:
+            await message.edit(content=content)
+        except discord.HTTPException as e:
+            logger.warning(f"[WARNING] Could not update the pull message: {e}")
+
+    def __pull(self, pull: ImagePull):
+        for event in self.docker.client.api.pull(pull.image, stream=True, decode=True):
+            pull.handle(event)
+
+
+def normalize_image_name(image_name: str) -> str:
+    """Adds the `latest` tag when no tag or digest is given, like docker does."""
+    repository, tag = parse_repository_tag(image_name.strip())
+    if tag is None:
+        return f"{repository}:latest"
+
+    return image_name.strip()
@@ -0,0 +1,209 @@
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+
+import discord
+
+from Common.utils import format_duration
+from Entities.MessageCreator import MessageCreator
+
+logger = logging.getLogger()
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+
+class JobFailed(Exception):
+    """Raised by a job that already told the user why it failed."""
+    pass
+
+
+class Job:
+    def __init__(self, job_id: int, description: str, user_name: str, host_names: list[str],
+                 container_keys: list[str], interaction: discord.Interaction | None):
+        self.id = job_id
+        self.description = description
+        self.user_name = user_name
+        self.host_names = host_names
+        self.container_keys = container_keys
+        self.interaction = interaction
+
+        # queued -> running -> done, failed or cancelled.
+        self.status = "queued"
+        self.result = ""
+        self.created = time.monotonic()
+        self.started: float | None = None
+        self.finished: float | None = None
+        self.cancelled_by: str | None = None
+
+        self.task: asyncio.Task | None = None
+        # Cancels a running job in a nicer way than cancelling its task, like a deploy that cleans up after itself.
+        # Called with the name of who cancelled, returns whether it could.
+        self.on_cancel = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    @property
+    def waited(self) -> float:
+        return (self.started or self.finished or time.monotonic()) - self.created
+
+    @property
+    def duration(self) -> float:
+        return (self.finished or time.monotonic()) - self.started if self.started is not None else 0.0
+
+    async def wait(self):
+        """Waits until the job finished, however it ended."""
+        if self.task is not None:
+            await asyncio.wait({self.task})
+
+    def format(self) -> dict:
+        """The job as an item of MessageCreator.send_embed_with_object_info."""
+        info = {"Status": self.status, "Started by": self.user_name,
+                "Host": ", ".join(self.host_names)}
+        if self.status == "queued":
+            info["Waiting for"] = format_duration(self.waited)
+        else:
+            info["Duration"] = format_duration(self.duration)
+            if self.waited >= 1:
+                info["Waited"] = format_duration(self.waited)
+        if self.result != "":
+            info["Result"] = self.result
+
+        return {"Name": f"#{self.id} · {self.description}", "Info": info}
+
+
+class JobQueue:
+    """
+    Runs the commands that change containers as background jobs, so the interaction is answered right away and the
+    results arrive as followups.
+
+    Jobs wait in a queue until their host has a free slot (`per_host` jobs run on a host at the same time) and no other
+    job acts on the same container, so two admins restarting one container don't race each other. The finished jobs
+    are remembered for `/jobs`, up to `history` of them.
+    """
+
+    def __init__(self, per_host: int = 4, history: int = 50):
+        self.per_host = per_host
+
+        self.jobs: dict[int, Job] = {}
+        self._finished: deque[Job] = deque(maxlen=history)
+        self._ids = itertools.count(1)
+        # Key -> the semaphore and the amount of jobs holding or waiting for it, so unused ones can be dropped.
+        self._slots: dict[str, (asyncio.Semaphore, int)] = {}
+
+    def submit(self, description: str, action, interaction: discord.Interaction = None, host_names: list[str] = None,
+               container_keys: list[str] = None) -> Job:
+        """
+        Queues `action()`, a coroutine function returning a short result for `/jobs`. The action sends its own
+        messages, and raises JobFailed when it failed after saying so. Containers are keyed by host and id.
+        """
+        user_name = interaction.user.name if interaction is not None else "the bot"
+        job = Job(next(self._ids), description, user_name, sorted(set(host_names or [])),
+                  sorted(set(container_keys or [])), interaction)
+
+        self.jobs[job.id] = job
+        job.task = asyncio.get_running_loop().create_task(self.__run(job, action))
+        logger.info(f"[INFO] Queued job #{job.id}: {description}")
+        return job
+
+    def get(self, job_id: int) -> Job | None:
+        job = self.jobs.get(job_id)
+        if job is not None:
+            return job
+
+        return next((job for job in self._finished if job.id == job_id), None)
+
+    def cancel(self, job_id: int, user_name: str) -> Job | None:
+        """Cancels a queued or running job. Returns the job, or None when there is no such job (anymore)."""
+        job = self.jobs.get(job_id)
+        if job is None or not job.active:
+            return None
+
+        job.cancelled_by = user_name
+        # on_cancel returns False when it can't stop the job (anymore), then its task is cancelled after all.
+        if job.status != "running" or job.on_cancel is None or not job.on_cancel(user_name):
+            job.task.cancel()
+
+        return job
+
+    def list_jobs(self, host_name: str = "") -> list[Job]:
+        """The running jobs, then the queued ones in the order they'll run, then the recently finished ones."""
+        active = sorted(self.jobs.values(), key=lambda job: (job.status != "running", job.id))
+        recent = sorted(self._finished, key=lambda job: job.finished, reverse=True)
+
+        return [job for job in active + recent if host_name == "" or host_name in job.host_names]
+
+    # Private methods
+
+    async def __run(self, job: Job, action):
+        # Always in the same order (containers before hosts, both sorted), so jobs never wait on each other in a circle.
+        keys = [f"container:{key}" for key in job.container_keys] + [f"host:{name}" for name in job.host_names]
+        limits = [1] * len(job.container_keys) + [self.per_host] * len(job.host_names)
+        semaphores = [self.__take_slot(key, limit) for key, limit in zip(keys, limits)]
+        acquired = []
+
+        try:
+            if any(semaphore.locked() for semaphore in semaphores):
+                await self.__notify(job, f"⏳ Job **#{job.id}** ({job.description}) is queued behind other jobs on "
+                                         f"the same host or container. See `/jobs`, or `/cancel` it.")
+
+            for semaphore in semaphores:
+                await semaphore.acquire()
+                acquired.append(semaphore)
+
+            job.status = "running"
+            job.started = time.monotonic()
+            job.result = await action() or ""
+            # Jobs that cancel themselves nicely (see Job.on_cancel) end without raising.
+            job.status = "cancelled" if job.cancelled_by is not None else "done"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            job.result = f"cancelled by {job.cancelled_by}" if job.cancelled_by is not None else "cancelled"
+            docker_note = " A docker call that had already started may still finish." if job.started else ""
+            await self.__notify(job, f"✖️ Job **#{job.id}** ({job.description}) was {job.result}.{docker_note}")
+        except JobFailed as e:
+            job.status = "cancelled" if job.cancelled_by is not None else "failed"
+            job.result = str(e)
+        except Exception as e:
+            logger.error(f"[ERROR] Job #{job.id} ({job.description}) failed: {e}")
+            job.status = "failed"
+            job.result = str(e) or type(e).__name__
+            await self.__notify(job, f"❌ Job **#{job.id}** ({job.description}) failed: {job.result}")
+        finally:
+            for semaphore in acquired:
+                semaphore.release()
+            for key in keys:
+                self.__return_slot(key)
+
+            job.finished = time.monotonic()
+            job.interaction = None
+            del self.jobs[job.id]
+            self._finished.append(job)
+            logger.info(f"[INFO] Job #{job.id} ({job.description}) {job.status} after {format_duration(job.duration)}")
+
+    def __take_slot(self, key: str, limit: int) -> asyncio.Semaphore:
+        semaphore, users = self._slots.get(key, (None, 0))
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(limit)
+        self._slots[key] = (semaphore, users + 1)
+        return semaphore
+
+    def __return_slot(self, key: str):
+        semaphore, users = self._slots[key]
+        if users <= 1:
+            del self._slots[key]
+        else:
+            self._slots[key] = (semaphore, users - 1)
+
+    @staticmethod
+    async def __notify(job: Job, text: str):
+        if job.interaction is None:
+            return
+
+        # The interaction's token expires after 15 minutes, the job goes on regardless.
+        try:
+            await MessageCreator(interaction=job.interaction).send_simple_message(text)
+        except discord.HTTPException as e:
+            logger.warning(f"[WARNING] Could not tell about job #{job.id}: {e}")
@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+
+import discord
+
+from Entities.AsyncDocker import AsyncDocker
+from Entities.LogStreamer import iter_log_lines
+
+logger = logging.getLogger()
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+# Room for the log lines in the updating message, leaving some of discord's 2000 characters for the header.
+MESSAGE_ROOM = 1800
+MAX_LINE_LENGTH = 300
+
+
+class LogFollower:
+    """
+    Mirrors new log lines of a container into a single message that is updated in batches.
+
+    The docker stream is read on its own thread, into a bounded buffer: when the message updates can't keep up, lines
+    are dropped and counted instead of piling up in memory. Following stops after an idle timeout or a maximum duration.
+    """
+
+    # Keeps a reference to the running followers, so their tasks don't get garbage collected.
+    running: set = set()
+
+    def __init__(self, asyncDocker: AsyncDocker, container: dict, interaction: discord.Interaction, tail: int = 20,
+                 batch_interval: float = 2.0, idle_timeout: float = 120.0, max_duration: float = 600.0,
+                 max_buffered_lines: int = 1000):
+        self.docker = asyncDocker
+        self.container = container
+        self.interaction = interaction
+        self.tail = tail
+        self.batch_interval = batch_interval
+        self.idle_timeout = idle_timeout
+        self.max_duration = max_duration
+        self.max_buffered_lines = max_buffered_lines
+
+        self._buffer = deque()
+        self._skipped = 0
+        self._lock = threading.Lock()
+        self._stream_holder = []
+        self._stopped = threading.Event()
+        self._reader_done = threading.Event()
+        self._shown = deque()
+        self._shown_length = 0
+        self._total_skipped = 0
+
+    def start(self) -> asyncio.Task:
+        task = asyncio.get_running_loop().create_task(self.run())
+        LogFollower.running.add(task)
+        task.add_done_callback(LogFollower.running.discard)
+        return task
+
+    async def run(self):
+        name = self.container["Name"]
+        message = await self.interaction.followup.send(f"Following the logs of **{name}**..", ephemeral=True,
+                                                       wait=True)
+        threading.Thread(target=self.__read, name=f"follow-{name}", daemon=True).start()
+
+        started = last_line_at = time.monotonic()
+        reason = f"reached the maximum duration of {self.max_duration:g} seconds"
+        try:
+            while time.monotonic() - started < self.max_duration:
+                await asyncio.sleep(self.batch_interval)
+
+                lines, skipped = self.__drain()
+                if len(lines) > 0 or skipped > 0:
+                    last_line_at = time.monotonic()
+                    self.__add_to_window(lines, skipped)
+                    await message.edit(content=self.__render(f"Following the logs of **{name}**.."))
+
+                if self._reader_done.is_set() and len(self._buffer) == 0:
+                    reason = "the container stopped"
+                    break
+                if time.monotonic() - last_line_at > self.idle_timeout:
+                    reason = f"no new lines for {self.idle_timeout:g} seconds"
+                    break
+        except discord.HTTPException as e:
+            reason = f"could not update the message ({e.status})"
+        finally:
+            self.stop()
+
+        if self._total_skipped > 0:
+            reason += f" ({self._total_skipped:,} lines were skipped in total)"
+
+        try:
+            await message.edit(content=self.__render(f"Stopped following the logs of **{name}**: {reason}."))
+        except discord.HTTPException:
+            pass
+
+    def stop(self):
+        # Also when the reader is still opening its stream, it closes that itself once it sees this.
+        self._stopped.set()
+        for stream in list(self._stream_holder):
+            stream.close()
+
+    # Private methods
+
+    def __read(self):
+        try:
+            for line in iter_log_lines(self.docker.client, self.container["Id"], tail=self.tail, follow=True,
+                                       stream_holder=self._stream_holder, stopped=self._stopped):
+                with self._lock:
+                    if len(self._buffer) >= self.max_buffered_lines:
+                        self._skipped += 1
+                    else:
+                        self._buffer.append(line)
+        except Exception as e:
+            # Closing the stream to stop following ends up here as well.
+            logger.info(f"[INFO] Stopped following the logs of {self.container['Name']}: {e}")
+        finally:
+            self._reader_done.set()
+
+    def __drain(self) -> (list[bytes], int):
+        with self._lock:
+            lines = list(self._buffer)
+            skipped = self._skipped
+            self._buffer.clear()
+            self._skipped = 0
+
+        return lines, skipped
+
+    def __add_to_window(self, lines: list[bytes], skipped: int):
+        # Only the lines that can still be shown matter, everything before them is scrolled out anyway.
+        for line in lines[-(MESSAGE_ROOM // 2):]:
+            text = line.decode(errors="replace").rstrip("\n")
+            self.__add_line(text if len(text) <= MAX_LINE_LENGTH else text[:MAX_LINE_LENGTH] + "…")
+
+        # The buffer was full, so the skipped lines came after the buffered ones.
+        if skipped > 0:
+            self._total_skipped += skipped
+            self.__add_line(f"… {skipped:,} lines skipped")
+
+    def __add_line(self, text: str):
+        text = text.replace("```", "'''")
+        self._shown.append(text)
+        self._shown_length += len(text) + 1
+
+        while self._shown_length > MESSAGE_ROOM and len(self._shown) > 1:
+            self._shown_length -= len(self._shown.popleft()) + 1
+
+    def __render(self, header: str) -> str:
+        lines = "\n".join(self._shown)
+        return f"{header}\n```\n{lines if lines != '' else ' '}\n```"
@@ -0,0 +1,120 @@
+import asyncio
+import re
+import threading
+from collections import deque
+from datetime import datetime
+
+from docker.errors import DockerException
+from requests.exceptions import RequestException
+
+from Entities.AsyncDocker import DockerOperationTimeout
+from Entities.HostRegistry import HostRegistry
+from Entities.LogStreamer import iter_log_lines
+
+
+class LogSearcher:
+    """
+    Searches the logs of one or many containers for a regex, on the bot's side.
+
+    The logs are scanned as a stream, several containers at the same time. Only the matching lines (with some context)
+    are kept, and all scans stop as soon as the total amount of matches reaches the cap. The containers may be spread
+    over several hosts.
+    """
+
+    def __init__(self, hosts: HostRegistry, pattern: str, context: int = 2, max_matches: int = 50,
+                 ignore_case: bool = False):
+        self.hosts = hosts
+        self.regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+        self.context = context
+        self.max_matches = max_matches
+
+        self.matches = 0
+        self.capped = False
+        # Container name -> why its logs could not be searched.
+        self.failed: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    async def search(self, containers: list[dict], since: datetime = None, until: datetime = None) -> dict[str, list]:
+        """Returns the found matches per container name, as lists of (line number, line, context before,
+        context after)."""
+        scans = []
+        for container in containers:
+            host = self.hosts.get_host(container["Host"])
+            scans.append(host.docker.run("logsearch", self.__scan, host.client, container["Id"], since, until))
+        results = await asyncio.gather(*scans, return_exceptions=True)
+
+        # An unreachable or slow host only loses the results of its own containers.
+        found_per_container = {}
+        for container, found in zip(containers, results):
+            if isinstance(found, (DockerException, DockerOperationTimeout, RequestException)):
+                self.failed[self.hosts.display_name(container)] = str(found)
+            elif isinstance(found, BaseException):
+                raise found
+            elif len(found) > 0:
+                found_per_container[self.hosts.display_name(container)] = found
+
+        return found_per_container
+
+    # Private methods
+
+    def __scan(self, dockerClient, container_id: str, since: datetime, until: datetime) -> list:
+        found = []
+        before = deque(maxlen=self.context)
+        # Matches that still need lines of context after them.
+        waiting_for_after = []
+
+        lines = iter_log_lines(dockerClient, container_id, since=since, until=until)
+        try:
+            for number, raw_line in enumerate(lines, 1):
+                line = raw_line.decode(errors="replace").rstrip("\n")
+
+                for match in waiting_for_after:
+                    match[3].append(line)
+                waiting_for_after = [match for match in waiting_for_after if len(match[3]) < self.context]
+
+                if self._stop.is_set():
+                    if len(waiting_for_after) == 0:
+                        break
+                elif self.regex.search(line) and self.__claim_match():
+                    match = (number, line, list(before), [])
+                    found.append(match)
+                    if self.context > 0:
+                        waiting_for_after.append(match)
+
+                before.append(line)
+        finally:
+            lines.close()
+
+        return found
+
+    def __claim_match(self) -> bool:
+        with self._lock:
+            if self.matches >= self.max_matches:
+                self.capped = True
+                self._stop.set()
+                return False
+
+            self.matches += 1
+            if self.matches >= self.max_matches:
+                self.capped = True
+                self._stop.set()
+
+            return True
+
+
+def format_search_results(results: dict[str, list]) -> str:
+    blocks = []
+    for container_name, found in results.items():
+        lines = [f"=== {container_name} ({len(found)} matches) ==="]
+        for number, line, before, after in found:
+            for offset, context_line in enumerate(before):
+                lines.append(f"  {number - len(before) + offset:>7}  {context_line}")
+            lines.append(f"> {number:>7}  {line}")
+            for offset, context_line in enumerate(after, 1):
+                lines.append(f"  {number + offset:>7}  {context_line}")
+            lines.append("")
+
+        blocks.append("\n".join(lines))
+
+    return "\n".join(blocks)
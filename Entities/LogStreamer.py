@@ -0,0 +1,99 @@
+import gzip
+import io
+import threading
+from datetime import datetime
+
+import discord
+import docker
+
+from Common.utils import strip_ansi_escape_codes_bytes
+
+# Discord allows at most this many attachments per message.
+MAX_FILES_PER_MESSAGE = 10
+
+
+def iter_log_lines(dockerClient: docker.DockerClient, container_id: str, tail: int | str = "all",
+                   since: datetime = None, until: datetime = None, timestamps: bool = False, follow: bool = False,
+                   stream_holder: list = None, stopped: threading.Event = None):
+    """
+    Streams the logs of a container line by line, without ANSI escape codes. Lines are bytes and include their newline.
+
+    Blocking, so run it on a worker thread. When `stream_holder` is given, the underlying docker stream is put in it,
+    so another thread can close() it to stop iterating. Set `stopped` before closing them: a stream that is only put
+    in after that is closed right away.
+    """
+    # As epoch seconds: docker-py takes any datetime for UTC, and can't handle timezone aware ones.
+    stream = dockerClient.api.logs(container_id, stream=True, follow=follow, tail=tail, timestamps=timestamps,
+                                   since=since.timestamp() if since is not None else None,
+                                   until=until.timestamp() if until is not None else None)
+    if stream_holder is not None:
+        stream_holder.append(stream)
+    if stopped is not None and stopped.is_set():
+        stream.close()
+        return
+
+    # A chunk does not necessarily end at a line (or escape code) boundary, so carry the rest over.
+    remainder = b""
+    try:
+        for chunk in stream:
+            lines = (remainder + chunk).split(b"\n")
+            remainder = lines.pop()
+
+            for line in lines:
+                yield strip_ansi_escape_codes_bytes(line) + b"\n"
+    finally:
+        stream.close()
+
+    if remainder != b"":
+        yield strip_ansi_escape_codes_bytes(remainder) + b"\n"
+
+
+def collect_logs(dockerClient: docker.DockerClient, container_id: str, max_bytes: int, **options) -> (bytes, bool):
+    """Collects the (ANSI-stripped) logs into memory, stopping at `max_bytes`. Returns the logs, and whether they were
+    truncated."""
+    buffer = io.BytesIO()
+
+    for line in iter_log_lines(dockerClient, container_id, **options):
+        if buffer.tell() + len(line) > max_bytes:
+            buffer.write(f"\n[Stopped reading: the logs are larger than {max_bytes} bytes. "
+                         f"Use `tail`, `since` or `until` to narrow them down.]\n".encode())
+            return buffer.getvalue(), True
+
+        buffer.write(line)
+
+    return buffer.getvalue(), False
+
+
+def package_logs(logs: bytes, name: str, size_limit: int) -> list[discord.File]:
+    """
+    Turns the logs into attachments that each fit within discord's upload limit: as-is when they fit, otherwise
+    gzipped, and otherwise split at line boundaries into multiple gzipped parts.
+    """
+    if len(logs) <= size_limit:
+        return [discord.File(io.BytesIO(logs), filename=f"{name}.txt")]
+
+    compressed = gzip.compress(logs, compresslevel=6)
+    if len(compressed) <= size_limit:
+        return [discord.File(io.BytesIO(compressed), filename=f"{name}.txt.gz")]
+
+    # Aim the uncompressed part size at the observed compression ratio, with some headroom for variance.
+    part_size = max(int(size_limit * len(logs) / len(compressed) * 0.8), 1)
+    parts = []
+    start = 0
+    while start < len(logs):
+        end = min(start + part_size, len(logs))
+        if end < len(logs):
+            newline = logs.rfind(b"\n", start, end)
+            end = newline + 1 if newline > start else end
+
+        part = gzip.compress(logs[start:end], compresslevel=6)
+        if len(part) > size_limit and end - start > 1:
+            # Compressed worse than expected, try a smaller part.
+            part_size //= 2
+            continue
+
+        parts.append(part)
+        start = end
+
+    return [discord.File(io.BytesIO(part), filename=f"{name}.part{index + 1:02}.txt.gz")
+            for index, part in enumerate(parts)]
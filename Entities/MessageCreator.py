@@ -1,7 +1,7 @@
 import discord
 
 from Common.contants import APP_VERSION
-from Entities.Paginator import Paginator
+from Entities.Paginator import Paginator, fits_in_page_id
 
 
 class MessageCreator:
@@ -18,42 +18,44 @@ class MessageCreator:
 
         self.paginator = Paginator(interaction=self.interaction)
 
-    async def send_simple_message(self, text, file: discord.File = None, followup=False, edit=False, user_only=True):
-        try:
-            if followup:
-                await self.interaction.followup.send(text, ephemeral=user_only)
+    async def defer(self, user_only=True):
+        """Acknowledges the interaction right away, for commands that take longer than discord's 3 seconds to answer.
+        Everything after this has to be sent as a followup."""
+        if self.interaction is not None and not self.interaction.response.is_done():
+            await self.interaction.response.defer(ephemeral=user_only, thinking=True)
+
+    async def send_simple_message(self, text, file: discord.File = None, edit=False, user_only=True,
+                                  files: list[discord.File] = None):
+        """Interactions get a response, or a followup once they were answered or deferred."""
+        attachments = {"file": file} if file is not None else {"files": files} if files else {}
+
+        if self.message is not None:
+            if edit:
+                await self.message.edit(content=text, attachments=[file])
                 return
+            await self.message.channel.send(text, file=file)
+        elif self.interaction is not None:
+            # An interaction can only be responded to once: after a defer (or an earlier answer) the rest is sent as
+            # followups. Responding again would raise InteractionResponded, and the message would be lost.
+            if edit:
+                await self.interaction.edit_original_response(content=text)
+            elif self.interaction.response.is_done():
+                await self.interaction.followup.send(text, ephemeral=user_only, **attachments)
+            else:
+                await self.interaction.response.send_message(text, ephemeral=user_only, **attachments)
 
-            if self.message is not None:
-                if edit:
-                    await self.message.edit(content=text, attachments=[file])
-                await self.message.channel.send(text, file=file)
-            elif self.interaction is not None:
-                if file is not None:
-                    await self.interaction.response.send_message(text, file=file, ephemeral=user_only)
-                else:
-                    if edit:
-                        await self.interaction.edit_original_response(content=text)
-                    await self.interaction.response.send_message(text, ephemeral=user_only)
-        except discord.InteractionResponded:
-            pass
-
-    async def send_simple_embed(self, title, name: str, text: str, followup=False):
+    async def send_simple_embed(self, title, name: str, text: str):
         embedded = get_standard_embed()
         embedded.title = title
         embedded.add_field(name=name, value=text, inline=False)
 
-        try:
-            if followup:
+        if self.message is not None:
+            await self.message.channel.send(embed=embedded)
+        elif self.interaction is not None:
+            if self.interaction.response.is_done():
                 await self.interaction.followup.send(embed=embedded, ephemeral=True)
-                return
-
-            if self.message is not None:
-                await self.message.channel.send(embed=embedded)
-            elif self.interaction is not None:
+            else:
                 await self.interaction.response.send_message(embed=embedded, ephemeral=True)
-        except discord.InteractionResponded:
-            pass
 
     async def send_embed_with_object_info(self, title, items, description="", items_per_page: int = 4, inline=False):
         """
@@ -68,11 +70,25 @@ class MessageCreator:
             inline=inline
         )
 
-    async def send_exception(self, exception_message: str, description: str = "", followup=False):
+    async def send_navigable_embed(self, page_view: str, arguments: str, title, items, description="",
+                                   items_per_page: int = 4, page_position: int = 0, previous_snapshot: str = ""):
+        """
+        Like send_embed_with_object_info, for lists that can be regenerated by the page view: navigating sends the view
+        and arguments back, instead of the bot keeping the pages around. Falls back to a paginator session when the
+        arguments don't fit in a custom id.
+        """
+        if not fits_in_page_id(page_view, arguments):
+            await self.send_embed_with_object_info(title, items, description=description, items_per_page=items_per_page)
+            return
+
+        await self.paginator.send_stateless_page(page_view, arguments, title=title, items=items,
+                                                 description=description, items_per_page=items_per_page,
+                                                 pagePosition=page_position, previous_snapshot=previous_snapshot)
+
+    async def send_exception(self, exception_message: str, description: str = ""):
         await self.send_simple_embed(title=description if description != '' else "Could not run command.",
                                      name="Reason:",
-                                     text=f"""```diff\n- {str(exception_message)}```""",
-                                     followup=followup)
+                                     text=f"""```diff\n- {str(exception_message)}```""")
 
 
 def get_standard_embed():
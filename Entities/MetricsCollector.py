@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import time
+from array import array
+
+from docker.utils import version_lt
+
+from Entities.AsyncDocker import AsyncDocker
+from Entities.ContainerIndex import ContainerIndex
+from Entities.StatsSampler import StatsSampler
+
+logger = logging.getLogger()
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+# CPU in percent, memory in bytes, network in bytes per second.
+METRICS = ("cpu", "memory", "net_rx", "net_tx")
+SPARKLINE_CHARACTERS = "▁▂▃▄▅▆▇█"
+# Estimated CPU seconds dockerd spends on a one-shot stats request (reading the cgroup files of the container), which
+# counts towards the budget as well.
+DOCKERD_SAMPLE_COST = 0.002
+
+
+class MetricRing:
+    """Fixed-size time series of one container, backed by compact arrays instead of lists of dicts."""
+
+    __slots__ = ("capacity", "timestamps", "values", "position", "size")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.timestamps = array('d', bytes(8 * capacity))
+        self.values = {metric: array('f', bytes(4 * capacity)) for metric in METRICS}
+        self.position = 0
+        self.size = 0
+
+    def append(self, timestamp: float, **values: float):
+        self.timestamps[self.position] = timestamp
+        for metric in METRICS:
+            self.values[metric][self.position] = values[metric]
+
+        self.position = (self.position + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def window(self, metric: str, since: float) -> list[tuple[float, float]]:
+        """The (timestamp, value) samples since the given time, oldest first."""
+        start = (self.position - self.size) % self.capacity
+        samples = []
+        for offset in range(self.size):
+            index = (start + offset) % self.capacity
+            if self.timestamps[index] >= since:
+                samples.append((self.timestamps[index], self.values[metric][index]))
+
+        return samples
+
+
+class MetricsCollector:
+    """
+    Samples the stats of all running containers in the background, and keeps a bounded history per container.
+
+    The sampling interval adapts to what a round of sampling costs (which grows with the amount of containers), so the
+    CPU time spent on collecting stays under the budget, given as a fraction of one CPU core. The cost is only what
+    collecting takes: the CPU time of the bot's threads while sampling and processing, plus an estimate of what dockerd
+    spends per sample. Other work of the bot doesn't slow the sampling down.
+    """
+
+    def __init__(self, asyncDocker: AsyncDocker, container_index: ContainerIndex, capacity: int = 720,
+                 cpu_budget: float = 0.02, min_interval: float = 15.0, max_interval: float = 600.0,
+                 concurrency: int = 4):
+        self.container_index = container_index
+        self.capacity = capacity
+        self.cpu_budget = cpu_budget
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+
+        self.sampler = StatsSampler(asyncDocker, concurrency=concurrency)
+        # One-shot samples skip docker's second measurement (the rates are computed from our previous sample instead),
+        # but need API 1.41. Older engines take a full sample, which takes docker a second or two longer.
+        self.one_shot = not version_lt(asyncDocker.client.api.api_version, "1.41")
+        if not self.one_shot:
+            logger.warning(f"[WARNING] Docker API {asyncDocker.client.api.api_version} has no one-shot stats, "
+                           f"collecting the stats history will be slower")
+        self.rings: dict[str, MetricRing] = {}
+        # Container id -> the previous raw counters, to compute rates from.
+        self._previous: dict[str, dict] = {}
+        # The error of the last round in which no container could be sampled, so it's only logged once.
+        self._logged_error: str | None = None
+
+    async def run(self):
+        while True:
+            started = time.monotonic()
+
+            try:
+                cost = await self.collect()
+            except Exception as e:
+                logger.error(f"[ERROR] Could not collect container metrics: {e}")
+                cost = 0.0
+
+            self.interval = min(max(cost / self.cpu_budget, self.min_interval), self.max_interval)
+            await asyncio.sleep(max(self.interval - (time.monotonic() - started), 0))
+
+    async def collect(self) -> float:
+        """Takes a sample of every running container. Returns the estimated CPU seconds that took."""
+        containers = self.container_index.list_containers(status="running")
+        sampler_cpu_time = self.sampler.cpu_time
+        sampled = await self.sampler.sample(containers, one_shot=self.one_shot)
+        if len(containers) > 0 and len(sampled) == 0:
+            if self.sampler.last_error != self._logged_error:
+                logger.error(f"[ERROR] Could not sample the stats of any container: {self.sampler.last_error}")
+                self._logged_error = self.sampler.last_error
+        elif len(sampled) > 0:
+            self._logged_error = None
+
+        # Nothing below awaits, so the thread time of the event loop is only spent on processing the samples.
+        started = time.thread_time()
+        now = time.time()
+
+        for container_id, stats in sampled.items():
+            previous = self._previous.get(container_id)
+            self._previous[container_id] = {**stats, "Timestamp": now}
+            if previous is None:
+                continue
+
+            elapsed = max(now - previous["Timestamp"], 0.001)
+            cpu_delta = stats["CpuTotal"] - previous["CpuTotal"]
+            system_delta = stats["SystemTotal"] - previous["SystemTotal"]
+
+            ring = self.rings.get(container_id)
+            if ring is None:
+                ring = self.rings[container_id] = MetricRing(self.capacity)
+
+            ring.append(
+                now,
+                cpu=cpu_delta / system_delta * stats["OnlineCpus"] * 100.0 if cpu_delta > 0 and system_delta > 0
+                else 0.0,
+                memory=stats["MemoryUsed"],
+                net_rx=max(stats["NetRx"] - previous["NetRx"], 0) / elapsed,
+                net_tx=max(stats["NetTx"] - previous["NetTx"], 0) / elapsed
+            )
+
+        # Forget the containers that are gone.
+        for container_id in list(self.rings):
+            if container_id not in self.container_index.containers:
+                del self.rings[container_id]
+                self._previous.pop(container_id, None)
+
+        return (self.sampler.cpu_time - sampler_cpu_time) + (time.thread_time() - started) \
+            + len(containers) * DOCKERD_SAMPLE_COST
+
+
+def downsample(samples: list[tuple[float, float]], since: float, until: float, buckets: int) -> list[float | None]:
+    """Averages the samples into equally sized time buckets. Buckets without samples are None."""
+    totals = [0.0] * buckets
+    counts = [0] * buckets
+    width = (until - since) / buckets
+
+    for timestamp, value in samples:
+        bucket = min(int((timestamp - since) / width), buckets - 1)
+        totals[bucket] += value
+        counts[bucket] += 1
+
+    return [total / count if count > 0 else None for total, count in zip(totals, counts)]
+
+
+def render_sparkline(values: list[float | None]) -> str:
+    present = [value for value in values if value is not None]
+    if len(present) == 0:
+        return ""
+
+    lowest, highest = min(present), max(present)
+    spread = highest - lowest or 1.0
+    return "".join(
+        " " if value is None
+        else SPARKLINE_CHARACTERS[int((value - lowest) / spread * (len(SPARKLINE_CHARACTERS) - 1))]
+        for value in values
+    )
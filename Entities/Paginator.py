@@ -1,73 +1,139 @@
+import hashlib
 import json
 import math
+from collections import OrderedDict
 
 import discord
 from discord import NotFound
-from discord.ui import View, Button
+from discord.ui import View, Button, Select
 
 from Common.contants import APP_VERSION
 
 page_title_separation = " | page "
 
+# Sessions that can still be navigated. Older ones are dropped, along with their view, so they don't pile up in memory.
+# Discord gives ephemeral messages 15 minutes anyway.
+MAX_SESSIONS = 200
+SESSION_TIMEOUT = 900.0
+# Rendered pages kept per session, for going back and forth between a few pages.
+PAGE_CACHE_SIZE = 3
+
+# Discord's limits.
+MAX_TITLE_LENGTH = 256
+MAX_DESCRIPTION_LENGTH = 4096
+MAX_FIELDS = 25
+MAX_FIELD_NAME_LENGTH = 256
+MAX_FIELD_VALUE_LENGTH = 1024
+MAX_EMBED_LENGTH = 6000
+MAX_SELECT_OPTIONS = 25
+MAX_CUSTOM_ID_LENGTH = 100
+
+# Custom ids of the stateless navigation: "dm:page:<action>:<page>:<snapshot key>:<view>:<arguments>".
+PAGE_ID_PREFIX = "dm:page"
+SNAPSHOT_KEY_LENGTH = 8
+
 
 class Paginator:
-    """Only works with interactions."""
+    """
+    Only works with interactions.
+
+    Pages are rendered when they are looked at, not up front, and only the last few are cached. Every paginator is a
+    session in a bounded store: the least recently used sessions are dropped when there are too many, and a session
+    times out when nobody navigates it for a while.
+    """
+
+    # Session id -> paginator, least recently used first.
+    sessions: OrderedDict[int, "Paginator"] = OrderedDict()
+    # Pages shown from (or rendered into) the page caches of all sessions.
+    hits = 0
+    misses = 0
 
     def __init__(self, interaction: discord.Interaction):
         self.interaction: discord.Interaction = interaction
-        self.pages = []
+        self.items = []
+        self.title = ""
+        self.description = ""
+        self.items_per_page = 4
+        self.inline = False
+        self.pageCount = 1
         self.currentPage = 0
+        self.view: View | None = None
+
+        self._pages: OrderedDict[int, discord.Embed] = OrderedDict()
 
     async def send_paginated_object_info(self, title, items, description="", items_per_page: int = 4, inline=False):
-        page = get_standard_embed()
-        page.title = title + page_title_separation + "1"
-        page.description = description
+        self.items = items
+        self.title = title
+        self.description = description
+        self.items_per_page = min(items_per_page, MAX_FIELDS)
+        self.inline = inline
+        self.pageCount = max(math.ceil(len(items) / self.items_per_page), 1)
+        self.currentPage = 0
 
-        for index, item in enumerate(items, 0):
-            page: discord.Embed
+        # A single page needs no navigation, so no session either.
+        if self.pageCount > 1:
+            self.view = self.getView(self.currentPage)
+            self.__register()
 
-            jsonString = json.dumps(item["Info"], indent=1)
-            formatted = jsonString.lstrip('{').rstrip('}')
+        try:
+            # Commands that take a while defer first, after which only a followup can be sent.
+            if self.interaction.response.is_done():
+                await self.interaction.followup.send(embed=self.get_page(self.currentPage),
+                                                     view=self.view or discord.utils.MISSING, ephemeral=True)
+            else:
+                await self.interaction.response.send_message(embed=self.get_page(self.currentPage),
+                                                             view=self.view or discord.utils.MISSING, ephemeral=True)
+        except NotFound:
+            self.__unregister()
 
-            page.add_field(name=item["Name"], value=f'```json\n{formatted}\n```', inline=inline)
+    def get_page(self, pagePosition: int) -> discord.Embed:
+        page = self._pages.get(pagePosition)
+        if page is None:
+            Paginator.misses += 1
+            page = self._pages[pagePosition] = self.__render_page(pagePosition)
+            if len(self._pages) > PAGE_CACHE_SIZE:
+                self._pages.popitem(last=False)
+        else:
+            Paginator.hits += 1
+            self._pages.move_to_end(pagePosition)
 
-            if index > 0 and (index + 1) % items_per_page == 0:
-                self.pages.append(page)
-                page = get_standard_embed()
-                page.title = title + page_title_separation + str(math.ceil(index / items_per_page) + 1)
-                page.description = description
+        return page
 
-        # If there are no pages, or a not-full page left, add it.
-        if len(self.pages) == 0 or len(items) % items_per_page != 0:
-            self.pages.append(page)
+    def getView(self, pagePosition):
+        if self.view is None:
+            self.view = View(timeout=SESSION_TIMEOUT)
+            self.view.on_timeout = self.__on_timeout
 
-        try:
-            await self.interaction.response.send_message(embed=self.pages[self.currentPage],
-                                                         view=self.getView(self.currentPage),
-                                                         ephemeral=True)
-        except NotFound:
-            pass
+            buttons = [
+                Button(emoji="⏮️", label=' ', style=discord.ButtonStyle.blurple, custom_id='nav_first'),
+                Button(emoji="⬅️", label=' ', style=discord.ButtonStyle.blurple, custom_id='nav_back'),
+                Button(emoji="➡️", label=' ', style=discord.ButtonStyle.blurple, custom_id='nav_next'),
+                Button(emoji="⏭️", label=' ', style=discord.ButtonStyle.blurple, custom_id='nav_last')
+            ]
 
-    def getView(self, pagePosition):
-        buttons = [
-            Button(emoji="⏮️", label=' ', style=discord.ButtonStyle.blurple, custom_id='nav_first'),
-            Button(emoji="⬅️", label=' ', style=discord.ButtonStyle.blurple, custom_id='nav_back'),
-            Button(emoji="➡️", label=' ', style=discord.ButtonStyle.blurple, custom_id='nav_next'),
-            Button(emoji="⏭️", label=' ', style=discord.ButtonStyle.blurple, custom_id='nav_last')
-        ]
-        view = View(timeout=None)
-
-        # set navigation callback to buttons and add them to the view
-        for button in buttons:
-            if button.custom_id == "nav_first" or button.custom_id == "nav_back":
-                button.disabled = pagePosition <= 0
-            elif button.custom_id == "nav_last" or button.custom_id == "nav_next":
-                button.disabled = pagePosition >= len(self.pages) - 1
-
-            button.callback = self.page_navigation
-            view.add_item(button)
-
-        return view
+            # set navigation callback to buttons and add them to the view
+            for button in buttons:
+                button.callback = self.page_navigation
+                self.view.add_item(button)
+
+            if self.pageCount > 2:
+                jump = Select(placeholder="Jump to page..", custom_id='nav_jump', row=1)
+                jump.callback = self.page_navigation
+                self.view.add_item(jump)
+
+        for item in self.view.children:
+            if item.custom_id == "nav_first" or item.custom_id == "nav_back":
+                item.disabled = pagePosition <= 0
+            elif item.custom_id == "nav_last" or item.custom_id == "nav_next":
+                item.disabled = pagePosition >= self.pageCount - 1
+            elif item.custom_id == "nav_jump":
+                item.options = [
+                    discord.SelectOption(label=f"Page {position + 1}", value=str(position),
+                                         default=position == pagePosition)
+                    for position in get_jump_positions(pagePosition, self.pageCount)
+                ]
+
+        return self.view
 
     async def page_navigation(self, interaction: discord.Interaction):
         match interaction.data["custom_id"]:
@@ -78,9 +144,164 @@ class Paginator:
             case "nav_back":
                 self.currentPage -= 1
             case "nav_last":
-                self.currentPage = len(self.pages) - 1
+                self.currentPage = self.pageCount - 1
+            case "nav_jump":
+                self.currentPage = int(interaction.data["values"][0])
+
+        self.currentPage = min(max(self.currentPage, 0), self.pageCount - 1)
+        self.__register()
+        await interaction.response.edit_message(embed=self.get_page(self.currentPage),
+                                                view=self.getView(self.currentPage))
+
+    async def send_stateless_page(self, page_view: str, arguments: str, title, items, description="",
+                                  items_per_page: int = 4, pagePosition: int = 0, previous_snapshot: str = ""):
+        """
+        Sends (or, when navigating, edits to) one page, with navigation components that carry all state in their
+        custom id: the view to regenerate, the page, a snapshot key of the items and the view's arguments. Nothing is
+        kept in memory, so the navigation keeps working after a restart, and with several instances of the bot.
+        """
+        snapshot = get_snapshot_key(items)
+        pageCount = max(math.ceil(len(items) / items_per_page), 1)
+        pagePosition = min(max(pagePosition, 0), pageCount - 1)
+
+        if previous_snapshot != "" and previous_snapshot != snapshot:
+            description = f"{description}\n*The list changed since the previous page was shown.*"
+
+        embed = render_page(title, description, items, items_per_page, pagePosition, pageCount)
+        view = get_stateless_view(page_view, arguments, snapshot, pagePosition, pageCount) if pageCount > 1 \
+            else discord.utils.MISSING
+
+        if self.interaction.type == discord.InteractionType.component:
+            await self.interaction.response.edit_message(embed=embed, view=view if view else None)
+        elif self.interaction.response.is_done():
+            await self.interaction.followup.send(embed=embed, view=view, ephemeral=True)
+        else:
+            await self.interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+
+    # Private methods
+
+    def __render_page(self, pagePosition: int) -> discord.Embed:
+        return render_page(self.title, self.description, self.items, self.items_per_page, pagePosition, self.pageCount,
+                           self.inline)
+
+    def __register(self):
+        Paginator.sessions[self.interaction.id] = self
+        Paginator.sessions.move_to_end(self.interaction.id)
+
+        while len(Paginator.sessions) > MAX_SESSIONS:
+            _, oldest = Paginator.sessions.popitem(last=False)
+            oldest.__close()
+
+    def __unregister(self):
+        Paginator.sessions.pop(self.interaction.id, None)
+        self.__close()
+
+    def __close(self):
+        if self.view is not None:
+            self.view.stop()
+        self.items = []
+        self._pages.clear()
+
+    async def __on_timeout(self):
+        self.__unregister()
+
+
+def render_page(title: str, description: str, items: list[dict], items_per_page: int, pagePosition: int,
+                pageCount: int, inline: bool = False) -> discord.Embed:
+    page = get_standard_embed()
+    page.title = truncate(f"{title}{page_title_separation}{pagePosition + 1} of {pageCount}", MAX_TITLE_LENGTH)
+    page.description = truncate(description, MAX_DESCRIPTION_LENGTH)
+
+    # What's left of the embed's characters for the fields, besides the title, description, author and footer
+    # (with room for a note about items that did not fit).
+    room = MAX_EMBED_LENGTH - len(page.title) - len(page.description) - len(page.author.name or "") \
+        - len(page.footer.text or "") - 64
+
+    start = pagePosition * items_per_page
+    page_items = items[start:start + items_per_page]
+    for index, item in enumerate(page_items):
+        jsonString = json.dumps(item["Info"], indent=1)
+        formatted = jsonString.lstrip('{').rstrip('}')
+
+        name = truncate(str(item["Name"]) or "-", MAX_FIELD_NAME_LENGTH)
+        value = f'```json\n{truncate(formatted, MAX_FIELD_VALUE_LENGTH - 12)}\n```'
+        if len(name) + len(value) > room:
+            page.set_footer(text=f"{page.footer.text} | {len(page_items) - index} items did not fit on this page")
+            break
+
+        page.add_field(name=name, value=value, inline=inline)
+        room -= len(name) + len(value)
+
+    return page
+
+
+def get_stateless_view(page_view: str, arguments: str, snapshot: str, pagePosition: int, pageCount: int) -> View:
+    view = View(timeout=None)
+
+    targets = [("first", "⏮️", 0), ("back", "⬅️", pagePosition - 1), ("next", "➡️", pagePosition + 1),
+               ("last", "⏭️", pageCount - 1)]
+    for action, emoji, target in targets:
+        view.add_item(Button(emoji=emoji, label=' ', style=discord.ButtonStyle.blurple,
+                             custom_id=encode_page_id(action, target, snapshot, page_view, arguments),
+                             disabled=target < 0 or target >= pageCount or target == pagePosition))
+
+    if pageCount > 2:
+        view.add_item(Select(
+            placeholder="Jump to page..", row=1,
+            custom_id=encode_page_id("jump", pagePosition, snapshot, page_view, arguments),
+            options=[
+                discord.SelectOption(label=f"Page {position + 1}", value=str(position),
+                                     default=position == pagePosition)
+                for position in get_jump_positions(pagePosition, pageCount)
+            ]
+        ))
+
+    # A finished view is sent along without discord.py keeping it around to dispatch to: the navigation is handled by
+    # the client's on_interaction instead.
+    view.stop()
+    return view
+
+
+def encode_page_id(action: str, pagePosition: int, snapshot: str, page_view: str, arguments: str) -> str:
+    return f"{PAGE_ID_PREFIX}:{action}:{pagePosition}:{snapshot}:{page_view}:{arguments}"
+
+
+def decode_page_id(custom_id: str) -> dict | None:
+    """The navigation state from a custom id made by encode_page_id, or None if it isn't one."""
+    parts = custom_id.split(":", 6)
+    if len(parts) != 7 or f"{parts[0]}:{parts[1]}" != PAGE_ID_PREFIX or not parts[3].isdigit():
+        return None
+
+    return {"Action": parts[2], "Page": int(parts[3]), "Snapshot": parts[4], "View": parts[5], "Arguments": parts[6]}
+
+
+def fits_in_page_id(page_view: str, arguments: str) -> bool:
+    return len(encode_page_id("first", 99999, "0" * SNAPSHOT_KEY_LENGTH, page_view, arguments)) <= MAX_CUSTOM_ID_LENGTH
+
+
+def get_snapshot_key(items: list[dict]) -> str:
+    """A short key of what is listed, to notice that the list changed between two pages."""
+    return hashlib.sha1("\n".join(str(item["Name"]) for item in items).encode()).hexdigest()[:SNAPSHOT_KEY_LENGTH]
+
+
+def get_jump_positions(pagePosition: int, pageCount: int) -> list[int]:
+    """The pages offered in the jump menu: all of them when they fit, otherwise the pages around the current one and
+    an even spread over the rest."""
+    if pageCount <= MAX_SELECT_OPTIONS:
+        return list(range(pageCount))
+
+    positions = {0, pageCount - 1}
+    positions.update(range(max(pagePosition - 5, 0), min(pagePosition + 6, pageCount)))
+
+    spread = MAX_SELECT_OPTIONS - len(positions)
+    for step in range(spread):
+        positions.add(round(step * (pageCount - 1) / max(spread - 1, 1)))
+
+    return sorted(positions)
+
 
-        await interaction.response.edit_message(embed=self.pages[self.currentPage], view=self.getView(self.currentPage))
+def truncate(text: str, length: int) -> str:
+    return text if len(text) <= length else text[:length - 1] + "…"
 
 
 def get_standard_embed():
@@ -0,0 +1,166 @@
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from stat import S_IWUSR, S_IREAD
+
+logger = logging.getLogger()
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+
+class RepositoryCache:
+    """
+    Persistent cache of bare git repositories, keyed by their url.
+
+    The first deploy of a repository clones it (without file contents, those are fetched when checked out), later
+    deploys only fetch what changed. Every deploy gets its own worktree, so concurrent deploys never touch each other's
+    files. When the cache grows over its limits, the least recently used repositories without active deploys are
+    evicted.
+
+    All methods block, so run them on a worker thread.
+    """
+
+    def __init__(self, cache_dir: str = "cache/repositories", deploy_dir: str = "temp/deploys",
+                 max_size_bytes: int = 2 * 1024 ** 3, max_repositories: int = 20):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.deploy_dir = os.path.abspath(deploy_dir)
+        self.max_size_bytes = max_size_bytes
+        self.max_repositories = max_repositories
+
+        self._lock = threading.Lock()
+        self._repository_locks: dict[str, threading.Lock] = {}
+        # Repository path -> amount of worktrees that are in use.
+        self._in_use: dict[str, int] = {}
+        # Deploys of repositories that were (or were not yet) cloned.
+        self.hits = 0
+        self.misses = 0
+
+    def checkout(self, git_repo_url: str) -> (str, str):
+        """Fetches the latest version of the repository, and checks its default branch out into a new worktree.
+        Returns the worktree path and the commit SHA. Hand the worktree back with `release` when done."""
+        # GitPython takes long to import, and most of the time nothing is deployed.
+        import git
+
+        repository_path = self.__repository_path(git_repo_url)
+
+        # In use from before it is cloned or fetched, so an eviction by another deploy can't remove it meanwhile.
+        with self._lock:
+            self._in_use[repository_path] = self._in_use.get(repository_path, 0) + 1
+
+        try:
+            with self.__repository_lock(repository_path):
+                if os.path.isdir(repository_path):
+                    repository = git.Repo(repository_path)
+                    repository.git.fetch("origin", "+refs/heads/*:refs/heads/*", "--prune", "--tags")
+                    logger.info(f"[INFO] Fetched `{git_repo_url}` into the cache")
+                    self.hits += 1
+                else:
+                    repository = git.Repo.clone_from(url=git_repo_url, to_path=repository_path,
+                                                     multi_options=["--bare", "--filter=blob:none"])
+                    logger.info(f"[INFO] Cloned `{git_repo_url}` into the cache")
+                    self.misses += 1
+
+                commit = repository.git.rev_parse("HEAD")
+                worktree_path = os.path.join(self.deploy_dir,
+                                             f"{repository_name(git_repo_url)}-{uuid.uuid4().hex[:8]}")
+                repository.git.worktree("add", "--detach", worktree_path, commit)
+        except BaseException:
+            self.__return_use(repository_path)
+            raise
+
+        # The modification time tells the eviction when a repository was last used.
+        os.utime(repository_path)
+        self.evict()
+
+        return worktree_path, commit
+
+    def release(self, git_repo_url: str, worktree_path: str):
+        """Removes a worktree of a finished deploy."""
+        import git
+
+        repository_path = self.__repository_path(git_repo_url)
+
+        with self.__repository_lock(repository_path):
+            try:
+                git.Repo(repository_path).git.worktree("remove", "--force", worktree_path)
+            except git.exc.GitCommandError as e:
+                logger.warning(f"[WARNING] Could not remove worktree `{worktree_path}`: {e}")
+                remove_folder(worktree_path)
+                git.Repo(repository_path).git.worktree("prune")
+
+            self.__return_use(repository_path)
+
+    def evict(self):
+        """Removes the least recently used repositories until the cache is within its limits again."""
+        if not os.path.isdir(self.cache_dir):
+            return
+
+        repositories = sorted(
+            (os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)),
+            key=os.path.getmtime
+        )
+        sizes = {path: folder_size(path) for path in repositories}
+        total_size = sum(sizes.values())
+
+        for path in repositories:
+            if total_size <= self.max_size_bytes and len(repositories) <= self.max_repositories:
+                return
+
+            # Removed while holding the lock, so a checkout can't start using it in between.
+            with self._lock:
+                if path in self._in_use:
+                    continue
+
+                logger.info(f"[INFO] Evicting `{path}` from the repository cache")
+                remove_folder(path)
+            total_size -= sizes[path]
+            repositories = [repository for repository in repositories if repository != path]
+
+    # Private methods
+
+    def __repository_path(self, git_repo_url: str) -> str:
+        key = hashlib.sha1(git_repo_url.strip().rstrip("/").encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{repository_name(git_repo_url)}-{key}.git")
+
+    def __return_use(self, repository_path: str):
+        with self._lock:
+            self._in_use[repository_path] -= 1
+            if self._in_use[repository_path] <= 0:
+                del self._in_use[repository_path]
+
+    def __repository_lock(self, repository_path: str) -> threading.Lock:
+        with self._lock:
+            if repository_path not in self._repository_locks:
+                self._repository_locks[repository_path] = threading.Lock()
+
+            return self._repository_locks[repository_path]
+
+
+def repository_name(git_repo_url: str) -> str:
+    return git_repo_url.strip().rstrip("/").split("/")[-1].replace(".git", "")
+
+
+def folder_size(folder_path: str) -> int:
+    size = 0
+    for root, dirs, files in os.walk(folder_path):
+        for filename in files:
+            try:
+                size += os.path.getsize(os.path.join(root, filename))
+            except OSError:
+                pass
+
+    return size
+
+
+def remove_folder(folder_path: str):
+    def make_writable_and_retry(function, path, _):
+        # Git's pack files are read-only, which makes removing them fail on windows.
+        os.chmod(path, S_IREAD | S_IWUSR)
+        function(path)
+
+    started = time.monotonic()
+    shutil.rmtree(folder_path, onerror=make_writable_and_retry)
+    logger.info(f"[INFO] Removed `{folder_path}` in {time.monotonic() - started:.2f} seconds")
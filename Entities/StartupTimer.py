@@ -0,0 +1,24 @@
+import time
+
+
+class StartupTimer:
+    """
+    Measures how long each phase of the startup took, so the log shows where the time until the bot is ready goes.
+    A phase lasts from the end of the previous one until it is marked.
+    """
+
+    def __init__(self, started: float = None):
+        # A time.perf_counter() value, taken as early as possible.
+        self.started = started if started is not None else time.perf_counter()
+        self.phases: list[(str, float, str)] = []
+        self._last = self.started
+
+    def mark(self, phase: str, note: str = ""):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last, note))
+        self._last = now
+
+    def summary(self) -> str:
+        phases = ", ".join(f"{phase} {duration:.2f}s" + (f" ({note})" if note else "")
+                           for phase, duration, note in self.phases)
+        return f"Ready {self._last - self.started:.2f}s after starting: {phases}"
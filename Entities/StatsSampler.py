@@ -0,0 +1,124 @@
+import asyncio
+import time
+
+from docker.errors import DockerException
+from requests.exceptions import RequestException
+
+from Common.utils import formatBytes
+from Entities.AsyncDocker import AsyncDocker, DockerOperationTimeout
+
+# Sort key -> the field of compute_stats() that is sorted on (descending).
+SORT_KEYS = {
+    "cpu": "CpuPercent",
+    "memory": "MemoryUsed",
+    "net": "NetTotal",
+    "block": "BlockTotal",
+}
+
+
+class StatsSampler:
+    """
+    Takes one-shot resource samples of many containers at the same time.
+
+    A one-shot sample with `stream=False` takes docker 1-2 seconds per container (it waits for a second measurement to
+    compute the CPU usage), so the samples are taken concurrently with a bounded fan-out.
+    """
+
+    def __init__(self, asyncDocker: AsyncDocker, concurrency: int = 8):
+        self.docker = asyncDocker
+        self.concurrency = concurrency
+        # CPU seconds the bot spent on sampling (the docker calls in the worker threads and computing the stats), not
+        # counting whatever else runs on the event loop or in other threads meanwhile.
+        self.cpu_time = 0.0
+        # Why the last container that could not be sampled failed.
+        self.last_error: str | None = None
+
+    async def sample(self, containers: list[dict], one_shot: bool = False) -> dict[str, dict]:
+        """Returns the computed stats per container id. Containers that could not be sampled are left out.
+        `one_shot` skips docker's second measurement, so the CPU usage has to be computed from earlier samples."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def sample_one(container: dict):
+            async with semaphore:
+                try:
+                    raw, cost = await self.docker.run("stats", measure_thread_time, self.docker.client.api.stats,
+                                                      container["Id"], stream=False,
+                                                      one_shot=True if one_shot else None)
+                    started = time.thread_time()
+                    stats = compute_stats(raw)
+                    self.cpu_time += cost + time.thread_time() - started
+                    return container["Id"], stats
+                except (DockerException, RequestException, DockerOperationTimeout) as e:
+                    # Like a container that was removed in the meantime, or an engine too old for one-shot stats.
+                    self.last_error = f"{type(e).__name__}: {e}"
+                    return container["Id"], None
+
+        results = await asyncio.gather(*[sample_one(container) for container in containers])
+        return {container_id: stats for container_id, stats in results if stats is not None}
+
+
+def measure_thread_time(func, *args, **kwargs):
+    """Calls the function, and returns its result with the CPU time the calling thread spent on it."""
+    started = time.thread_time()
+    result = func(*args, **kwargs)
+    return result, time.thread_time() - started
+
+
+def compute_stats(raw: dict) -> dict:
+    """Computes the same numbers as `docker stats` from the raw stats of the docker API."""
+    cpu_stats = raw.get("cpu_stats") or {}
+    precpu_stats = raw.get("precpu_stats") or {}
+
+    cpu_usage = cpu_stats.get("cpu_usage") or {}
+    cpu_total = cpu_usage.get("total_usage", 0)
+    system_total = cpu_stats.get("system_cpu_usage", 0)
+    online_cpus = cpu_stats.get("online_cpus") or len(cpu_usage.get("percpu_usage") or []) or 1
+
+    cpu_delta = cpu_total - (precpu_stats.get("cpu_usage") or {}).get("total_usage", 0)
+    system_delta = system_total - precpu_stats.get("system_cpu_usage", 0)
+    cpu_percent = cpu_delta / system_delta * online_cpus * 100.0 if cpu_delta > 0 and system_delta > 0 else 0.0
+
+    memory_stats = raw.get("memory_stats") or {}
+    memory_details = memory_stats.get("stats") or {}
+    # Like the docker CLI, leave the page cache out (`inactive_file` on cgroup v2, `cache` on v1).
+    memory_cache = memory_details.get("inactive_file", memory_details.get("cache", 0))
+    memory_used = max(memory_stats.get("usage", 0) - memory_cache, 0)
+    memory_limit = memory_stats.get("limit", 0)
+
+    networks = (raw.get("networks") or {}).values()
+    net_rx = sum(network.get("rx_bytes", 0) for network in networks)
+    net_tx = sum(network.get("tx_bytes", 0) for network in networks)
+
+    block_io = (raw.get("blkio_stats") or {}).get("io_service_bytes_recursive") or []
+    block_read = sum(entry.get("value", 0) for entry in block_io if entry.get("op", "").lower() == "read")
+    block_write = sum(entry.get("value", 0) for entry in block_io if entry.get("op", "").lower() == "write")
+
+    return {
+        "CpuPercent": cpu_percent,
+        "CpuTotal": cpu_total,
+        "SystemTotal": system_total,
+        "OnlineCpus": online_cpus,
+        "MemoryUsed": memory_used,
+        "MemoryLimit": memory_limit,
+        "MemoryPercent": memory_used / memory_limit * 100.0 if memory_limit > 0 else 0.0,
+        "NetRx": net_rx,
+        "NetTx": net_tx,
+        "NetTotal": net_rx + net_tx,
+        "BlockRead": block_read,
+        "BlockWrite": block_write,
+        "BlockTotal": block_read + block_write,
+    }
+
+
+def format_stats(name: str, stats: dict) -> dict:
+    """In the form the paginator expects: {"Name": "Object name", Info: {object info}}."""
+    return {
+        "Name": name,
+        "Info": {
+            "CPU": f"{stats['CpuPercent']:.1f}%",
+            "Memory": f"{formatBytes(stats['MemoryUsed'])} / {formatBytes(stats['MemoryLimit'])} "
+                      f"({stats['MemoryPercent']:.1f}%)",
+            "Net I/O": f"{formatBytes(stats['NetRx'])} / {formatBytes(stats['NetTx'])}",
+            "Block I/O": f"{formatBytes(stats['BlockRead'])} / {formatBytes(stats['BlockWrite'])}"
+        }
+    }
@@ -1,20 +1,61 @@
 import asyncio
+import logging
 
 import discord
-import docker
 
-from Entities.CommandExecutor import CommandExecutor
+from Entities.ContainerIndex import ContainerIndex
+from Entities.HostRegistry import HostRegistry
 
+logger = logging.getLogger()
+logging.basicConfig(level=logging.INFO, format='%(message)s')
 
-# Updates every 25 seconds
-async def StatusRoutine(discordClient: discord.Client, dockerClient: docker.DockerClient):
-    while True:
-        executor = CommandExecutor(dockerClient)
-        running, total = await executor.get_running_total_containers()
 
-        await discordClient.change_presence(activity=discord.Activity(
-            type=discord.ActivityType.watching,
-            name=f"{running} of {total} containers running")
-        )
+class StatusRoutine:
+    """
+    Keeps the bot's presence ("x of y containers running") up to date.
 
-        await asyncio.sleep(25.0)
+    Updates are driven by changes of the container index, or a signal from a command handler. Bursts of changes are
+    collapsed into at most one update per window, and nothing is sent when the text did not change, since discord
+    rate-limits presence changes.
+    """
+
+    def __init__(self, discordClient: discord.Client, containerIndex: ContainerIndex | HostRegistry,
+                 window: float = 15.0):
+        self.discord_client = discordClient
+        self.container_index = containerIndex
+        self.window = window
+
+        self._changed = asyncio.Event()
+        self._last_text: str | None = None
+
+    def signal(self):
+        """Marks the presence as possibly outdated. Never waits, so it is safe to call from any handler."""
+        self._changed.set()
+
+    async def run(self):
+        self._changed.set()
+
+        while True:
+            await self._changed.wait()
+            self._changed.clear()
+
+            await self.__update_presence()
+
+            # Everything that is signalled during the window is handled by a single update afterwards.
+            await asyncio.sleep(self.window)
+
+    async def __update_presence(self):
+        running, total = self.container_index.counts()
+        text = f"{running} of {total} containers running"
+
+        if text == self._last_text:
+            return
+
+        try:
+            await self.discord_client.change_presence(activity=discord.Activity(
+                type=discord.ActivityType.watching,
+                name=text)
+            )
+            self._last_text = text
+        except (discord.HTTPException, ConnectionError) as e:
+            logger.warning(f"[WARNING] Could not update the presence: {e}")
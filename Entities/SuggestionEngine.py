@@ -0,0 +1,162 @@
+import heapq
+import re
+from collections import Counter
+
+from Entities.ContainerIndex import ContainerIndex
+from Entities.HostRegistry import HostRegistry
+
+# How many suggestions are shown.
+MAX_SUGGESTIONS = 5
+# Only the keys sharing the most trigrams with the query are ranked with the (slower) edit distance.
+MAX_CANDIDATES = 100
+# Matches scoring worse than this (about the share of characters that would have to change) are left out.
+MAX_SCORE = 0.4
+# Ids are only suggested for queries at least this long, shorter ones match the start of too many ids.
+MIN_ID_QUERY_LENGTH = 4
+SHORT_ID_LENGTH = 12
+SERVICE_LABEL = "com.docker.compose.service"
+WORD_SEPARATORS = re.compile(r"[-_./:\s]+")
+HEXADECIMAL = re.compile(r"^[0-9a-f]+$")
+
+
+class SuggestionEngine:
+    """
+    "Did you mean" suggestions for a container that could not be found, ranked from a trigram index over the container
+    names, short ids and compose service names. The index is only rebuilt when the container index changed, so
+    suggesting never lists the containers again.
+
+    The keys sharing the most trigrams with the query are ranked by edit distance (a swap of two characters counts as
+    one edit, so "ngnix" is close to "nginx"), against the whole key and against its words, and by the words they
+    have in common.
+    """
+
+    def __init__(self, container_index: ContainerIndex | HostRegistry):
+        self.container_index = container_index
+
+        # Suggestions that could (or could not) reuse the trigram index.
+        self.hits = 0
+        self.misses = 0
+
+        self._version = -1
+        # Per key: the lowered key, what it is (name, id or service) and the container it belongs to.
+        self._keys: list[(str, str, dict)] = []
+        # Trigram -> the positions of the keys that contain it.
+        self._trigrams: dict[str, list[int]] = {}
+
+    def suggest(self, query: str, host_name: str = "", limit: int = MAX_SUGGESTIONS) -> list[(dict, str, str)]:
+        """The containers that were most likely meant, best first, with what matched: the kind and the key."""
+        self.__refresh()
+
+        query = query.strip().lower()
+        if query == "":
+            return []
+
+        shared = Counter()
+        for trigram in key_trigrams(query):
+            for position in self._trigrams.get(trigram, ()):
+                shared[position] += 1
+
+        candidates = [position for position in shared
+                      if host_name == "" or self._keys[position][2]["Host"] == host_name]
+
+        # Container -> its best scoring key.
+        best: dict[(str, str), (float, str, str, dict)] = {}
+        for position in heapq.nlargest(MAX_CANDIDATES, candidates, key=shared.__getitem__):
+            key, kind, container = self._keys[position]
+            score = score_match(query, key, kind)
+            if score > MAX_SCORE:
+                continue
+
+            identity = (container["Host"], container["Id"])
+            if identity not in best or score < best[identity][0]:
+                best[identity] = (score, kind, key, container)
+
+        ranked = sorted(best.values(), key=lambda match: (match[0], match[3]["Name"]))
+        return [(container, kind, key) for _, kind, key, container in ranked[:limit]]
+
+    # Private methods
+
+    def __refresh(self):
+        if self._version == self.container_index.version:
+            self.hits += 1
+            return
+
+        self.misses += 1
+        keys = []
+        for container in self.container_index.list_containers():
+            keys.append((container["Name"].lower(), "name", container))
+            keys.append((container["Id"][:SHORT_ID_LENGTH], "id", container))
+
+            service = container["Labels"].get(SERVICE_LABEL)
+            if service is not None and service.lower() != container["Name"].lower():
+                keys.append((service.lower(), "service", container))
+
+        trigrams: dict[str, list[int]] = {}
+        for position, (key, _, _) in enumerate(keys):
+            for trigram in key_trigrams(key):
+                trigrams.setdefault(trigram, []).append(position)
+
+        self._keys = keys
+        self._trigrams = trigrams
+        self._version = self.container_index.version
+
+
+def key_trigrams(key: str) -> set[str]:
+    """The trigrams of the key and of each of its words, padded so the start and end of a word count as well."""
+    trigrams = set()
+    for part in [key] + words(key):
+        padded = f"  {part} "
+        trigrams.update(padded[position:position + 3] for position in range(len(padded) - 2))
+
+    return trigrams
+
+
+def words(text: str) -> list[str]:
+    return [word for word in WORD_SEPARATORS.split(text) if word != ""]
+
+
+def score_match(query: str, key: str, kind: str) -> float:
+    """How far off the key is from the query, 0 for a perfect match."""
+    if kind == "id":
+        if len(query) < MIN_ID_QUERY_LENGTH or not HEXADECIMAL.match(query):
+            return float("inf")
+        # Ids are matched on their start, as far as the query goes.
+        return edit_distance(query, key[:len(query)]) / len(query)
+
+    score = edit_distance(query, key) / max(len(query), len(key))
+    if query in key:
+        score = min(score, 0.1)
+
+    # Every word of the query against the closest word of the key, like "ngnix" against "web-nginx-1". A little worse
+    # than matching the whole key, as the key has more to it.
+    query_words, key_words = words(query), words(key)
+    if len(query_words) > 0 and len(key_words) > 0:
+        word_score = sum(min(edit_distance(query_word, key_word) / max(len(query_word), len(key_word))
+                             for key_word in key_words)
+                         for query_word in query_words) / len(query_words)
+        score = min(score, word_score + 0.1)
+
+        overlap = len(set(query_words) & set(key_words)) / len(set(query_words) | set(key_words))
+        score -= 0.2 * overlap
+
+    return max(score, 0.0)
+
+
+def edit_distance(first: str, second: str) -> int:
+    """The amount of inserted, removed, replaced or swapped (adjacent) characters to get from one to the other."""
+    if first == second:
+        return 0
+
+    previous_previous = None
+    previous = list(range(len(second) + 1))
+    for i in range(1, len(first) + 1):
+        current = [i] + [0] * len(second)
+        for j in range(1, len(second) + 1):
+            cost = 0 if first[i - 1] == second[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and first[i - 1] == second[j - 2] and first[i - 2] == second[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+
+        previous_previous, previous = previous, current
+
+    return previous[-1]
@@ -0,0 +1,249 @@
+import asyncio
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import discord
+import docker
+from aiohttp import web
+
+logger = logging.getLogger()
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+METRIC_PREFIX = "dockermanager"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Histogram buckets, in seconds.
+COMMAND_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Discord drops autocomplete responses that take longer than 3 seconds.
+AUTOCOMPLETE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 3.0)
+DOCKER_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# The warnings discord.py logs when a request was rate limited.
+RATE_LIMIT_MESSAGES = {
+    "We are being rate limited.": "route",
+    "Global rate limit has been hit.": "global"
+}
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, label_names: tuple[str, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = list(self._values.items())
+
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{format_labels(self.label_names, labels)} {value:g}" for labels, value in values]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, label_names: tuple[str, ...], buckets: tuple[float, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = buckets
+
+        # Labels -> the count per bucket, then the sum and the total count.
+        self._values: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float):
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [0] * len(self.buckets) + [0.0, 0]
+
+            for position, bucket in enumerate(self.buckets):
+                if value <= bucket:
+                    entry[position] += 1
+            entry[-2] += value
+            entry[-1] += 1
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = [(labels, list(entry)) for labels, entry in self._values.items()]
+
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, entry in values:
+            for bucket, count in zip(self.buckets + (float("inf"),), entry[:-2] + [entry[-1]]):
+                bucket_labels = format_labels(self.label_names + ("le",), labels + (format_bucket(bucket),))
+                lines.append(f"{self.name}_bucket{bucket_labels} {count}")
+
+            lines.append(f"{self.name}_sum{format_labels(self.label_names, labels)} {entry[-2]:g}")
+            lines.append(f"{self.name}_count{format_labels(self.label_names, labels)} {entry[-1]}")
+
+        return lines
+
+
+class Telemetry:
+    """
+    Measures where the bot's time goes, and serves it as Prometheus metrics on `/metrics`, from the bot's own event
+    loop.
+
+    Covered are the latency of every slash command and autocomplete, every docker API request (by endpoint), discord
+    rate limits, the lag of the event loop and the hit rates of the caches.
+    """
+
+    def __init__(self, port: int = 6666, lag_interval: float = 0.5):
+        self.port = port
+        self.lag_interval = lag_interval
+
+        self.commands = Histogram(f"{METRIC_PREFIX}_command_duration_seconds",
+                                  "Time from receiving a slash command until its handler finished.",
+                                  ("command", "outcome"), COMMAND_BUCKETS)
+        self.autocompletes = Histogram(f"{METRIC_PREFIX}_autocomplete_duration_seconds",
+                                       "Time it took to answer an autocomplete request, after waiting for more "
+                                       "keystrokes.", ("command",), AUTOCOMPLETE_BUCKETS)
+        self.docker_requests = Histogram(f"{METRIC_PREFIX}_docker_request_duration_seconds",
+                                         "Time until the docker API responded, by host and endpoint.",
+                                         ("host", "method", "endpoint", "status"), DOCKER_BUCKETS)
+        self.rate_limits = Counter(f"{METRIC_PREFIX}_discord_rate_limits_total",
+                                   "Discord requests that were rate limited.", ("scope",))
+        self.loop_lag = Histogram(f"{METRIC_PREFIX}_event_loop_lag_seconds",
+                                  "How late the event loop woke up a sleeping task.", (), LOOP_LAG_BUCKETS)
+
+        # Cache name -> an object with `hits` and `misses` counts.
+        self._caches: dict[str, object] = {}
+        self._runner: web.AppRunner | None = None
+
+    def instrument_discord(self, client: discord.Client, tree: discord.app_commands.CommandTree):
+        """Times the slash commands of the tree, and counts the rate limits discord.py runs into."""
+        original_on_error = tree.on_error
+
+        async def interaction_check(interaction: discord.Interaction) -> bool:
+            interaction.extras["started"] = time.perf_counter()
+            return True
+
+        async def on_error(interaction: discord.Interaction, error: discord.app_commands.AppCommandError):
+            self.__observe_command(interaction, "error")
+            await original_on_error(interaction, error)
+
+        async def on_app_command_completion(interaction: discord.Interaction, _):
+            self.__observe_command(interaction, "success")
+
+        tree.interaction_check = interaction_check
+        tree.on_error = on_error
+        client.event(on_app_command_completion)
+
+        logging.getLogger("discord.http").addHandler(RateLimitHandler(self.rate_limits))
+
+    def instrument_docker(self, dockerClient: docker.DockerClient, host_name: str = "local"):
+        """Times every request of the docker client, from the worker thread that made it."""
+        def on_response(response, *_, **__):
+            self.docker_requests.observe(
+                (host_name, response.request.method, docker_endpoint(response.request.path_url),
+                 str(response.status_code)),
+                response.elapsed.total_seconds()
+            )
+
+        dockerClient.api.hooks["response"].append(on_response)
+
+    def add_cache(self, name: str, cache):
+        """Reports the `hits` and `misses` counts of the cache on every scrape."""
+        self._caches[name] = cache
+
+    @contextmanager
+    def measure_autocomplete(self, interaction: discord.Interaction):
+        """
+        Measures an autocomplete from when the callback it yields is called, so the time spent waiting for more
+        keystrokes (the debounce) isn't counted. Keystrokes that never call it, superseded by a later one, aren't
+        measured at all.
+        """
+        started = []
+        try:
+            yield lambda: started.append(time.perf_counter())
+        finally:
+            if len(started) > 0:
+                command = interaction.command.qualified_name if interaction.command is not None else "unknown"
+                self.autocompletes.observe((command,), time.perf_counter() - started[0])
+
+    async def run(self):
+        """Serves the metrics, and measures the lag of the event loop for as long as the bot runs."""
+        application = web.Application()
+        application.router.add_get("/metrics", self.__serve_metrics)
+
+        self._runner = web.AppRunner(application, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "0.0.0.0", self.port).start()
+        logger.info(f"[INFO] Serving metrics on port {self.port}")
+
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.lag_interval)
+            self.loop_lag.observe((), max(time.perf_counter() - started - self.lag_interval, 0.0))
+
+    def render(self) -> str:
+        lines = []
+        for metric in (self.commands, self.autocompletes, self.docker_requests, self.rate_limits, self.loop_lag):
+            lines += metric.render()
+
+        for kind in ("hits", "misses"):
+            name = f"{METRIC_PREFIX}_cache_{kind}_total"
+            lines += [f"# HELP {name} Lookups that were {'served from' if kind == 'hits' else 'not in'} the cache.",
+                      f"# TYPE {name} counter"]
+            lines += [f"{name}{format_labels(('cache',), (cache_name,))} {getattr(cache, kind)}"
+                      for cache_name, cache in self._caches.items()]
+
+        return "\n".join(lines) + "\n"
+
+    # Private methods
+
+    def __observe_command(self, interaction: discord.Interaction, outcome: str):
+        started = interaction.extras.get("started")
+        if started is None or interaction.command is None:
+            return
+
+        self.commands.observe((interaction.command.qualified_name, outcome), time.perf_counter() - started)
+
+    async def __serve_metrics(self, _: web.Request) -> web.Response:
+        return web.Response(body=self.render().encode(), headers={"Content-Type": CONTENT_TYPE})
+
+
+class RateLimitHandler(logging.Handler):
+    """Counts the rate limit warnings of discord.py's http client."""
+
+    def __init__(self, counter: Counter):
+        super().__init__(level=logging.WARNING)
+        self.counter = counter
+
+    def emit(self, record: logging.LogRecord):
+        for message, scope in RATE_LIMIT_MESSAGES.items():
+            if str(record.msg).startswith(message):
+                self.counter.inc((scope,))
+
+
+def docker_endpoint(path_url: str) -> str:
+    """The endpoint of a docker API path, without the API version and with ids and names replaced by placeholders.
+    For example `/v1.41/containers/4f2a../json?all=1` becomes `/containers/{id}/json`."""
+    path = re.sub(r"^/v[\d.]+", "", urlparse(path_url).path)
+    path = re.sub(r"^/images/(?!(json|create|search|prune|load|get)$).+?(/json|/history|/push|/tag|/get)?$",
+                  r"/images/{name}\2", path)
+    return re.sub(r"^/(containers|exec|networks|volumes)/(?!(json|create|prune)$)[^/]+", r"/\1/{id}", path)
+
+
+def format_labels(label_names: tuple[str, ...], labels: tuple) -> str:
+    if len(label_names) == 0:
+        return ""
+
+    escaped = (str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(label_names, escaped)) + "}"
+
+
+def format_bucket(bucket: float) -> str:
+    return "+Inf" if bucket == float("inf") else f"{bucket:g}"
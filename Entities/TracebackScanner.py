@@ -0,0 +1,132 @@
+import hashlib
+import re
+
+from Common.utils import strip_ansi_escape_codes_bytes
+
+TRACEBACK_HEADER = b"Traceback (most recent call last):"
+# Frame lines, without the parts that differ between occurrences of the same error.
+FRAME_PATTERN = re.compile(rb'File "([^"]+)", line (\d+)')
+VARIABLE_PARTS = re.compile(rb'0x[0-9a-fA-F]+|\d+')
+
+# Stop collecting a traceback after this many lines, and never carry more than this many bytes of a single line.
+MAX_TRACEBACK_LINES = 200
+MAX_LINE_BYTES = 64 * 1024
+
+
+class TracebackScanner:
+    """
+    Incremental version of `Common.utils.parse_tracebacks`: consumes a log stream chunk by chunk and carries its state
+    (a partial line, a traceback that is still being collected) across chunk boundaries.
+
+    Besides python tracebacks, every line matching `error_pattern` is reported. As long as nothing interesting shows up,
+    the chunks are only searched for the traceback header (a plain substring search) and the error pattern, so idle
+    logs are cheap to scan. Plain alternations like "FATAL|CRITICAL" are a lot faster than ones with `\b` or `^`.
+    """
+
+    def __init__(self, error_pattern: str = ""):
+        self.error_regex = re.compile(error_pattern.encode(), re.MULTILINE) if error_pattern != "" else None
+
+        self._remainder = b""
+        self._traceback: list[bytes] | None = None
+
+    def feed(self, chunk: bytes) -> list[dict]:
+        data = self._remainder + chunk
+        last_newline = data.rfind(b"\n")
+        if last_newline == -1:
+            self._remainder = data[-MAX_LINE_BYTES:]
+            return []
+
+        self._remainder = data[last_newline + 1:][-MAX_LINE_BYTES:]
+
+        complete = data[:last_newline + 1]
+        if b"\x1b" in complete:
+            complete = strip_ansi_escape_codes_bytes(complete)
+
+        return self.__scan(complete)
+
+    def flush(self) -> list[dict]:
+        """Handles whatever is left at the end of the stream."""
+        detections = self.feed(b"\n") if self._remainder != b"" else []
+        if self._traceback is not None:
+            detections.append(self.__finish_traceback(b"(end of logs)"))
+
+        return detections
+
+    # Private methods
+
+    def __scan(self, data: bytes) -> list[dict]:
+        detections = []
+        position = 0
+
+        while position < len(data):
+            if self._traceback is None:
+                found = self.__find_next(data, position)
+                if found is None:
+                    break
+
+                line_start = data.rfind(b"\n", 0, found) + 1
+                line_end = data.find(b"\n", found)
+                line = data[line_start:line_end]
+                position = line_end + 1
+
+                if TRACEBACK_HEADER in line:
+                    self._traceback = []
+                else:
+                    detections.append(create_pattern_detection(line))
+                continue
+
+            line_end = data.find(b"\n", position)
+            line = data[position:line_end]
+            position = line_end + 1
+
+            # The frames are indented, the first line that isn't is the exception itself.
+            if line.strip() == b"" or line[:1] in (b" ", b"\t"):
+                self._traceback.append(line)
+                if len(self._traceback) >= MAX_TRACEBACK_LINES:
+                    detections.append(self.__finish_traceback(b"(traceback too long)"))
+            else:
+                detections.append(self.__finish_traceback(line))
+
+        return detections
+
+    def __find_next(self, data: bytes, position: int) -> int | None:
+        """The position of the next traceback header or error pattern match, whichever comes first."""
+        header = data.find(TRACEBACK_HEADER, position)
+        end = header if header != -1 else len(data)
+
+        if self.error_regex is not None:
+            match = self.error_regex.search(data, position, end)
+            if match is not None:
+                return match.start()
+
+        return header if header != -1 else None
+
+    def __finish_traceback(self, error_line: bytes) -> dict:
+        frames = self._traceback
+        self._traceback = None
+        return create_traceback_detection(frames, error_line)
+
+
+def create_traceback_detection(frames: list[bytes], error_line: bytes) -> dict:
+    exception_type = error_line.split(b":", 1)[0].strip()
+    locations = b"|".join(b"%s:%s" % match for match in FRAME_PATTERN.findall(b"\n".join(frames)))
+
+    trace = b"\n".join(frames).strip().decode(errors="replace")
+    error = error_line.strip().decode(errors="replace")
+    return {
+        "Kind": "traceback",
+        "Signature": hashlib.sha1(exception_type + b"@" + locations).hexdigest(),
+        "Summary": error,
+        # The same format as parse_tracebacks.
+        "Text": f"{trace}\n{error}"
+    }
+
+
+def create_pattern_detection(line: bytes) -> dict:
+    text = line.strip().decode(errors="replace")
+    return {
+        "Kind": "pattern",
+        "Signature": hashlib.sha1(VARIABLE_PARTS.sub(b"#", line.strip())).hexdigest(),
+        "Summary": text,
+        "Text": text
+    }
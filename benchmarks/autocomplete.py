@@ -0,0 +1,48 @@
+"""
+Measures how long the autocomplete engine takes to rank container names.
+
+Usage: python benchmarks/autocomplete.py [container amount]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from Entities.AutocompleteEngine import AutocompleteEngine  # noqa: E402
+
+
+class StaticIndex:
+    def __init__(self, names: list[str]):
+        self.version = 0
+        self._names = names
+
+    def names(self) -> list[str]:
+        return self._names
+
+
+def main():
+    container_amount = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    random.seed(1)
+    words = ["nginx", "postgres", "redis", "api", "worker", "web", "cron", "grafana", "loki", "traefik"]
+    names = [f"{random.choice(words)}-{random.choice(words)}_{index}" for index in range(container_amount)]
+    engine = AutocompleteEngine(StaticIndex(names), debounce=0)
+
+    # The first call builds the sorted name index.
+    started = time.perf_counter()
+    engine.rank("")
+    print(f"Building the index of {container_amount} names: {(time.perf_counter() - started) * 1000:.2f} ms")
+
+    for query in ["", "ng", "nginx-red", "worker_12", "ngxrds", "zzz"]:
+        rounds = 200
+        started = time.perf_counter()
+        for _ in range(rounds):
+            results = engine.rank(query)
+        elapsed = (time.perf_counter() - started) / rounds * 1000
+        print(f"  rank({query!r:12}) -> {len(results):2} results in {elapsed:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
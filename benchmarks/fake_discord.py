@@ -0,0 +1,122 @@
+"""
+Stand-ins for the parts of discord.py the bot talks to: interactions (response and followup) and the client's presence.
+
+Everything that would be sent to discord is serialized like discord.py would (embeds, views, files), so that cost is
+part of the measurements, and then counted instead of sent.
+"""
+import itertools
+from collections import Counter
+
+import discord
+
+ADMIN_ID = 1
+
+_ids = itertools.count(1_000_000)
+
+
+def serialize(content=None, embed=None, view=None, file=None, files=None, **_):
+    """Does the work discord.py does before sending a message."""
+    if embed is not None and embed is not discord.utils.MISSING:
+        embed.to_dict()
+    if view is not None and view is not discord.utils.MISSING:
+        view.to_components()
+    for attachment in ([file] if file is not None else []) + list(files or []):
+        attachment.fp.read()
+
+
+class FakeMessage:
+    def __init__(self, calls: Counter, **message):
+        self.calls = calls
+        self.id = next(_ids)
+        self.message = message
+
+    async def edit(self, **message):
+        serialize(**message)
+        self.calls["message.edit"] += 1
+        self.message.update(message)
+
+
+class FakeResponse:
+    def __init__(self, calls: Counter):
+        self.calls = calls
+        self.sent = None
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def send_message(self, content=None, **message):
+        self.__respond("response.send_message")
+        serialize(content, **message)
+        self.sent = {"content": content, **message}
+
+    async def defer(self, **_):
+        self.__respond("response.defer")
+
+    async def edit_message(self, **message):
+        self.__respond("response.edit_message")
+        serialize(**message)
+        self.sent = message
+
+    # Private methods
+
+    def __respond(self, call: str):
+        if self._done:
+            raise discord.InteractionResponded(None)
+        self._done = True
+        self.calls[call] += 1
+
+
+class FakeFollowup:
+    def __init__(self, calls: Counter):
+        self.calls = calls
+        self.sent: list[FakeMessage] = []
+
+    async def send(self, content=None, wait=False, **message):
+        serialize(content, **message)
+        self.calls["followup.send"] += 1
+        sent = FakeMessage(self.calls, content=content, **message)
+        self.sent.append(sent)
+        return sent
+
+
+class FakeUser:
+    def __init__(self, user_id: int):
+        self.id = user_id
+        self.name = f"user-{user_id}"
+
+
+class FakeInteraction:
+    """An application command interaction, or a component one when `custom_id` is given."""
+
+    def __init__(self, calls: Counter, custom_id: str = None, values: list[str] = None):
+        self.id = next(_ids)
+        self.user = FakeUser(ADMIN_ID)
+        self.guild = None
+        self.extras = {}
+        self.response = FakeResponse(calls)
+        self.followup = FakeFollowup(calls)
+
+        if custom_id is None:
+            self.type = discord.InteractionType.application_command
+            self.data = {}
+        else:
+            self.type = discord.InteractionType.component
+            self.data = {"custom_id": custom_id, "values": values or []}
+
+    def sent_views(self) -> list[discord.ui.View]:
+        """The views that were sent in response, newest last."""
+        sent = [self.response.sent] + [message.message for message in self.followup.sent]
+        return [message["view"] for message in sent
+                if message is not None and message.get("view") not in (None, discord.utils.MISSING)]
+
+
+class FakeDiscordClient:
+    def __init__(self):
+        self.calls = Counter()
+        self.presence_changed = None
+
+    async def change_presence(self, activity: discord.Activity = None, **_):
+        self.calls["change_presence"] += 1
+        if self.presence_changed is not None:
+            self.presence_changed.set()
@@ -0,0 +1,315 @@
+"""
+A stand-in for the Docker Engine API on a unix socket, serving generated containers, logs, stats and events.
+
+Only the endpoints the bot uses are implemented. Every request is counted per endpoint, so benchmarks can tell how many
+round trips an action takes. Actions (start, stop, restart, remove) change the container and emit an event, like the
+real engine.
+
+The engine runs in a process of its own (see EngineProcess), so serving requests doesn't compete for the GIL with the
+event loop that is being measured.
+"""
+import http.client
+import json
+import multiprocessing
+import os
+import queue
+import re
+import socket
+import socketserver
+import struct
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, unquote
+
+API_VERSION = "1.41"
+LOG_LINE = b"2024-01-01T00:00:00.000000000Z INFO request handled in 12ms path=/api/items/%d status=200\n"
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str):
+        super().__init__("localhost")
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+
+
+class EngineProcess:
+    """Runs a FakeEngine in a child process."""
+
+    def __init__(self, container_amount: int, log_lines: int = 2000):
+        self.directory = tempfile.mkdtemp(prefix="fake-docker-")
+        self.socket_path = os.path.join(self.directory, "docker.sock")
+        self.process = multiprocessing.Process(target=serve, args=(container_amount, self.socket_path, log_lines),
+                                               daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"unix://{self.socket_path}"
+
+    def start(self, timeout: float = 30.0):
+        self.process.start()
+        deadline = time.monotonic() + timeout
+        while not os.path.exists(self.socket_path):
+            if time.monotonic() > deadline or not self.process.is_alive():
+                raise RuntimeError("The fake docker engine did not start.")
+            time.sleep(0.01)
+
+    def stop(self):
+        self.process.terminate()
+        self.process.join()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        os.rmdir(self.directory)
+
+    def requests(self) -> Counter:
+        """The amount of requests per endpoint so far. Asking for them is not counted."""
+        connection = UnixHTTPConnection(self.socket_path)
+        try:
+            connection.request("GET", "/_bench/requests")
+            return Counter(json.loads(connection.getresponse().read()))
+        finally:
+            connection.close()
+
+    def round_trips(self) -> int:
+        return sum(self.requests().values())
+
+
+def serve(container_amount: int, socket_path: str, log_lines: int):
+    FakeEngine(container_amount, socket_path, log_lines).server.serve_forever()
+
+
+class FakeEngine:
+    def __init__(self, container_amount: int, socket_path: str, log_lines: int = 2000):
+        self.log_lines = log_lines
+        self.requests = Counter()
+        self.containers: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._subscribers: list[queue.Queue] = []
+
+        for index in range(container_amount):
+            self.__add_container(index)
+
+        self.server = UnixHTTPServer(socket_path, self.__create_handler())
+
+    def emit(self, action: str, container: dict):
+        event = {
+            "Type": "container", "Action": action, "status": action, "id": container["Id"],
+            "Actor": {"ID": container["Id"], "Attributes": {"name": container["Names"][0][1:]}},
+            "time": int(time.time()), "timeNano": time.time_ns()
+        }
+        for subscriber in list(self._subscribers):
+            subscriber.put(event)
+
+    def __add_container(self, index: int):
+        running = index % 2 == 0
+        container_id = f"{index:064x}"
+        self.containers[container_id] = {
+            "Id": container_id,
+            "Names": [f"/{['web', 'api', 'worker', 'db', 'cache'][index % 5]}-{index}"],
+            "Image": "nginx:latest",
+            "ImageID": "sha256:" + "0" * 64,
+            "Command": "nginx -g 'daemon off;'",
+            "Created": 1700000000 + index,
+            "State": "running" if running else "exited",
+            "Status": "Up 3 hours" if running else "Exited (0) 2 hours ago",
+            "Ports": [{"IP": "0.0.0.0", "PrivatePort": 80, "PublicPort": 8000 + index % 1000, "Type": "tcp"}],
+            "Labels": {"com.docker.compose.project": f"project-{index % 20}"}
+        }
+
+    def find(self, name_or_id: str) -> dict | None:
+        container = self.containers.get(name_or_id)
+        if container is not None:
+            return container
+
+        for container in self.containers.values():
+            if container["Id"].startswith(name_or_id) or container["Names"][0] == f"/{name_or_id}":
+                return container
+
+        return None
+
+    def list_containers(self, arguments: dict) -> list[dict]:
+        filters = json.loads(arguments.get("filters", ["{}"])[0])
+        show_all = arguments.get("all", ["0"])[0] in ("1", "true", "True")
+
+        with self._lock:
+            containers = list(self.containers.values())
+
+        selected = []
+        for container in containers:
+            if not show_all and container["State"] != "running":
+                continue
+            if "id" in filters and not any(container["Id"].startswith(prefix) for prefix in filters["id"]):
+                continue
+            if "status" in filters and container["State"] not in filters["status"]:
+                continue
+            if "label" in filters and not all(
+                    container["Labels"].get(label.partition("=")[0]) == label.partition("=")[2]
+                    for label in filters["label"]):
+                continue
+            selected.append(container)
+
+        return selected
+
+    def inspect(self, container: dict) -> dict:
+        return {
+            "Id": container["Id"],
+            "Name": container["Names"][0],
+            "Created": "2023-11-14T22:13:20.000000000Z",
+            "State": {"Status": container["State"], "Running": container["State"] == "running",
+                      "StartedAt": "2023-11-14T22:13:20.000000000Z"},
+            "Config": {"Image": container["Image"], "Labels": container["Labels"], "Tty": False},
+            "HostConfig": {"PortBindings": {}},
+            "NetworkSettings": {"Ports": {}}
+        }
+
+    def stats(self, container: dict) -> dict:
+        usage = int(time.time() * 1e9) % 10 ** 12
+        return {
+            "read": "2024-01-01T00:00:00Z",
+            "cpu_stats": {"cpu_usage": {"total_usage": usage}, "system_cpu_usage": usage * 40, "online_cpus": 4},
+            "precpu_stats": {"cpu_usage": {"total_usage": usage - 10 ** 7},
+                             "system_cpu_usage": usage * 40 - 10 ** 9},
+            "memory_stats": {"usage": 64 * 1024 ** 2, "limit": 8 * 1024 ** 3, "stats": {"inactive_file": 1024 ** 2}},
+            "networks": {"eth0": {"rx_bytes": 1024 ** 2, "tx_bytes": 2 * 1024 ** 2}},
+            "blkio_stats": {"io_service_bytes_recursive": [{"op": "read", "value": 4096},
+                                                           {"op": "write", "value": 8192}]}
+        }
+
+    def logs(self, arguments: dict) -> bytes:
+        tail = arguments.get("tail", ["all"])[0]
+        amount = self.log_lines if tail == "all" else min(int(tail), self.log_lines)
+
+        # Multiplexed like the real engine for containers without a TTY: a header with the stream and length per frame.
+        frames = []
+        for number in range(amount):
+            line = LOG_LINE % number
+            frames.append(struct.pack(">BxxxL", 1, len(line)) + line)
+        return b"".join(frames)
+
+    def act(self, container: dict, action: str):
+        with self._lock:
+            if action in ("start", "restart"):
+                container["State"], container["Status"] = "running", "Up Less than a second"
+            elif action in ("stop", "kill"):
+                container["State"], container["Status"] = "exited", "Exited (0) Less than a second ago"
+            elif action == "destroy":
+                self.containers.pop(container["Id"], None)
+
+        self.emit(action, container)
+
+    def __create_handler(self):
+        engine = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                self.__route("GET")
+
+            def do_POST(self):
+                self.__route("POST")
+
+            def do_DELETE(self):
+                self.__route("DELETE")
+
+            def __route(self, method: str):
+                url = urlparse(self.path)
+                path = re.sub(r"^/v[\d.]+", "", unquote(url.path))
+                arguments = parse_qs(url.query)
+
+                if int(self.headers.get("Content-Length") or 0) > 0:
+                    self.rfile.read(int(self.headers["Content-Length"]))
+
+                if path == "/_bench/requests":
+                    return self.__send_json(dict(engine.requests))
+
+                parts = path.strip("/").split("/")
+                endpoint = re.sub(r"/containers/[^/]+", "/containers/{id}", path)
+                engine.requests[f"{method} {endpoint}"] += 1
+
+                if path == "/_ping":
+                    return self.__send(200, b"OK", "text/plain")
+                if path == "/version":
+                    return self.__send_json({"ApiVersion": API_VERSION, "Version": "24.0.0"})
+                if path == "/containers/json":
+                    return self.__send_json(engine.list_containers(arguments))
+                if path == "/events":
+                    return self.__stream_events()
+                if parts[0] == "images":
+                    return self.__send_json({"Id": "sha256:" + "0" * 64, "RepoTags": ["/".join(parts[1:-1])]})
+
+                if parts[0] != "containers" or len(parts) < 2:
+                    return self.__send_json({"message": "page not found"}, 404)
+
+                container = engine.find(parts[1])
+                if container is None:
+                    return self.__send_json({"message": f"No such container: {parts[1]}"}, 404)
+
+                action = parts[2] if len(parts) > 2 else ""
+                if method == "DELETE":
+                    engine.act(container, "destroy")
+                    return self.__send(204, b"")
+                if action == "json":
+                    return self.__send_json(engine.inspect(container))
+                if action == "stats":
+                    return self.__send_json(engine.stats(container))
+                if action == "logs":
+                    return self.__send(200, engine.logs(arguments),
+                                       "application/vnd.docker.raw-stream")
+                if action in ("start", "stop", "restart", "kill"):
+                    engine.act(container, action)
+                    return self.__send(204, b"")
+                if action == "rename":
+                    container["Names"] = [f"/{arguments['name'][0]}"]
+                    engine.emit("rename", container)
+                    return self.__send(204, b"")
+
+                return self.__send_json({"message": "page not found"}, 404)
+
+            def __send_json(self, body, status: int = 200):
+                self.__send(status, json.dumps(body).encode())
+
+            def __send(self, status: int, body: bytes, content_type: str = "application/json"):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def __stream_events(self):
+                subscriber = queue.Queue()
+                engine._subscribers.append(subscriber)
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                self.wfile.flush()
+
+                try:
+                    while True:
+                        event = subscriber.get()
+                        if event is None:
+                            break
+                        chunk = json.dumps(event).encode() + b"\n"
+                        self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    engine._subscribers.remove(subscriber)
+                    self.close_connection = True
+
+        return Handler
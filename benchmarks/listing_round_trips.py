@@ -0,0 +1,101 @@
+"""
+Counts the docker API round trips needed to list containers, the old way versus the sparse way.
+
+Usage: python benchmarks/listing_round_trips.py [container amount]
+"""
+import json
+import os
+import sys
+
+import docker
+import requests
+from requests.adapters import BaseAdapter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from Entities.ContainerIndex import summarize_container  # noqa: E402
+
+
+class CountingAdapter(BaseAdapter):
+    """Answers the container list and inspect endpoints from generated data, counting every request."""
+
+    def __init__(self, container_amount: int):
+        super().__init__()
+        self.requests = 0
+        self.containers = [
+            {
+                "Id": f"{index:064x}",
+                "Names": [f"/container-{index}"],
+                "Image": "nginx:latest",
+                "Created": 1700000000 + index,
+                "State": "running" if index % 2 == 0 else "exited",
+                "Status": "Up 3 hours" if index % 2 == 0 else "Exited (0) 2 hours ago",
+                "Ports": [{"IP": "0.0.0.0", "PrivatePort": 80, "PublicPort": 8000 + index, "Type": "tcp"}],
+                "Labels": {}
+            }
+            for index in range(container_amount)
+        ]
+
+    def send(self, request, **kwargs):
+        self.requests += 1
+        path = request.path_url.split("?")[0]
+
+        if path.endswith("/containers/json"):
+            running_only = "all=1" not in request.path_url
+            body = [container for container in self.containers
+                    if not running_only or container["State"] == "running"]
+        else:
+            container_id = path.split("/")[-2]
+            container = next(container for container in self.containers if container["Id"] == container_id)
+            body = {
+                "Id": container["Id"],
+                "Name": container["Names"][0],
+                "Created": "2023-11-14T22:13:20.000000000Z",
+                "State": {"Status": container["State"], "StartedAt": "2023-11-14T22:13:20.000000000Z"},
+                "Config": {"Image": container["Image"], "Labels": {}},
+                "HostConfig": {"PortBindings": {"80/tcp": [{"HostIp": "", "HostPort": "8000"}]}}
+            }
+
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps(body).encode()
+        response.headers["Content-Type"] = "application/json"
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def count(adapter: CountingAdapter, func) -> int:
+    adapter.requests = 0
+    func()
+    return adapter.requests
+
+
+def main():
+    container_amount = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    client = docker.DockerClient(base_url="tcp://127.0.0.1:2375", version="1.41")
+    adapter = CountingAdapter(container_amount)
+    client.api.mount("http://", adapter)
+
+    def presence_before():
+        len(client.containers.list())
+        len(client.containers.list(all=True))
+
+    def overview_before():
+        client.containers.list(all=True)
+
+    def sparse_listing():
+        [summarize_container(container) for container in client.api.containers(all=True)]
+
+    print(f"Docker API round trips with {container_amount} containers (half of them running):")
+    print(f"  presence update, before:       {count(adapter, presence_before)}")
+    print(f"  /containers overview, before:  {count(adapter, overview_before)}")
+    print(f"  full index resync, after:      {count(adapter, sparse_listing)}")
+    print("  presence update and /containers read from the index after, so they need 0.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""
+Drives the real command handlers, paginator, autocomplete and status routine against a fake docker engine and fake
+discord interactions, at growing container amounts. Per scenario it records the latency, the docker API round trips
+and how long the event loop was blocked, and per container amount the peak memory of the bot's process.
+
+Every container amount runs in a fresh process, so the peak memory of one doesn't carry over into the next.
+
+Usage:
+    python benchmarks/suite.py [--sizes 10,100,1000,5000] [--output results.json]
+    python benchmarks/suite.py compare before.json after.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+
+import docker
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fake_discord import FakeDiscordClient, FakeInteraction  # noqa: E402
+from fake_engine import EngineProcess  # noqa: E402
+from Entities.AutocompleteEngine import AutocompleteEngine  # noqa: E402
+from Entities.CommandExecutor import CommandExecutor  # noqa: E402
+from Entities.DockerHost import DockerHost  # noqa: E402
+from Entities.HostRegistry import HostRegistry  # noqa: E402
+from Entities.JobQueue import JobQueue  # noqa: E402
+from Entities.Paginator import decode_page_id  # noqa: E402
+from Entities.StatusRoutine import StatusRoutine  # noqa: E402
+from Entities.SuggestionEngine import SuggestionEngine  # noqa: E402
+
+DEFAULT_SIZES = [10, 100, 1000, 5000]
+# The metrics shown by the compare mode, and whether lower is better.
+COMPARED_METRICS = ["median_ms", "p95_ms", "round_trips", "loop_blocked_ms", "max_loop_lag_ms"]
+
+
+class LoopMonitor:
+    """Measures how long the event loop was blocked, by how late a short sleep wakes up."""
+
+    def __init__(self, interval: float = 0.005, threshold: float = 0.005):
+        self.interval = interval
+        self.threshold = threshold
+        self.blocked = 0.0
+        self.max_lag = 0.0
+
+    async def run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+
+            lag = time.perf_counter() - started - self.interval
+            if lag > self.threshold:
+                self.blocked += lag
+                self.max_lag = max(self.max_lag, lag)
+
+    def reset(self):
+        self.blocked = 0.0
+        self.max_lag = 0.0
+
+
+class Bench:
+    def __init__(self, container_amount: int):
+        self.container_amount = container_amount
+        self.engine = EngineProcess(container_amount)
+        self.monitor = LoopMonitor()
+        self.calls = Counter()
+
+        self.hosts = None
+        self.docker = None
+        self.index = None
+        self.autocomplete = None
+        self.suggestions = None
+        self.jobs = None
+        self.discord_client = FakeDiscordClient()
+        self.status_routine = None
+
+    async def setup(self):
+        self.engine.start()
+        client = docker.DockerClient(base_url=self.engine.base_url, version="1.41")
+        host = DockerHost("local", client=client, resync_interval=3600)
+        self.hosts = HostRegistry([host])
+        await self.hosts.start()
+        self.docker, self.index = host.docker, host.index
+        self.autocomplete = AutocompleteEngine(self.hosts, debounce=0)
+        self.suggestions = SuggestionEngine(self.hosts)
+        self.jobs = JobQueue()
+
+        self.status_routine = StatusRoutine(self.discord_client, self.hosts, window=0)
+        self.hosts.add_listener(self.status_routine.signal)
+        asyncio.get_running_loop().create_task(self.status_routine.run())
+        asyncio.get_running_loop().create_task(self.monitor.run())
+
+        # Let the events stream connect before anything happens.
+        await asyncio.sleep(0.2)
+
+    def teardown(self):
+        self.hosts.stop()
+        self.engine.stop()
+
+    def executor(self, custom_id: str = None, values: list[str] = None) -> CommandExecutor:
+        return CommandExecutor(self.hosts, interaction=FakeInteraction(self.calls, custom_id, values),
+                               suggestions=self.suggestions, jobs=self.jobs)
+
+    async def measure(self, action, repeat: int) -> dict:
+        round_trips = self.engine.round_trips()
+        latencies = []
+        self.monitor.reset()
+
+        for iteration in range(repeat):
+            started = time.perf_counter()
+            await action(iteration)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        # Give the events the action caused a moment to be handled, so their round trips are counted too.
+        await asyncio.sleep(0.05)
+        latencies.sort()
+        return {
+            "repeat": repeat,
+            "median_ms": statistics.median(latencies),
+            "p95_ms": latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)],
+            "max_ms": latencies[-1],
+            "round_trips": (self.engine.round_trips() - round_trips) / repeat,
+            "loop_blocked_ms": self.monitor.blocked * 1000,
+            "max_loop_lag_ms": self.monitor.max_lag * 1000
+        }
+
+    # Scenarios
+
+    async def index_resync(self, _):
+        await self.index.resync()
+
+    async def containers_command(self, _):
+        await self.executor().get_and_send_containers()
+
+    async def containers_next_page(self, iteration: int):
+        interaction = FakeInteraction(Counter())
+        await CommandExecutor(self.hosts, interaction=interaction).get_and_send_containers()
+
+        views = interaction.sent_views()
+        if len(views) == 0:
+            return
+        custom_id = next(item.custom_id for item in views[-1].children if item.custom_id.startswith("dm:page:next"))
+        await self.executor(custom_id).navigate_page(decode_page_id(custom_id))
+
+    async def help_command(self, _):
+        await self.executor().get_help()
+
+    async def autocomplete_keystroke(self, iteration: int):
+        query = ["", "w", "web", "worker-1", "wrkr", "cache-49"][iteration % 6]
+        await self.autocomplete.complete(1, query)
+
+    async def misspelled_container(self, iteration: int):
+        """A command for a container that doesn't exist, answered with suggestions."""
+        name = ["wbe-10", "wroker-2", "projct-3", "cahce-49"][iteration % 4]
+        await self.executor().restart_container(name)
+
+    async def presence_update(self, iteration: int):
+        """From a container stopping or starting to the presence showing it: the events stream, the index update and
+        the status routine."""
+        container = self.index.list_containers()[0]
+        self.discord_client.presence_changed = asyncio.Event()
+
+        action = self.docker.client.api.stop if container["Status"] == "running" else self.docker.client.api.start
+        await self.docker.run("stop", action, container["Id"])
+        await asyncio.wait_for(self.discord_client.presence_changed.wait(), timeout=10)
+
+    async def restart_command(self, iteration: int):
+        running = self.index.list_containers(status="running")
+        container = running[iteration % len(running)]
+        # Until the job is done, not just until the command was answered.
+        await (await self.executor().restart_container(container["Name"])).wait()
+
+    async def logs_command(self, _):
+        container = self.index.list_containers()[0]
+        await self.executor().retrieve_logs_from_container(container["Name"])
+
+    async def stats_command(self, _):
+        await self.executor().get_and_send_stats()
+
+    async def bulk_restart_project(self, _):
+        await (await self.executor().bulk_operation("restart", label="com.docker.compose.project=project-1")).wait()
+
+    async def run(self) -> dict:
+        await self.setup()
+        setup_rss = peak_rss_mb()
+
+        heavy = max(3, min(20, 2000 // self.container_amount))
+        scenarios = [
+            ("index_resync", self.index_resync, 10),
+            ("containers_command", self.containers_command, 20),
+            ("containers_next_page", self.containers_next_page, 20),
+            ("help_command", self.help_command, 20),
+            ("autocomplete_keystroke", self.autocomplete_keystroke, 60),
+            ("misspelled_container", self.misspelled_container, 20),
+            ("presence_update", self.presence_update, 10),
+            ("restart_command", self.restart_command, 10),
+            ("logs_command", self.logs_command, 10),
+            ("stats_command", self.stats_command, heavy),
+            ("bulk_restart_project", self.bulk_restart_project, heavy),
+        ]
+
+        results = {}
+        try:
+            for name, action, repeat in scenarios:
+                results[name] = await self.measure(action, repeat)
+                print(f"  {self.container_amount:>5} containers  {name:<24} {results[name]['median_ms']:9.2f} ms  "
+                      f"{results[name]['round_trips']:8.1f} round trips", file=sys.stderr)
+        finally:
+            self.teardown()
+
+        return {
+            "containers": self.container_amount,
+            "setup_rss_mb": setup_rss,
+            "peak_rss_mb": peak_rss_mb(),
+            "discord_calls": dict(self.calls),
+            "scenarios": results
+        }
+
+
+def peak_rss_mb() -> float:
+    # Kilobytes on linux, bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def run_size(container_amount: int) -> dict:
+    process = subprocess.run([sys.executable, __file__, "--single", str(container_amount)], stdout=subprocess.PIPE,
+                             check=True)
+    return json.loads(process.stdout)
+
+
+def compare(before_path: str, after_path: str):
+    with open(before_path) as file:
+        before = json.load(file)
+    with open(after_path) as file:
+        after = json.load(file)
+
+    print(f"{'containers':>10}  {'scenario':<24} {'metric':<16} {'before':>10} {'after':>10} {'change':>8}")
+    for size, after_result in after["results"].items():
+        before_result = before["results"].get(size)
+        if before_result is None:
+            continue
+
+        for metric in ("setup_rss_mb", "peak_rss_mb"):
+            print_comparison(size, "-", metric, before_result[metric], after_result[metric])
+
+        for scenario, after_metrics in after_result["scenarios"].items():
+            before_metrics = before_result["scenarios"].get(scenario)
+            if before_metrics is None:
+                continue
+            for metric in COMPARED_METRICS:
+                print_comparison(size, scenario, metric, before_metrics[metric], after_metrics[metric])
+
+
+def print_comparison(size: str, scenario: str, metric: str, before: float, after: float):
+    change = f"{(after - before) / before * 100:+.0f}%" if before > 0 else ("=" if after == 0 else "new")
+    print(f"{size:>10}  {scenario:<24} {metric:<16} {before:10.2f} {after:10.2f} {change:>8}")
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "compare":
+        compare(sys.argv[2], sys.argv[3])
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="comma separated container amounts")
+    parser.add_argument("--output", default="benchmark-results.json", help="where to write the results to")
+    parser.add_argument("--single", type=int, help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+
+    # The bot logs every resync and action, which would drown the progress output.
+    logging.getLogger().setLevel(logging.WARNING)
+
+    if arguments.single is not None:
+        print(json.dumps(asyncio.run(Bench(arguments.single).run())))
+        return
+
+    results = {}
+    for size in [int(size) for size in arguments.sizes.split(",")]:
+        results[str(size)] = run_size(size)
+
+    with open(arguments.output, "w") as file:
+        json.dump({
+            "meta": {
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform()
+            },
+            "results": results
+        }, file, indent=2)
+    print(f"Wrote the results to {arguments.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
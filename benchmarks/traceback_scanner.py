@@ -0,0 +1,64 @@
+"""
+Measures the throughput of the incremental traceback scanner, in MB/s.
+
+Usage: python benchmarks/traceback_scanner.py [megabytes of logs] [chunk size in bytes]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from Entities.TracebackScanner import TracebackScanner  # noqa: E402
+
+TRACEBACK = (
+    "Traceback (most recent call last):\n"
+    '  File "/app/main.py", line 42, in handle\n'
+    "    result = process(request)\n"
+    '  File "/app/worker.py", line 7, in process\n'
+    "    raise ValueError(f'bad request {request}')\n"
+    "ValueError: bad request 1234\n"
+)
+
+
+def generate_logs(megabytes: float) -> bytes:
+    random.seed(1)
+    lines = []
+    size = 0
+    while size < megabytes * 1024 * 1024:
+        if random.random() < 0.001:
+            line = TRACEBACK
+        elif random.random() < 0.001:
+            line = f"2023-08-01 12:00:{random.randint(10, 59)} FATAL could not reach the database\n"
+        else:
+            line = f"2023-08-01 12:00:00 \x1b[32mINFO\x1b[0m handled request {random.randint(0, 10 ** 6)} in " \
+                   f"{random.randint(1, 500)} ms\n"
+        lines.append(line)
+        size += len(line)
+
+    return "".join(lines).encode()
+
+
+def main():
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 100
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else 16 * 1024
+
+    logs = generate_logs(megabytes)
+    scanner = TracebackScanner("FATAL|CRITICAL|panic:")
+
+    started = time.perf_counter()
+    detections = []
+    for position in range(0, len(logs), chunk_size):
+        detections.extend(scanner.feed(logs[position:position + chunk_size]))
+    detections.extend(scanner.flush())
+    elapsed = time.perf_counter() - started
+
+    signatures = {detection["Signature"] for detection in detections}
+    print(f"Scanned {len(logs) / 1024 / 1024:.1f} MB in {chunk_size} byte chunks in {elapsed:.2f} s: "
+          f"{len(logs) / 1024 / 1024 / elapsed:.1f} MB/s")
+    print(f"  {len(detections)} detections, {len(signatures)} unique signatures")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,45 @@
-import logging
-import os
-from typing import List
-
-import discord
-import docker
-from discord import app_commands
-from docker.errors import DockerException
-from dotenv import load_dotenv
-
-from Common.contants import APP_VERSION
-from Entities.CommandExecutor import CommandExecutor
-from Entities.DockerManagerClient import DockerManagerClient
-from Entities.StatusRoutine import StatusRoutine
+import time
+
+# Taken before anything else is imported, so the startup breakdown includes the imports.
+STARTED = time.perf_counter()
+
+import logging  # noqa: E402
+import os  # noqa: E402
+from typing import List, Literal  # noqa: E402
+
+import discord  # noqa: E402
+import docker  # noqa: E402
+from discord import app_commands  # noqa: E402
+from docker.errors import DockerException  # noqa: E402
+from dotenv import load_dotenv  # noqa: E402
+
+from Common.contants import APP_VERSION, JOBS_PER_HOST, JOB_HISTORY  # noqa: E402
+from Common.utils import parse_key_value_list  # noqa: E402
+from Entities.AlertChannel import AlertChannel  # noqa: E402
+from Entities.AutocompleteEngine import AutocompleteEngine  # noqa: E402
+from Entities.CommandExecutor import CommandExecutor  # noqa: E402
+from Entities.DeploymentState import DeploymentState  # noqa: E402
+from Entities.DockerHost import DockerHost  # noqa: E402
+from Entities.DockerManagerClient import DockerManagerClient  # noqa: E402
+from Entities.ErrorWatcher import ErrorWatcher  # noqa: E402
+from Entities.EventAlerter import EventAlerter  # noqa: E402
+from Entities.HostRegistry import HostRegistry  # noqa: E402
+from Entities.JobQueue import JobQueue  # noqa: E402
+from Entities.MetricsCollector import MetricsCollector  # noqa: E402
+from Entities.Paginator import Paginator, decode_page_id  # noqa: E402
+from Entities.RepositoryCache import RepositoryCache  # noqa: E402
+from Entities.StartupTimer import StartupTimer  # noqa: E402
+from Entities.StatusRoutine import StatusRoutine  # noqa: E402
+from Entities.SuggestionEngine import SuggestionEngine  # noqa: E402
+from Entities.Telemetry import Telemetry  # noqa: E402
 
 # INITIALIZATION #
 
 # Initialize logging.
 logger = logging.getLogger()
 logging.basicConfig(level=logging.INFO, format='%(message)s')
+startupTimer = StartupTimer(STARTED)
+startupTimer.mark("imports")
 
 # Initialize environment.
 logger.info('[INFO] Updating environment variables')
@@ -25,6 +47,31 @@ load_dotenv()
 TOKEN = os.getenv('DISCORD_TOKEN')
 ADMINS = str(os.getenv('ADMINS')).split(",")
 GUILDS = str(os.getenv('GUILDS')).split(",")
+CONTAINER_INDEX_RESYNC_INTERVAL = float(os.getenv('CONTAINER_INDEX_RESYNC_INTERVAL', 300))
+PRESENCE_UPDATE_WINDOW = float(os.getenv('PRESENCE_UPDATE_WINDOW', 15))
+AUTOCOMPLETE_DEBOUNCE = float(os.getenv('AUTOCOMPLETE_DEBOUNCE', 0.1))
+ALERT_CHANNEL = os.getenv('ALERT_CHANNEL')
+ERROR_WATCH_CONTAINERS = [glob.strip() for glob in os.getenv('ERROR_WATCH_CONTAINERS', '').split(",") if glob.strip()]
+ERROR_WATCH_MAX = int(os.getenv('ERROR_WATCH_MAX', 20))
+ERROR_PATTERN = os.getenv('ERROR_PATTERN', 'FATAL|CRITICAL|panic:')
+ALERT_WINDOW = float(os.getenv('ALERT_WINDOW', 300))
+ALERT_RATE_LIMIT = int(os.getenv('ALERT_RATE_LIMIT', 20))
+RESTART_LOOP_THRESHOLD = int(os.getenv('RESTART_LOOP_THRESHOLD', 3))
+METRICS_CPU_BUDGET = float(os.getenv('METRICS_CPU_BUDGET', 2))
+DOCKER_WORKERS = int(os.getenv('DOCKER_WORKERS', 16))
+DOCKER_HOSTS = parse_key_value_list(os.getenv('DOCKER_HOSTS'))
+DOCKER_TLS_CERTS = parse_key_value_list(os.getenv('DOCKER_TLS_CERTS'))
+DOCKER_OPERATION_LIMITS = {operation: int(limit) for operation, limit
+                           in parse_key_value_list(os.getenv('DOCKER_OPERATION_LIMITS')).items()}
+DOCKER_OPERATION_TIMEOUTS = {operation: float(timeout) for operation, timeout
+                             in parse_key_value_list(os.getenv('DOCKER_OPERATION_TIMEOUTS')).items()}
+GIT_CACHE_DIR = os.getenv('GIT_CACHE_DIR', 'cache/repositories')
+GIT_CACHE_MAX_SIZE = float(os.getenv('GIT_CACHE_MAX_SIZE', 2048))
+GIT_CACHE_MAX_REPOSITORIES = int(os.getenv('GIT_CACHE_MAX_REPOSITORIES', 20))
+DEPLOY_TIMEOUT = float(os.getenv('DEPLOY_TIMEOUT', 840))
+METRICS_PORT = int(os.getenv('METRICS_PORT', 6666))
+JOBS_PER_HOST = int(os.getenv('JOBS_PER_HOST', JOBS_PER_HOST))
+COMMAND_HASHES_FILE = os.path.join(os.path.dirname(GIT_CACHE_DIR), "command-hashes.json")
 
 # Set intents (permissions).
 logger.info('[INFO] Setting discord intents (permissions)')
@@ -32,19 +79,80 @@ intents = discord.Intents.default()
 intents.message_content = True
 
 # Initialize discord client.
-discordClient = DockerManagerClient(intents=intents, guild_ids=GUILDS)
-
-# Initialize Docker Engine.
-logger.info('[INFO] Trying to get the docker client from the environment..')
-
-dockerClient = None
-try:
-    dockerClient = docker.from_env()
-except DockerException:
-    logger.error('____________________________________\n'
-                 '[ERROR] Could not connect to docker. \n'
-                 'Make sure that docker is running, and this app is running in the same environment.')
-    exit("Exiting application.")
+discordClient = DockerManagerClient(intents=intents, guild_ids=GUILDS, command_hashes_path=COMMAND_HASHES_FILE,
+                                    startup_timer=startupTimer)
+telemetry = Telemetry(port=METRICS_PORT)
+telemetry.instrument_discord(discordClient, discordClient.tree)
+
+# Initialize the docker hosts. Every host gets its own client, worker pool (so its blocking calls never stall the
+# discord event loop, nor the other hosts) and container index, kept up to date by docker events once connected.
+hostOptions = {"max_workers": DOCKER_WORKERS, "limits": DOCKER_OPERATION_LIMITS, "timeouts": DOCKER_OPERATION_TIMEOUTS,
+               "resync_interval": CONTAINER_INDEX_RESYNC_INTERVAL}
+if len(DOCKER_HOSTS) > 0:
+    logger.info(f"[INFO] Managing the docker hosts {', '.join(DOCKER_HOSTS)}")
+    dockerHosts = [DockerHost(name, base_url=base_url, tls_cert_path=DOCKER_TLS_CERTS.get(name), **hostOptions)
+                   for name, base_url in DOCKER_HOSTS.items()]
+else:
+    logger.info('[INFO] Trying to get the docker client from the environment..')
+
+    try:
+        dockerHosts = [DockerHost("local", client=docker.from_env(max_pool_size=DOCKER_WORKERS), **hostOptions)]
+    except DockerException:
+        logger.error('____________________________________\n'
+                     '[ERROR] Could not connect to docker. \n'
+                     'Make sure that docker is running, and this app is running in the same environment.')
+        exit("Exiting application.")
+
+hostRegistry = HostRegistry(dockerHosts)
+autocompleteEngine = AutocompleteEngine(hostRegistry, debounce=AUTOCOMPLETE_DEBOUNCE)
+suggestionEngine = SuggestionEngine(hostRegistry)
+# Commands that change containers run as jobs, limited per host, and one at a time per container.
+jobQueue = JobQueue(per_host=JOBS_PER_HOST, history=JOB_HISTORY)
+statusRoutine = StatusRoutine(discordClient, hostRegistry, window=PRESENCE_UPDATE_WINDOW)
+# Docker host name -> the stats history of its containers.
+metricsCollectors: dict[str, MetricsCollector] = {}
+# Deployed repositories are kept, so redeploying them only has to fetch what changed.
+repositoryCache = RepositoryCache(GIT_CACHE_DIR, max_size_bytes=int(GIT_CACHE_MAX_SIZE * 1024 ** 2),
+                                  max_repositories=GIT_CACHE_MAX_REPOSITORIES)
+deploymentState = DeploymentState(os.path.join(os.path.dirname(GIT_CACHE_DIR), "deployments.json"))
+
+telemetry.add_cache("autocomplete", autocompleteEngine)
+telemetry.add_cache("suggestions", suggestionEngine)
+telemetry.add_cache("paginator", Paginator)
+telemetry.add_cache("repositories", repositoryCache)
+
+# Alerting is optional, and only enabled when a channel to post the alerts in is configured.
+alertChannel = None
+if ALERT_CHANNEL:
+    alertChannel = AlertChannel(discordClient, int(ALERT_CHANNEL), max_per_minute=ALERT_RATE_LIMIT)
+
+
+def on_host_connected(host: DockerHost):
+    """Starts the background work of a docker host, once it could be reached."""
+    telemetry.instrument_docker(host.client, host.name)
+    telemetry.add_cache(f"container_index/{host.name}", host.index)
+
+    collector = metricsCollectors[host.name] = MetricsCollector(host.docker, host.index,
+                                                                cpu_budget=METRICS_CPU_BUDGET / 100)
+    discordClient.loop.create_task(collector.run())
+    logger.info(f"[INFO] Created 'container metrics' loop of `{host.name}`")
+
+    if alertChannel is not None:
+        # Every watched container takes a thread and a docker connection, so only the chosen ones are watched.
+        if len(ERROR_WATCH_CONTAINERS) > 0:
+            ErrorWatcher(host.docker, host.index, alertChannel, ERROR_WATCH_CONTAINERS, error_pattern=ERROR_PATTERN,
+                         max_watched=ERROR_WATCH_MAX).start()
+            logger.info(f"[INFO] Watching the logs of containers on `{host.name}` matching {ERROR_WATCH_CONTAINERS} "
+                        f"for errors")
+
+        EventAlerter(host.index, alertChannel, window=ALERT_WINDOW,
+                     restart_loop_threshold=RESTART_LOOP_THRESHOLD).start()
+        logger.info(f"[INFO] Alerting on crashes, out of memory kills, failing health checks and restart loops of "
+                    f"containers on `{host.name}`")
+
+
+hostRegistry.on_connect(on_host_connected)
+startupTimer.mark("setup")
 
 
 @discordClient.event
@@ -52,8 +160,26 @@ async def on_ready():
     logger.info(f"[INFO] Client logged in as {discordClient.user}")
     logger.info(f"[INFO] Running version {APP_VERSION}")
 
-    discordClient.loop.create_task(StatusRoutine(discordClient, dockerClient))
+    # on_ready is also called after reconnecting, only start the background work once.
+    if hostRegistry.started:
+        return
+    startupTimer.mark("gateway")
+
+    if METRICS_PORT > 0:
+        discordClient.loop.create_task(telemetry.run())
+
+    if alertChannel is not None:
+        discordClient.loop.create_task(alertChannel.run())
+
+    hostRegistry.add_listener(statusRoutine.signal)
+    # Hosts that can't be reached yet are retried in the background.
+    await hostRegistry.start()
+    logger.info("[INFO] Started the container indexes")
+    startupTimer.mark("container indexes")
+
+    discordClient.loop.create_task(statusRoutine.run())
     logger.info("[INFO] Created 'container count status' loop")
+    logger.info(f"[INFO] {startupTimer.summary()}")
 
 
 # COMMANDS #
@@ -64,52 +190,91 @@ async def help(interaction: discord.Interaction):
     check_if_allowed(interaction.user.id)
 
     logger.info("[INFO] Executing help command.")
-    executor = CommandExecutor(dockerClient, interaction=interaction)
+    executor = create_executor(interaction)
     await executor.get_help()
 
-    await update_container_amount()
+    update_container_amount()
 
 
 @discordClient.tree.command()
 @app_commands.rename(container_name='container-name')
 @app_commands.describe(container_name='Leave empty to get all containers')
-async def containers(interaction: discord.Interaction, container_name: str = "", status: str = ""):
+@app_commands.describe(host='The docker host, leave empty for all hosts')
+async def containers(interaction: discord.Interaction, container_name: str = "", status: str = "", host: str = ""):
     """Overview of all containers. Use the filter to look for specific containers."""
     check_if_allowed(interaction.user.id)
 
     logger.info("[INFO] Executing container overview command.")
-    executor = CommandExecutor(dockerClient, interaction=interaction)
+    executor = create_executor(interaction, host)
     await executor.get_and_send_containers(container_name, status)
 
-    await update_container_amount()
+    update_container_amount()
+
+
+@discordClient.tree.command()
+@app_commands.rename(container_name='container-name')
+@app_commands.describe(container_name='Leave empty to get the stats of all running containers')
+@app_commands.rename(sort_by='sort-by')
+@app_commands.describe(sort_by='The metric to sort on, highest first')
+@app_commands.describe(host='The docker host, leave empty for all hosts')
+async def stats(interaction: discord.Interaction, container_name: str = "",
+                sort_by: Literal["cpu", "memory", "net", "block"] = "cpu", host: str = ""):
+    """Resource usage (CPU, memory, network and block I/O) of the running containers."""
+    check_if_allowed(interaction.user.id)
+
+    logger.info("[INFO] Executing container stats command.")
+    executor = create_executor(interaction, host)
+    await executor.get_and_send_stats(container_name, sort_by)
+
+    update_container_amount()
+
+
+@discordClient.tree.command()
+@app_commands.rename(container_name='container-name')
+@app_commands.describe(container_name='The name of the container to get the history of')
+@app_commands.describe(metric='cpu (%), memory (bytes), net_rx or net_tx (bytes per second)')
+@app_commands.describe(window='How far to look back, like "30m", "6h" or "1d"')
+@app_commands.describe(host='The docker host of the container, only needed when its name is taken on several hosts')
+async def history(interaction: discord.Interaction, container_name: str,
+                  metric: Literal["cpu", "memory", "net_rx", "net_tx"] = "cpu", window: str = "1h", host: str = ""):
+    """Resource usage of a container over time."""
+    check_if_allowed(interaction.user.id)
+
+    logger.info("[INFO] Executing container history command.")
+    executor = create_executor(interaction, host)
+    await executor.send_metric_history(metricsCollectors, container_name, metric, window)
+
+    update_container_amount()
 
 
 @discordClient.tree.command()
 @app_commands.rename(container_name='container-name')
 @app_commands.describe(container_name='The name of the container to restart')
-async def restart(interaction: discord.Interaction, container_name: str):
+@app_commands.describe(host='The docker host of the container, only needed when its name is taken on several hosts')
+async def restart(interaction: discord.Interaction, container_name: str, host: str = ""):
     """Restart a container."""
     check_if_allowed(interaction.user.id)
 
-    executor = CommandExecutor(dockerClient, interaction=interaction)
+    executor = create_executor(interaction, host)
     logger.info("[INFO] Executing restart container command.")
     await executor.restart_container(container_name)
 
-    await update_container_amount()
+    update_container_amount()
 
 
 @discordClient.tree.command()
 @app_commands.rename(container_name='container-name')
 @app_commands.describe(container_name='The name of the container to stop')
-async def stop(interaction: discord.Interaction, container_name: str):
+@app_commands.describe(host='The docker host of the container, only needed when its name is taken on several hosts')
+async def stop(interaction: discord.Interaction, container_name: str, host: str = ""):
     """Stop a container."""
     check_if_allowed(interaction.user.id)
 
-    executor = CommandExecutor(dockerClient, interaction=interaction)
+    executor = create_executor(interaction, host)
     logger.info("[INFO] Executing stop container command.")
     await executor.stop_container(container_name)
 
-    await update_container_amount()
+    update_container_amount()
 
 
 @discordClient.tree.command()
@@ -117,58 +282,119 @@ async def stop(interaction: discord.Interaction, container_name: str):
 @app_commands.describe(old_name='The name of the container to rename')
 @app_commands.rename(new_name='new-name')
 @app_commands.describe(new_name='The new name of the container')
-async def rename(interaction: discord.Interaction, old_name: str, new_name: str):
+@app_commands.describe(host='The docker host of the container, only needed when its name is taken on several hosts')
+async def rename(interaction: discord.Interaction, old_name: str, new_name: str, host: str = ""):
     """Rename a container."""
     check_if_allowed(interaction.user.id)
 
-    executor = CommandExecutor(dockerClient, interaction=interaction)
+    executor = create_executor(interaction, host)
     logger.info("[INFO] Executing rename container command.")
     await executor.rename_container(old_name, new_name)
 
-    await update_container_amount()
+    update_container_amount()
 
 
 @discordClient.tree.command()
 @app_commands.rename(container_name='container-name')
 @app_commands.describe(container_name='The name of the container to remove')
-async def remove(interaction: discord.Interaction, container_name: str):
+@app_commands.describe(host='The docker host of the container, only needed when its name is taken on several hosts')
+async def remove(interaction: discord.Interaction, container_name: str, host: str = ""):
     """Remove a container. Warning: it cannot be recovered after."""
     check_if_allowed(interaction.user.id)
 
-    executor = CommandExecutor(dockerClient, interaction=interaction)
+    executor = create_executor(interaction, host)
     logger.info("[INFO] Executing remove container command.")
     await executor.remove_container(container_name)
 
-    await update_container_amount()
+    update_container_amount()
 
 
 @discordClient.tree.command()
 @app_commands.describe(container_range='The amount of the most recent containers to remove')
 @app_commands.describe(exclude='A comma-separated string of container names to exclude. '
                                'Example: lucky_buck,magical_unicorn,bread_can')
-async def remove_range(interaction: discord.Interaction, container_range: int, exclude: str = ""):
+@app_commands.describe(host='The docker host, leave empty for all hosts')
+async def remove_range(interaction: discord.Interaction, container_range: int, exclude: str = "", host: str = ""):
     """Retrieve the recent logs of a container."""
     check_if_allowed(interaction.user.id)
 
-    executor = CommandExecutor(dockerClient, interaction=interaction)
+    executor = create_executor(interaction, host)
     logger.info("[INFO] Executing removing range of containers command.")
     await executor.remove_range_of_containers(container_range, exclude)
 
-    await update_container_amount()
+    update_container_amount()
+
+
+@discordClient.tree.command()
+@app_commands.describe(action='What to do with the selected containers')
+@app_commands.describe(names='A comma-separated list of container names')
+@app_commands.describe(glob='A name pattern, like "api-*"')
+@app_commands.describe(label='A label, like "com.docker.compose.project=website"')
+@app_commands.describe(status='Only containers with this status')
+@app_commands.describe(exclude='A comma-separated list of container names to leave alone')
+@app_commands.describe(host='The docker host, leave empty for all hosts')
+async def bulk(interaction: discord.Interaction, action: Literal["restart", "stop", "start", "remove"],
+               names: str = "", glob: str = "", label: str = "", status: str = "", exclude: str = "", host: str = ""):
+    """Restart, stop, start or remove all containers matching the given selectors."""
+    check_if_allowed(interaction.user.id)
+
+    executor = create_executor(interaction, host)
+    logger.info("[INFO] Executing bulk operation command.")
+    await executor.bulk_operation(action, names=names, glob=glob, label=label, status=status, exclude=exclude)
+
+    update_container_amount()
 
 
 @discordClient.tree.command()
 @app_commands.rename(container_name='container-name')
 @app_commands.describe(container_name='The name of the container to get the logs from')
-async def logs(interaction: discord.Interaction, container_name: str):
+@app_commands.describe(tail='Only the last amount of lines, 0 for all of them')
+@app_commands.describe(since='Only logs since this time, like "10m", "2h", "1d" or "2023-08-01 12:30"')
+@app_commands.describe(until='Only logs until this time, like "10m", "2h", "1d" or "2023-08-01 12:30"')
+@app_commands.describe(timestamps='Prefix every line with its timestamp')
+@app_commands.describe(follow='Keep showing new lines in an updating message for a while')
+@app_commands.describe(host='The docker host of the container, only needed when its name is taken on several hosts')
+async def logs(interaction: discord.Interaction, container_name: str, tail: app_commands.Range[int, 0] = 10000,
+               since: str = "", until: str = "", timestamps: bool = False, follow: bool = False, host: str = ""):
     """Retrieve the recent logs of a container."""
     check_if_allowed(interaction.user.id)
 
-    executor = CommandExecutor(dockerClient, interaction=interaction)
-    logger.info("[INFO] Executing restart container command.")
-    await executor.retrieve_logs_from_container(container_name)
+    executor = create_executor(interaction, host)
+    if follow:
+        logger.info("[INFO] Executing follow logs command.")
+        await executor.follow_logs_of_container(container_name, tail=min(tail, 20))
+    else:
+        logger.info("[INFO] Executing retrieve logs command.")
+        await executor.retrieve_logs_from_container(container_name, tail=tail, since=since, until=until,
+                                                    timestamps=timestamps)
+
+    update_container_amount()
+
 
-    await update_container_amount()
+@discordClient.tree.command()
+@app_commands.describe(pattern='The regex to search for')
+@app_commands.describe(containers='A comma-separated list of containers to search in')
+@app_commands.rename(name_filter='name-filter')
+@app_commands.describe(name_filter='Search all containers whose name contains this')
+@app_commands.describe(since='Only logs since this time, like "10m", "2h", "1d" or "2023-08-01 12:30"')
+@app_commands.describe(until='Only logs until this time, like "10m", "2h", "1d" or "2023-08-01 12:30"')
+@app_commands.describe(context='The amount of lines to show around each match')
+@app_commands.rename(max_matches='max-matches')
+@app_commands.describe(max_matches='Stop searching after this many matches')
+@app_commands.rename(ignore_case='ignore-case')
+@app_commands.describe(host='The docker host, leave empty for all hosts')
+async def logsearch(interaction: discord.Interaction, pattern: str, containers: str = "", name_filter: str = "",
+                    since: str = "1h", until: str = "", context: app_commands.Range[int, 0, 10] = 2,
+                    max_matches: app_commands.Range[int, 1, 500] = 50, ignore_case: bool = False, host: str = ""):
+    """Search the logs of one or more containers for a regex."""
+    check_if_allowed(interaction.user.id)
+
+    executor = create_executor(interaction, host)
+    logger.info("[INFO] Executing search logs command.")
+    await executor.search_logs(pattern, container_names=containers, name_filter=name_filter, since=since,
+                               until=until, context=context, max_matches=max_matches, ignore_case=ignore_case)
+
+    update_container_amount()
 
 
 # Interaction with git repo's/hosted docker images #
@@ -179,29 +405,90 @@ async def logs(interaction: discord.Interaction, container_name: str):
 @app_commands.describe(image_name='The name of the image to pull and run')
 @app_commands.describe(cli_commands='command to run after the container started')
 @app_commands.describe(container_name='The name to give the new container')
+@app_commands.describe(host='The docker host to run it on, leave empty for the default host')
 async def run(interaction: discord.Interaction, image_name: str, cli_commands: str = None,
-              container_name: str = None):
+              container_name: str = None, host: str = ""):
     """Run a new container using an existing image like you would when using `docker run`."""
-    executor = CommandExecutor(dockerClient, interaction=interaction)
+    executor = create_executor(interaction, host)
     logger.info("[INFO] Executing run new container command.")
     await executor.run_new_container(image_name, cli_commands, container_name)
 
-    await update_container_amount()
+    update_container_amount()
 
 
 @discordClient.tree.command()
 @app_commands.describe(git_repo_url='The url of the git repository')
 @app_commands.describe(docker_compose_name='If the name of the compose file is different to "docker-compose.yml"')
+@app_commands.describe(host='The docker host to run it on, leave empty for the default host')
 async def runfromgit(interaction: discord.Interaction, git_repo_url: str,
-                     docker_compose_name: str = "docker-compose.yml"):
+                     docker_compose_name: str = "docker-compose.yml", host: str = ""):
     """Deploys the app from the given git repository. The repo needs to contain a docker-compose.yml file."""
     check_if_allowed(interaction.user.id)
 
-    executor = CommandExecutor(dockerClient, interaction=interaction)
+    executor = create_executor(interaction, host)
     logger.info("[INFO] Executing deploy_from_git command.")
-    await executor.deploy_from_git(git_repo_url, docker_compose_name=docker_compose_name)
+    await executor.deploy_from_git(repositoryCache, deploymentState, git_repo_url,
+                                   docker_compose_name=docker_compose_name, timeout=DEPLOY_TIMEOUT)
+
+
+@discordClient.tree.command()
+@app_commands.describe(host='Only the jobs on this docker host, leave empty for all hosts')
+async def jobs(interaction: discord.Interaction, host: str = ""):
+    """The running, queued and recently finished jobs, like restarts and deploys."""
+    check_if_allowed(interaction.user.id)
+
+    executor = create_executor(interaction, host)
+    logger.info("[INFO] Executing jobs command.")
+    await executor.get_and_send_jobs()
+
+
+@discordClient.tree.command()
+@app_commands.rename(job_id='job')
+@app_commands.describe(job_id='The number of the job to cancel')
+async def cancel(interaction: discord.Interaction, job_id: int):
+    """Cancel a running or queued job."""
+    check_if_allowed(interaction.user.id)
+
+    executor = create_executor(interaction)
+    logger.info("[INFO] Executing cancel job command.")
+    await executor.cancel_job(job_id)
+
+
+@discordClient.tree.command()
+@app_commands.describe(container_name='The container to mute, leave empty to list the muted containers',
+                       duration='How long, like 30m, 2h or 1d')
+async def mute(interaction: discord.Interaction, container_name: str = "", duration: str = "1h"):
+    """Mute the alerts of a container for a while."""
+    check_if_allowed(interaction.user.id)
+
+    executor = create_executor(interaction)
+    logger.info("[INFO] Executing mute command.")
+    await executor.mute_alerts(alertChannel, container_name.strip(), duration)
+
+
+@discordClient.tree.command()
+@app_commands.describe(container_name='The container to unmute')
+async def unmute(interaction: discord.Interaction, container_name: str):
+    """Unmute the alerts of a container."""
+    check_if_allowed(interaction.user.id)
+
+    executor = create_executor(interaction)
+    logger.info("[INFO] Executing unmute command.")
+    await executor.unmute_alerts(alertChannel, container_name.strip())
+
 
-    await update_container_amount()
+@discordClient.event
+async def on_interaction(interaction: discord.Interaction):
+    # The page navigation of lists that can be regenerated carries its state in the custom id, instead of the bot
+    # keeping every paginated message in memory. So it keeps working after a restart as well.
+    if interaction.type != discord.InteractionType.component:
+        return
+
+    page = decode_page_id(interaction.data.get("custom_id", ""))
+    if page is None or str(interaction.user.id) not in ADMINS:
+        return
+
+    await create_executor(interaction).navigate_page(page)
 
 
 # Autocomplete functionality #
@@ -211,35 +498,26 @@ async def runfromgit(interaction: discord.Interaction, git_repo_url: str,
 @remove.autocomplete('container_name')
 @rename.autocomplete('old_name')
 @containers.autocomplete('container_name')
+@stats.autocomplete('container_name')
+@history.autocomplete('container_name')
 @logs.autocomplete('container_name')
+@mute.autocomplete('container_name')
 async def containers_autocomplete(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
-    executor = CommandExecutor(dockerClient, interaction=interaction)
-    container_infos = await executor.get_containers_formatted()
-    container_names = list(map(lambda container_info: container_info["Name"], container_infos))
-
-    return [
-        app_commands.Choice(name=container, value=container)
-        for container in container_names
-        if current.lower() in container.lower()
-    ]
+    with telemetry.measure_autocomplete(interaction) as on_debounced:
+        return await autocompleteEngine.complete(interaction.user.id, current, on_debounced=on_debounced)
 
 
 @remove_range.autocomplete('exclude')
+@bulk.autocomplete('names')
+@bulk.autocomplete('exclude')
+@logsearch.autocomplete('containers')
 async def all_containers_autocomplete(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
-    executor = CommandExecutor(dockerClient, interaction=interaction)
-    container_infos = await executor.get_containers_formatted()
-    container_names = list(map(lambda container_info: container_info["Name"], container_infos))
-
-    # NOTE: isn't this lovely to look at :)
-    return [
-        app_commands.Choice(name=(container + ',' if current != '' else container) + current,
-                            value=current + "," + container)
-        for container in container_names
-        if container.lower() not in current.lower() or current == ""
-    ]
+    with telemetry.measure_autocomplete(interaction) as on_debounced:
+        return await autocompleteEngine.complete_multiple(interaction.user.id, current, on_debounced=on_debounced)
 
 
 @containers.autocomplete("status")
+@bulk.autocomplete("status")
 async def containers_autocomplete(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
     return [
         app_commands.Choice(name=status, value=status)
@@ -248,6 +526,52 @@ async def containers_autocomplete(interaction: discord.Interaction, current: str
     ]
 
 
+@unmute.autocomplete("container_name")
+async def muted_autocomplete(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+    mutes = alertChannel.mutes() if alertChannel is not None else {}
+    return [
+        app_commands.Choice(name=name[:100], value=name)
+        for name in sorted(mutes)
+        if current.lower() in name.lower()
+    ][:25]
+
+
+@cancel.autocomplete("job_id")
+async def jobs_autocomplete(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[int]]:
+    return [
+        app_commands.Choice(name=f"#{job.id} {job.description} ({job.status})"[:100], value=job.id)
+        for job in jobQueue.list_jobs()
+        if job.active and str(current).lstrip("#").lower() in f"{job.id} {job.description.lower()}"
+    ][:25]
+
+
+@jobs.autocomplete("host")
+@containers.autocomplete("host")
+@stats.autocomplete("host")
+@history.autocomplete("host")
+@restart.autocomplete("host")
+@stop.autocomplete("host")
+@rename.autocomplete("host")
+@remove.autocomplete("host")
+@remove_range.autocomplete("host")
+@bulk.autocomplete("host")
+@logs.autocomplete("host")
+@logsearch.autocomplete("host")
+@run.autocomplete("host")
+@runfromgit.autocomplete("host")
+async def hosts_autocomplete(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+    return [
+        app_commands.Choice(name=f"{name} ({host.status})"[:100], value=name)
+        for name, host in hostRegistry.hosts.items()
+        if current.lower() in name.lower()
+    ][:25]
+
+
+def create_executor(interaction: discord.Interaction = None, host: str = "") -> CommandExecutor:
+    return CommandExecutor(hostRegistry, interaction=interaction, host_name=host.strip(), suggestions=suggestionEngine,
+                           jobs=jobQueue)
+
+
 def check_if_allowed(userId):
     userId = str(userId)
     if userId not in ADMINS:
@@ -255,14 +579,8 @@ def check_if_allowed(userId):
         raise Exception(f"Nuh-uh: user {userId} is not a registered admin.")
 
 
-async def update_container_amount():
-    executor = CommandExecutor(dockerClient)
-    running, total = await executor.get_running_total_containers()
-
-    await discordClient.change_presence(activity=discord.Activity(
-        type=discord.ActivityType.watching,
-        name=f"{running} of {total} containers running")
-    )
+def update_container_amount():
+    statusRoutine.signal()
 
 
 try:
@@ -0,0 +1,41 @@
+import unittest
+from types import SimpleNamespace
+
+from Entities.ContainerIndex import ContainerIndex, summarize_container
+
+
+def create_index(*containers: (str, str)) -> ContainerIndex:
+    index = ContainerIndex(SimpleNamespace(client=None))
+    for name, container_id in containers:
+        index.containers[container_id] = summarize_container({"Id": container_id, "Names": [f"/{name}"]})
+    return index
+
+
+class ContainerIndexGetTest(unittest.TestCase):
+    def test_name_wins_over_id_prefix_of_another_container(self):
+        index = create_index(("web", "db12aa" + "0" * 58), ("db", "ff34bb" + "0" * 58))
+
+        self.assertEqual(index.get("db")["Name"], "db")
+
+    def test_full_id(self):
+        index = create_index(("web", "ab" * 32), ("api", "ab" * 31 + "cd"))
+
+        self.assertEqual(index.get("ab" * 32)["Name"], "web")
+
+    def test_unique_id_prefix(self):
+        index = create_index(("web", "a1" + "0" * 62), ("api", "b2" + "0" * 62))
+
+        self.assertEqual(index.get("a1")["Name"], "web")
+
+    def test_ambiguous_id_prefix_finds_nothing(self):
+        index = create_index(("web", "a1" + "0" * 62), ("api", "a2" + "0" * 62))
+
+        self.assertIsNone(index.get("a"))
+        self.assertEqual(index.misses, 1)
+
+    def test_empty_finds_nothing(self):
+        self.assertIsNone(create_index(("web", "a1" + "0" * 62)).get(""))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import asyncio
+import unittest
+
+from Entities.JobQueue import JobFailed, JobQueue
+
+
+def action_recording(events: list, name: str, result: str = "", delay: float = 0.01):
+    async def action():
+        events.append(f"{name} started")
+        await asyncio.sleep(delay)
+        events.append(f"{name} finished")
+        return result
+
+    return action
+
+
+class JobQueueTest(unittest.IsolatedAsyncioTestCase):
+    async def test_jobs_on_the_same_container_run_one_after_the_other(self):
+        queue, events = JobQueue(), []
+        first = queue.submit("restart web", action_recording(events, "first"), container_keys=["local/web"])
+        second = queue.submit("stop web", action_recording(events, "second"), container_keys=["local/web"])
+        await second.wait()
+
+        self.assertEqual(events, ["first started", "first finished", "second started", "second finished"])
+        self.assertEqual((first.status, second.status), ("done", "done"))
+
+    async def test_jobs_on_other_containers_run_at_the_same_time(self):
+        queue, events = JobQueue(), []
+        first = queue.submit("restart web", action_recording(events, "first"), container_keys=["local/web"])
+        second = queue.submit("restart db", action_recording(events, "second"), container_keys=["local/db"])
+        await asyncio.gather(first.wait(), second.wait())
+
+        self.assertEqual(events[:2], ["first started", "second started"])
+
+    async def test_host_limit(self):
+        queue, events = JobQueue(per_host=1), []
+        first = queue.submit("restart web", action_recording(events, "first"), host_names=["local"])
+        second = queue.submit("restart db", action_recording(events, "second"), host_names=["local"])
+        await asyncio.gather(first.wait(), second.wait())
+
+        self.assertEqual(events[:2], ["first started", "first finished"])
+
+    async def test_cancel_queued_job(self):
+        queue, events = JobQueue(), []
+        first = queue.submit("restart web", action_recording(events, "first"), container_keys=["local/web"])
+        second = queue.submit("stop web", action_recording(events, "second"), container_keys=["local/web"])
+        # Like a `/cancel`, which comes in after the job started waiting for its container.
+        await asyncio.sleep(0)
+
+        self.assertIs(queue.cancel(second.id, "admin"), second)
+        await asyncio.gather(first.wait(), second.wait())
+
+        self.assertEqual(second.status, "cancelled")
+        self.assertEqual(second.result, "cancelled by admin")
+        self.assertNotIn("second started", events)
+        self.assertEqual(first.status, "done")
+
+    async def test_cancel_unknown_or_finished_job(self):
+        queue = JobQueue()
+        job = queue.submit("restart web", action_recording([], "job"))
+        await job.wait()
+
+        self.assertIsNone(queue.cancel(job.id, "admin"))
+        self.assertIsNone(queue.cancel(job.id + 1, "admin"))
+        self.assertEqual(job.status, "done")
+
+    async def test_failed_job(self):
+        async def action():
+            raise JobFailed("image not found")
+
+        queue = JobQueue()
+        job = queue.submit("update web", action)
+        await job.wait()
+
+        self.assertEqual((job.status, job.result), ("failed", "image not found"))
+
+    async def test_history_is_bounded(self):
+        queue = JobQueue(history=2)
+        jobs = [queue.submit(f"job {position}", action_recording([], f"job {position}", delay=0))
+                for position in range(3)]
+        for job in jobs:
+            await job.wait()
+
+        self.assertIsNone(queue.get(jobs[0].id))
+        self.assertIs(queue.get(jobs[2].id), jobs[2])
+        self.assertEqual({job.id for job in queue.list_jobs()}, {jobs[1].id, jobs[2].id})
+        self.assertEqual(queue._slots, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
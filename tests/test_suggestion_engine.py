@@ -0,0 +1,72 @@
+import unittest
+from types import SimpleNamespace
+
+from Entities.SuggestionEngine import SuggestionEngine, MAX_SCORE, edit_distance, score_match
+
+
+def create_engine(*names: str, services: dict[str, str] = None) -> SuggestionEngine:
+    containers = []
+    for position, name in enumerate(names):
+        labels = {"com.docker.compose.service": services[name]} if name in (services or {}) else {}
+        containers.append({"Id": f"{position:02x}" + "ab" * 31, "Host": "local", "Name": name, "Labels": labels})
+
+    return SuggestionEngine(SimpleNamespace(version=1, list_containers=lambda: containers))
+
+
+class EditDistanceTest(unittest.TestCase):
+    def test_equal(self):
+        self.assertEqual(edit_distance("nginx", "nginx"), 0)
+
+    def test_swap_counts_as_one_edit(self):
+        self.assertEqual(edit_distance("ngnix", "nginx"), 1)
+
+    def test_insert_remove_and_replace(self):
+        self.assertEqual(edit_distance("", "api"), 3)
+        self.assertEqual(edit_distance("kitten", "sitting"), 3)
+
+
+class ScoreMatchTest(unittest.TestCase):
+    def test_exact_match_scores_zero(self):
+        self.assertEqual(score_match("nginx", "nginx", "name"), 0.0)
+
+    def test_word_of_a_longer_name(self):
+        self.assertLess(score_match("ngnix", "web-nginx-1", "name"), MAX_SCORE)
+
+    def test_unrelated_name(self):
+        self.assertGreater(score_match("postgres", "nginx", "name"), MAX_SCORE)
+
+    def test_short_or_non_hexadecimal_ids_are_not_matched(self):
+        self.assertEqual(score_match("abc", "abcdef123456", "id"), float("inf"))
+        self.assertEqual(score_match("nginx", "abcdef123456", "id"), float("inf"))
+
+    def test_id_prefix_with_a_typo(self):
+        self.assertLess(score_match("abcdf1", "abcdef123456", "id"), MAX_SCORE)
+
+
+class SuggestTest(unittest.TestCase):
+    def test_misspelled_name_ranks_closest_first(self):
+        engine = create_engine("nginx", "web-nginx-1", "postgres", "redis")
+
+        names = [container["Name"] for container, _, _ in engine.suggest("ngnix")]
+        self.assertEqual(names[0], "nginx")
+        self.assertIn("web-nginx-1", names)
+        self.assertNotIn("redis", names)
+
+    def test_compose_service(self):
+        engine = create_engine("project-db-1", "project-web-1", services={"project-db-1": "postgres"})
+
+        container, kind, key = engine.suggest("postgers")[0]
+        self.assertEqual((container["Name"], kind, key), ("project-db-1", "service", "postgres"))
+
+    def test_reuses_the_index_until_the_containers_change(self):
+        engine = create_engine("nginx")
+        engine.suggest("ngnix")
+        engine.suggest("ngin")
+        engine.container_index.version = 2
+        engine.suggest("ngnix")
+
+        self.assertEqual((engine.hits, engine.misses), (1, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
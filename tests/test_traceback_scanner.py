@@ -0,0 +1,64 @@
+import unittest
+
+from Entities.TracebackScanner import TracebackScanner
+
+TRACEBACK = (b"starting up\n"
+             b"Traceback (most recent call last):\n"
+             b'  File "/app/main.py", line 12, in <module>\n'
+             b"    run()\n"
+             b'  File "/app/worker.py", line 40, in run\n'
+             b"    raise ValueError('bad input 17')\n"
+             b"ValueError: bad input 17\n"
+             b"still running\n")
+
+
+def feed_in_chunks(scanner: TracebackScanner, data: bytes, size: int) -> list[dict]:
+    detections = []
+    for position in range(0, len(data), size):
+        detections += scanner.feed(data[position:position + size])
+    return detections + scanner.flush()
+
+
+class TracebackScannerTest(unittest.TestCase):
+    def test_traceback_in_one_chunk(self):
+        detections = TracebackScanner().feed(TRACEBACK)
+
+        self.assertEqual(len(detections), 1)
+        self.assertEqual(detections[0]["Kind"], "traceback")
+        self.assertEqual(detections[0]["Summary"], "ValueError: bad input 17")
+        self.assertIn('File "/app/worker.py", line 40', detections[0]["Text"])
+
+    def test_traceback_split_across_chunks(self):
+        whole = TracebackScanner().feed(TRACEBACK)
+
+        # Every chunk size splits the header, a frame or the exception line somewhere.
+        for size in (1, 7, 33, 64):
+            with self.subTest(size=size):
+                detections = feed_in_chunks(TracebackScanner(), TRACEBACK, size)
+                self.assertEqual([detection["Signature"] for detection in detections], [whole[0]["Signature"]])
+                self.assertEqual(detections[0]["Text"], whole[0]["Text"])
+
+    def test_flush_finishes_a_traceback_at_the_end_of_the_logs(self):
+        scanner = TracebackScanner()
+        self.assertEqual(scanner.feed(TRACEBACK[:TRACEBACK.index(b"ValueError: bad")]), [])
+
+        detections = scanner.flush()
+        self.assertEqual(len(detections), 1)
+        self.assertEqual(detections[0]["Summary"], "(end of logs)")
+
+    def test_flush_scans_the_last_line_without_newline(self):
+        scanner = TracebackScanner("FATAL")
+        self.assertEqual(scanner.feed(b"ok\nFATAL: disk full"), [])
+
+        detections = scanner.flush()
+        self.assertEqual([detection["Summary"] for detection in detections], ["FATAL: disk full"])
+        self.assertEqual(scanner.flush(), [])
+
+    def test_same_error_with_other_numbers_has_the_same_signature(self):
+        detections = TracebackScanner("FATAL").feed(b"FATAL: worker 3 died\nFATAL: worker 12 died\n")
+
+        self.assertEqual(detections[0]["Signature"], detections[1]["Signature"])
+
+
+if __name__ == "__main__":
+    unittest.main()